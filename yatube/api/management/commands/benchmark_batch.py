@@ -0,0 +1,73 @@
+import time
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Post
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает загрузку N постов отдельными запросами к post_detail '
+        'и одним запросом к /api/posts/batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        ids = list(
+            Post.objects.order_by('-id').values_list('id', flat=True)[
+                :options['count']
+            ]
+        )
+        if not ids:
+            raise CommandError('В базе нет постов.')
+        self.client = Client()
+        urls = [
+            reverse('posts:post_detail', kwargs={'post_id': post_id})
+            for post_id in ids
+        ]
+        batch_url = '{}?ids={}'.format(
+            reverse('api:posts_batch'), ','.join(map(str, ids))
+        )
+        self.stdout.write(f'Постов: {len(ids)}')
+        self.measure('post_detail по одному', urls, options['repeat'])
+        self.measure(
+            'batch, холодный кеш', [batch_url], options['repeat'],
+            clear_cache=True,
+        )
+        self.measure('batch, тёплый кеш', [batch_url], options['repeat'])
+
+    def measure(self, title, urls, repeat, clear_cache=False):
+        best = None
+        for _ in range(repeat):
+            if clear_cache:
+                cache.clear()
+            counter = QueryCounter()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                started = time.perf_counter()
+                for url in urls:
+                    self.client.get(url)
+                elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(
+            f'{title}: {best * 1000:.1f} мс, запросов к базе: '
+            f'{counter.count}'
+        )
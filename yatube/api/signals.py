@@ -0,0 +1,21 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from posts.models import Post
+
+from . import updates
+from .views import post_cache_key
+
+
+@receiver([post_save, post_delete], sender=Post)
+def forget_post(sender, instance, **kwargs):
+    """Сбрасывает закешированный для /api/posts/batch пост."""
+    cache.delete(post_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def notify_new_post(sender, instance, created, raw, **kwargs):
+    """Будит long-poll запросы, ждущие новых постов."""
+    if created and not raw and not instance.is_hidden:
+        updates.publish(instance)
@@ -0,0 +1,281 @@
+import base64
+import json
+import threading
+import time
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import updates
+from posts.models import ArchivedPost, Follow, Group, Post, User
+
+
+@override_settings(API_PAGE_SIZE=2, API_MAX_PAGE_SIZE=3)
+class ApiViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+
+    def get(self, name, data=None, **kwargs):
+        response = self.client.get(reverse(name, kwargs=kwargs), data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return json.loads(response.content)
+
+    def test_posts_keyset_pages(self):
+        """Лента отдаётся страницами по cursor без пропусков и повторов."""
+        ids = []
+        data = self.get('api:posts')
+        while True:
+            self.assertLessEqual(len(data['results']), 2)
+            ids += [post['id'] for post in data['results']]
+            if not data['next']:
+                break
+            data = self.get('api:posts', {'cursor': data['next']})
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        """fields= ограничивает поля поста."""
+        data = self.get('api:posts', {'fields': 'id,author,group'})
+        self.assertEqual(data['results'][0], {
+            'id': self.posts[-1].id,
+            'author': self.author.username,
+            'group': self.group.slug,
+        })
+
+    def test_limit_is_capped(self):
+        """limit не может превышать API_MAX_PAGE_SIZE."""
+        data = self.get('api:posts', {'limit': 100})
+        self.assertEqual(len(data['results']), 3)
+
+    def test_bad_params(self):
+        """Неверные cursor, fields и limit дают ответ 400."""
+        for params in (
+            {'cursor': 'мусор'},
+            {'cursor': base64.urlsafe_b64encode(b'foo|1').decode()},
+            {'cursor': base64.urlsafe_b64encode(
+                b'2000-01-01T00:00:00|1'
+            ).decode()},
+            {'fields': 'password'},
+            {'limit': 'много'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('api:posts'), params)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_etag(self):
+        """Повторный запрос с If-None-Match получает 304."""
+        response = self.client.get(reverse('api:posts'))
+        self.assertIn('max-age', response['Cache-Control'])
+        response = self.client.get(
+            reverse('api:posts'), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_group_and_profile(self):
+        """Группа и профиль отдаются вместе со своими постами."""
+        group = self.get('api:group', slug=self.group.slug)
+        self.assertEqual(group['title'], self.group.title)
+        profile = self.get('api:profile', username=self.author.username)
+        self.assertEqual(profile['username'], self.author.username)
+        posts = self.get('api:group_posts', slug=self.group.slug)
+        self.assertEqual(posts['results'][0]['id'], self.posts[-1].id)
+
+    def test_profile_posts_include_archive(self):
+        """В постах профиля есть и архивные посты."""
+        post = self.posts[0]
+        ArchivedPost.objects.create(
+            id=post.id, text=post.text, pub_date=post.pub_date,
+            author=self.author, group=self.group,
+        )
+        Post.objects.filter(id=post.id).delete()
+        ids = []
+        data = self.get(
+            'api:profile_posts', {'limit': 3}, username=self.author.username
+        )
+        ids += [row['id'] for row in data['results']]
+        data = self.get(
+            'api:profile_posts', {'limit': 3, 'cursor': data['next']},
+            username=self.author.username,
+        )
+        ids += [row['id'] for row in data['results']]
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_hidden_group_not_found(self):
+        """Скрытая группа недоступна через API."""
+        Group.objects.filter(id=self.group.id).update(is_hidden=True)
+        response = self.client.get(
+            reverse('api:group', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+@override_settings(API_BATCH_MAX=3)
+class ApiBatchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def batch(self, ids, **params):
+        return self.client.get(
+            reverse('api:posts_batch'),
+            {'ids': ','.join(map(str, ids)), **params},
+        )
+
+    def test_batch_keeps_request_order(self):
+        """Посты возвращаются в порядке id из запроса."""
+        ids = [self.posts[2].id, self.posts[0].id, 999]
+        with self.assertNumQueries(3):
+            data = json.loads(self.batch(ids).content)
+        self.assertEqual(
+            [post['id'] for post in data['results']], ids[:2]
+        )
+        self.assertEqual(data['results'][0]['author'], 'auth')
+        self.assertEqual(data['missing'], [999])
+
+    def test_batch_uses_cache(self):
+        """Повторный запрос берёт посты из кеша, изменение сбрасывает кеш."""
+        ids = [post.id for post in self.posts]
+        self.batch(ids)
+        with self.assertNumQueries(0):
+            self.batch(ids, fields='id')
+        post = self.posts[0]
+        post.text = 'Новый текст'
+        post.save()
+        with self.assertNumQueries(2):
+            data = json.loads(self.batch(ids, fields='id,text').content)
+        self.assertEqual(data['results'][0]['text'], 'Новый текст')
+
+    def test_batch_limit(self):
+        """Слишком длинный или неверный список id даёт ответ 400."""
+        for ids in ([1, 2, 3, 4], ['x']):
+            with self.subTest(ids=ids):
+                self.assertEqual(
+                    self.batch(ids).status_code, HTTPStatus.BAD_REQUEST
+                )
+
+
+@override_settings(
+    API_LONGPOLL_SECONDS=1, API_LONGPOLL_STEP=0.05, POSTS_LIVE_UPDATES=True
+)
+class ApiUpdatesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(text='Старый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def poll(self, since=None, **params):
+        if since:
+            params['since'] = since
+        response = self.client.get(reverse('api:posts_updates'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return json.loads(response.content)
+
+    def test_new_post_fragment(self):
+        """После since приходят только новые посты с готовой разметкой."""
+        since = self.poll()['next']
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        data = self.poll(since)
+        self.assertEqual([row['id'] for row in data['results']], [post.id])
+        self.assertIn('Новый пост', data['results'][0]['html'])
+        self.assertNotEqual(data['next'], since)
+
+    def test_idle_poll_skips_database(self):
+        """Пока новых постов нет, опрос не обращается к базе."""
+        since = self.poll()['next']
+        with self.assertNumQueries(0):
+            data = self.poll(since, timeout=0.1)
+        self.assertEqual(data, {'results': [], 'next': since})
+
+    def test_follow_feed(self):
+        """Лента подписок отдаёт только посты избранных авторов."""
+        self.client.force_login(self.reader)
+        since = self.poll(feed='follow')['next']
+        Post.objects.create(text='Чужой пост', author=self.reader)
+        data = self.poll(since, feed='follow', timeout=0.1)
+        self.assertEqual(data['results'], [])
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост автора', author=self.author)
+        data = self.poll(since, feed='follow')
+        self.assertEqual([row['id'] for row in data['results']], [post.id])
+
+    def test_bad_params(self):
+        """Неверные timeout и since дают ответ 400."""
+        for params in (
+            {'timeout': 'nan'},
+            {'timeout': 'inf'},
+            {'timeout': '-1'},
+            {'since': base64.urlsafe_b64encode(b'foo|1').decode()},
+            {'since': base64.urlsafe_b64encode(
+                b'2000-01-01T00:00:00|1'
+            ).decode()},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(
+                    reverse('api:posts_updates'), params
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.BAD_REQUEST
+                )
+
+    def test_follow_feed_requires_login(self):
+        """Лента подписок недоступна анониму."""
+        response = self.client.get(
+            reverse('api:posts_updates'), {'feed': 'follow'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_wait_wakes_on_new_post(self):
+        """Ожидание прерывается сигналом о новом посте."""
+        since = updates.latest()
+        post = Post(
+            id=self.post.id + 1, text='Пост', author=self.author,
+            pub_date=self.post.pub_date,
+        )
+        timer = threading.Timer(0.05, updates.publish, [post])
+        timer.start()
+        started = time.monotonic()
+        with self.settings(API_LONGPOLL_STEP=10):
+            key = updates.wait_newer(since, 5)
+        timer.join()
+        self.assertEqual(key, (post.pub_date, post.id))
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_live_updates_setting(self):
+        """Подгрузка новых постов и long-poll включаются настройкой."""
+        url = reverse('posts:index')
+        self.assertContains(self.client.get(url), 'live-posts')
+        cache.clear()
+        with self.settings(POSTS_LIVE_UPDATES=False):
+            self.assertNotContains(self.client.get(url), 'live-posts')
+            response = self.client.get(reverse('api:posts_updates'))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,61 @@
+"""Оповещение long-poll запросов о новых постах.
+
+Ключ (pub_date, id) самого нового поста хранится в кеше, чтобы пустой
+опрос не ходил в базу. Запросы этого процесса будит threading.Condition
+из сигнала post_save; посты из других процессов замечаются при проверке
+кеша раз в API_LONGPOLL_STEP секунд.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from posts import sharding
+from posts.models import Post
+
+LATEST_KEY = 'api:posts:latest'
+
+_condition = threading.Condition()
+
+
+def publish(post):
+    """Запоминает новый пост и будит ожидающие запросы."""
+    key = (post.pub_date, post.pk)
+    current = cache.get(LATEST_KEY)
+    if current is None or key > current:
+        cache.set(LATEST_KEY, key, None)
+    with _condition:
+        _condition.notify_all()
+
+
+def latest():
+    """Ключ самого нового поста; база читается, только если кеш пуст."""
+    key = cache.get(LATEST_KEY)
+    if key is None:
+        keys = [
+            row
+            for queryset in sharding.per_shard(Post.objects.all())
+            for row in queryset.order_by('-pub_date', '-id').values_list(
+                'pub_date', 'id'
+            )[:1]
+        ]
+        if not keys:
+            return None
+        key = max(keys)
+        cache.add(LATEST_KEY, key, None)
+    return key
+
+
+def wait_newer(since, timeout):
+    """Ключ поста новее since или None, если за timeout его не появилось."""
+    deadline = time.monotonic() + timeout
+    while True:
+        key = latest()
+        if key is not None and (since is None or key > since):
+            return key
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        with _condition:
+            _condition.wait(min(remaining, settings.API_LONGPOLL_STEP))
@@ -0,0 +1,23 @@
+from django.urls import path
+from . import views
+
+
+app_name = 'api'
+
+urlpatterns = [
+    path('posts/', views.posts_list, name='posts'),
+    path('posts/batch/', views.posts_batch, name='posts_batch'),
+    path('posts/updates/', views.posts_updates, name='posts_updates'),
+    path('groups/<slug:slug>/', views.group_detail, name='group'),
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    path(
+        'profiles/<str:username>/',
+        views.profile_detail,
+        name='profile'
+    ),
+    path(
+        'profiles/<str:username>/posts/',
+        views.profile_posts,
+        name='profile_posts'
+    ),
+]
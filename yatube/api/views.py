@@ -0,0 +1,371 @@
+import base64
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, prefetch_related_objects
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_safe
+
+from posts import sharding
+from posts.models import ArchivedPost, Follow, Group, Post, User
+
+from . import updates
+
+# Поля поста, которые можно запросить через ?fields=
+POST_FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+# Колонки для values(): автор и группа подставляются отдельным запросом
+# на страницу, потому что посты могут лежать в шардах без этих таблиц.
+POST_COLUMNS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+
+
+class ApiError(Exception):
+    pass
+
+
+def json_response(request, data, status=HTTPStatus.OK):
+    """JSON-ответ с ETag и заголовками для кеширования."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    etag = '"{}"'.format(hashlib.md5(body.encode()).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            body, content_type='application/json', status=status
+        )
+    response['ETag'] = etag
+    patch_cache_control(
+        response, public=True, max_age=settings.API_CACHE_SECONDS
+    )
+    return response
+
+
+def error_response(message):
+    return HttpResponse(
+        json.dumps({'detail': message}, ensure_ascii=False),
+        content_type='application/json',
+        status=HTTPStatus.BAD_REQUEST,
+    )
+
+
+def encode_cursor(row):
+    return encode_key(row['pub_date'], row['id'])
+
+
+def encode_key(pub_date, post_id):
+    value = f'{pub_date.isoformat()}|{post_id}'
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        pub_date, post_id = base64.urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split('|')
+        pub_date, post_id = parse_datetime(pub_date), int(post_id)
+    except (ValueError, TypeError):
+        raise ApiError('Неверный cursor.')
+    # Курсоры выдаются с часовым поясом; наивную дату не с чем сравнить.
+    if pub_date is None or timezone.is_naive(pub_date):
+        raise ApiError('Неверный cursor.')
+    return pub_date, post_id
+
+
+def requested_fields(request):
+    fields = request.GET.get('fields')
+    if not fields:
+        return POST_FIELDS
+    fields = tuple(field.strip() for field in fields.split(','))
+    unknown = set(fields) - set(POST_FIELDS)
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(sorted(unknown))}.')
+    return fields
+
+
+def page_size(request):
+    try:
+        limit = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError('limit должен быть числом.')
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def serialize(rows, fields):
+    """Заменяет id автора и группы на username и slug."""
+    authors = groups = {}
+    author_ids = {row['author_id'] for row in rows}
+    group_ids = {row['group_id'] for row in rows} - {None}
+    if 'author' in fields and author_ids:
+        authors = dict(User.objects.filter(
+            id__in=author_ids
+        ).values_list('id', 'username'))
+    if 'group' in fields and group_ids:
+        groups = dict(Group.objects.filter(
+            id__in=group_ids
+        ).values_list('id', 'slug'))
+    result = []
+    for row in rows:
+        row['author'] = authors.get(row['author_id'])
+        row['group'] = groups.get(row['group_id'])
+        result.append({field: row[field] for field in fields})
+    return result
+
+
+def post_page(request, querysets):
+    """Страница постов с продолжением по ключу (pub_date, id).
+
+    Каждая выборка — шард или архив — отдаёт не больше limit строк,
+    а общая страница собирается слиянием без OFFSET.
+    """
+    fields = requested_fields(request)
+    limit = page_size(request)
+    keyset = Q()
+    cursor = request.GET.get('cursor')
+    if cursor:
+        pub_date, post_id = decode_cursor(cursor)
+        keyset = Q(pub_date__lt=pub_date) | Q(
+            pub_date=pub_date, id__lt=post_id
+        )
+    parts = [
+        queryset.filter(keyset).order_by('-pub_date', '-id').values(
+            *POST_COLUMNS
+        )[:limit + 1]
+        for queryset in querysets
+    ]
+    rows = list(itertools.islice(heapq.merge(
+        *parts,
+        key=lambda row: (row['pub_date'], row['id']),
+        reverse=True,
+    ), limit + 1))
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return {
+        'results': serialize(rows[:limit], fields),
+        'next': next_cursor,
+    }
+
+
+def api_view(func):
+    """GET/HEAD-обработчик, превращающий ApiError в ответ 400."""
+    @require_safe
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = func(request, *args, **kwargs)
+        except ApiError as error:
+            return error_response(str(error))
+        return json_response(request, data)
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    return wrapper
+
+
+def post_cache_key(post_id):
+    return f'api:post:{post_id}'
+
+
+def parse_ids(request):
+    try:
+        ids = [int(value) for value in request.GET.get('ids', '').split(',')]
+    except ValueError:
+        raise ApiError('ids должен быть списком чисел через запятую.')
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.API_BATCH_MAX:
+        raise ApiError(f'Не больше {settings.API_BATCH_MAX} id за запрос.')
+    return ids
+
+
+def fetch_posts(ids):
+    """Посты по id: один запрос IN на шард и ещё один в архив.
+
+    Авторы и группы подставляются двумя запросами на всю пачку.
+    """
+    if sharding.is_enabled():
+        shards = {}
+        for post_id in ids:
+            shards.setdefault(sharding.shard_for_post(post_id), []).append(
+                post_id
+            )
+        querysets = [
+            Post.objects.using(shard).filter(id__in=shard_ids)
+            for shard, shard_ids in shards.items()
+        ]
+    else:
+        querysets = [Post.objects.filter(id__in=ids)]
+    rows = [
+        row
+        for queryset in querysets
+        for row in queryset.order_by().values(*POST_COLUMNS)
+    ]
+    missing = set(ids) - {row['id'] for row in rows}
+    if missing:
+        rows += ArchivedPost.objects.filter(
+            id__in=missing
+        ).order_by().values(*POST_COLUMNS)
+    return {post['id']: post for post in serialize(rows, POST_FIELDS)}
+
+
+def cached_posts(ids):
+    """Словарь id -> пост; из базы читаются только посты не из кеша."""
+    keys = {post_cache_key(post_id): post_id for post_id in ids}
+    posts = {
+        keys[key]: post for key, post in cache.get_many(list(keys)).items()
+    }
+    missing = [post_id for post_id in ids if post_id not in posts]
+    if missing:
+        fetched = fetch_posts(missing)
+        cache.set_many(
+            {post_cache_key(post_id): post
+             for post_id, post in fetched.items()},
+            settings.API_POST_CACHE_SECONDS,
+        )
+        posts.update(fetched)
+    return posts
+
+
+@api_view
+def posts_batch(request):
+    """Посты по списку ?ids= в порядке запроса."""
+    fields = requested_fields(request)
+    ids = parse_ids(request)
+    posts = cached_posts(ids)
+    return {
+        'results': [
+            {field: posts[post_id][field] for field in fields}
+            for post_id in ids if post_id in posts
+        ],
+        'missing': [post_id for post_id in ids if post_id not in posts],
+    }
+
+
+def feed_posts(request):
+    """Посты ленты ?feed=index|follow."""
+    feed = request.GET.get('feed', 'index')
+    if feed == 'index':
+        return Post.objects.all()
+    if feed != 'follow':
+        raise ApiError('feed должен быть index или follow.')
+    if not request.user.is_authenticated:
+        raise PermissionDenied
+    return Post.objects.filter(author_id__in=list(
+        Follow.objects.filter(user=request.user).values_list(
+            'author_id', flat=True
+        )
+    ))
+
+
+def newer_posts(queryset, since, limit):
+    """Посты новее ключа since, от новых к старым, с авторами и группами."""
+    pub_date, post_id = since
+    newer = Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=post_id)
+    posts = list(itertools.islice(heapq.merge(
+        *(
+            source.filter(newer).order_by('-pub_date', '-id')[:limit]
+            for source in sharding.per_shard(queryset)
+        ),
+        key=lambda post: (post.pub_date, post.id),
+        reverse=True,
+    ), limit))
+    prefetch_related_objects(posts, 'author', 'group')
+    return posts
+
+
+@never_cache
+@api_view
+def posts_updates(request):
+    """Long-poll: ждёт постов новее ?since= не дольше API_LONGPOLL_SECONDS.
+
+    Без since сразу отдаёт курсор самого нового поста. Пока новых постов
+    нет, запрос не обращается к базе. Доступен при POSTS_LIVE_UPDATES.
+    """
+    if not settings.POSTS_LIVE_UPDATES:
+        raise Http404('Подгрузка новых постов выключена.')
+    queryset = feed_posts(request)
+    try:
+        timeout = float(
+            request.GET.get('timeout', settings.API_LONGPOLL_SECONDS)
+        )
+    except ValueError:
+        raise ApiError('timeout должен быть числом.')
+    if not math.isfinite(timeout) or timeout < 0:
+        raise ApiError('timeout должен быть неотрицательным числом.')
+    timeout = min(timeout, settings.API_LONGPOLL_SECONDS)
+    cursor = request.GET.get('since')
+    if not cursor:
+        key = updates.latest()
+        return {'results': [], 'next': key and encode_key(*key)}
+    since = seen = decode_cursor(cursor)
+    deadline = time.monotonic() + timeout
+    while True:
+        key = updates.wait_newer(seen, deadline - time.monotonic())
+        if key is None:
+            return {'results': [], 'next': cursor}
+        posts = newer_posts(queryset, since, settings.API_MAX_PAGE_SIZE)
+        if posts:
+            break
+        # Новый пост не из этой ленты: ждём следующего.
+        seen = key
+    return {
+        'results': [
+            {
+                'id': post.id,
+                'html': render_to_string(
+                    'posts/includes/post_card.html', {'post': post}, request,
+                    using=settings.POSTS_TEMPLATE_ENGINE,
+                ),
+            }
+            for post in posts
+        ],
+        'next': encode_key(posts[0].pub_date, posts[0].id),
+    }
+
+
+@api_view
+def posts_list(request):
+    return post_page(request, sharding.per_shard(Post.objects.all()))
+
+
+@api_view
+def group_detail(request, slug):
+    return get_object_or_404(
+        Group.objects.values('id', 'title', 'slug', 'description'),
+        slug=slug,
+        is_hidden=False,
+    )
+
+
+@api_view
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug, is_hidden=False)
+    return post_page(
+        request, sharding.per_shard(Post.objects.filter(group=group))
+    )
+
+
+@api_view
+def profile_detail(request, username):
+    return get_object_or_404(
+        User.objects.values('id', 'username', 'first_name', 'last_name'),
+        username=username,
+        is_active=True,
+    )
+
+
+@api_view
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username, is_active=True)
+    return post_page(request, [
+        sharding.author_posts(author),
+        ArchivedPost.objects.filter(author=author),
+    ])
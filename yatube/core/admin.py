@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_after',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('dedup_key',)
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
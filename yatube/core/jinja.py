@@ -0,0 +1,70 @@
+"""Окружение Jinja2 для горячих шаблонов ленты (каталог jinja2/).
+
+Движок подключается в settings.py, только если установлен jinja2, а
+ленты отрисовываются им при POSTS_TEMPLATE_ENGINE = 'jinja2'. Здесь —
+замены тегов и фильтров Django, которые нужны этим шаблонам.
+"""
+import logging
+
+from django.template import defaultfilters
+from django.template.backends.jinja2 import (
+    Jinja2 as BaseJinja2, Template
+)
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import timezone
+from jinja2 import Environment
+from sorl.thumbnail import get_thumbnail
+
+from .templates import TimedRender
+from .templatetags.user_filters import addclass
+
+logger = logging.getLogger('yatube.templates')
+
+
+def url(view_name, *args, **kwargs):
+    return reverse(view_name, args=args or None, kwargs=kwargs or None)
+
+
+def thumbnail(file, geometry, **options):
+    """Миниатюра или None, как пустая ветка тега {% thumbnail %}."""
+    if not file:
+        return None
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        logger.exception('Миниатюра %s не создана', file)
+        return None
+
+
+def date(value, arg=None):
+    return defaultfilters.date(timezone.template_localtime(value), arg)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'thumbnail': thumbnail,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+    })
+    return env
+
+
+class TimedTemplate(TimedRender, Template):
+    pass
+
+
+class Jinja2(BaseJinja2):
+    """Jinja2, время отрисовки которого попадает в метрики."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.env.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,151 @@
+"""Очередь отложенных задач в базе данных.
+
+Задача — импортируемая функция и её аргументы в JSON. Её ставит в
+очередь enqueue() из view или сигнала, а выполняет команда run_workers.
+Обработчик забирает задачу условным UPDATE по статусу, поэтому несколько
+процессов не возьмут одну задачу дважды. Упавшая задача повторяется с
+экспоненциальной задержкой до max_attempts раз. Задача с dedup_key не
+ставится повторно, пока такая же ждёт выполнения: это обеспечивает
+частичный уникальный индекс по dedup_key ожидающих задач. Задача,
+которую не удаётся вернуть в очередь из-за такой же ожидающей,
+закрывается: её работу сделает ожидающая.
+"""
+import json
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+SUPERSEDED = 'Не повторяется: такая же задача уже ждёт в очереди.'
+
+
+def job_name(func):
+    if isinstance(func, str):
+        return func
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, dedup_key='', delay=0, max_attempts=None,
+            **kwargs):
+    """Ставит вызов func(*args, **kwargs) в очередь.
+
+    Задача ставится после фиксации текущей транзакции, чтобы обработчик
+    видел записанные в ней данные.
+    """
+    def create():
+        try:
+            with transaction.atomic():
+                Job.objects.create(
+                    name=job_name(func),
+                    arguments=json.dumps({'args': args, 'kwargs': kwargs}),
+                    dedup_key=dedup_key,
+                    max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+                    run_after=timezone.now() + timedelta(seconds=delay),
+                )
+        except IntegrityError:
+            if not dedup_key:
+                raise
+    transaction.on_commit(create)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def supersede(job):
+    """Закрывает задачу, которую заменяет такая же ожидающая."""
+    job.status = Job.FAILED
+    job.finished = timezone.now()
+    job.last_error = '\n'.join(filter(None, [job.last_error, SUPERSEDED]))
+    job.locked_by = ''
+    job.locked_at = None
+    job.save()
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи обработчиков, которые не завершились."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT
+        ),
+    )
+    requeued = 0
+    for job in stale:
+        try:
+            with transaction.atomic():
+                requeued += Job.objects.filter(
+                    id=job.id, status=Job.RUNNING
+                ).update(status=Job.PENDING, locked_by='', locked_at=None)
+        except IntegrityError:
+            supersede(job)
+    return requeued
+
+
+def claim():
+    """Забирает следующую готовую задачу или возвращает None."""
+    while True:
+        now = timezone.now()
+        job = Job.objects.filter(
+            status=Job.PENDING, run_after__lte=now
+        ).order_by('run_after', 'id').first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(
+            id=job.id, status=Job.PENDING
+        ).update(status=Job.RUNNING, locked_by=worker_id(), locked_at=now)
+        if claimed:
+            job.status = Job.RUNNING
+            return job
+
+
+def backoff(attempts):
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run(job):
+    """Выполняет задачу и записывает результат."""
+    job.attempts += 1
+    try:
+        arguments = json.loads(job.arguments)
+        import_string(job.name)(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=backoff(job.attempts)
+            )
+        else:
+            job.status = Job.FAILED
+            job.finished = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.finished = timezone.now()
+    job.locked_by = ''
+    job.locked_at = None
+    try:
+        with transaction.atomic():
+            job.save()
+    except IntegrityError:
+        supersede(job)
+    return job.status == Job.DONE
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи; возвращает число выполненных попыток."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        processed += 1
+    return processed
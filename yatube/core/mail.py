@@ -0,0 +1,202 @@
+"""Отправка писем через очередь в каталоге.
+
+SpoolEmailBackend только складывает письма в EMAIL_SPOOL_DIR и сразу
+возвращает управление, поэтому медленный почтовый сервер не задерживает
+запрос. Команда send_spooled_mail отправляет письма пачками через одно
+соединение бэкенда EMAIL_SPOOL_BACKEND (например, SMTP или filebased).
+
+Каждое письмо пачки отправляется и удаляется из очереди отдельно, так
+что сбой одного письма не задерживает остальные и не отправляет
+повторно уже ушедшие. Неотправленное письмо повторяется с
+экспоненциальной задержкой от EMAIL_SPOOL_RETRY_DELAY секунд, а после
+EMAIL_SPOOL_MAX_ATTEMPTS попыток или если его не удалось прочитать —
+переносится в
+EMAIL_SPOOL_DEAD_DIR. Письма упавшего отправителя возвращаются в очередь
+через EMAIL_SPOOL_LOCK_TIMEOUT секунд.
+"""
+import logging
+import os
+import pickle
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+SPOOL_SUFFIX = '.mail'
+SENDING_SUFFIX = '.sending'
+# Имя файла: <не раньше>-<uuid>[~<неудачных попыток>].mail, где
+# <не раньше> — время постановки в очередь или следующей попытки
+ATTEMPTS_SEPARATOR = '~'
+
+logger = logging.getLogger('yatube.mail')
+
+
+class SpoolEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        os.makedirs(settings.EMAIL_SPOOL_DIR, exist_ok=True)
+        spooled = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                spool(message)
+            except OSError:
+                if not self.fail_silently:
+                    raise
+            else:
+                spooled += 1
+        return spooled
+
+
+def spool(message):
+    """Атомарно кладёт письмо в каталог очереди."""
+    message.connection = None
+    name = f'{time.time():.6f}-{uuid.uuid4().hex}'
+    path = os.path.join(settings.EMAIL_SPOOL_DIR, name)
+    with open(path + '.tmp', 'wb') as file:
+        pickle.dump(message, file)
+    os.replace(path + '.tmp', path + SPOOL_SUFFIX)
+
+
+def claim(limit):
+    """Забирает до limit писем, переименовывая файлы.
+
+    Переименование атомарно, поэтому два отправителя не возьмут одно
+    письмо. Время изменения файла отмечает, когда письмо взято.
+    """
+    try:
+        names = sorted(
+            name for name in os.listdir(settings.EMAIL_SPOOL_DIR)
+            if name.endswith(SPOOL_SUFFIX)
+        )
+    except FileNotFoundError:
+        return []
+    now = time.time()
+    claimed = []
+    for name in names:
+        if float(name.partition('-')[0]) > now:
+            # Время следующей попытки ещё не пришло.
+            break
+        path = os.path.join(settings.EMAIL_SPOOL_DIR, name)
+        sending = path[:-len(SPOOL_SUFFIX)] + SENDING_SUFFIX
+        try:
+            os.rename(path, sending)
+        except FileNotFoundError:
+            continue
+        os.utime(sending)
+        claimed.append(sending)
+        if len(claimed) == limit:
+            break
+    return claimed
+
+
+def attempts(path):
+    base = os.path.basename(path).rsplit('.', 1)[0]
+    _, _, count = base.partition(ATTEMPTS_SEPARATOR)
+    return int(count or 0)
+
+
+def release(paths):
+    for path in paths:
+        os.replace(path, path[:-len(SENDING_SUFFIX)] + SPOOL_SUFFIX)
+
+
+def bury(path):
+    """Переносит письмо в каталог писем, которые не удалось отправить."""
+    os.makedirs(settings.EMAIL_SPOOL_DEAD_DIR, exist_ok=True)
+    name = os.path.basename(path)[:-len(SENDING_SUFFIX)] + SPOOL_SUFFIX
+    os.replace(path, os.path.join(settings.EMAIL_SPOOL_DEAD_DIR, name))
+
+
+def fail(path):
+    """Возвращает письмо в очередь с ещё одной попыткой или хоронит его."""
+    count = attempts(path) + 1
+    if count >= settings.EMAIL_SPOOL_MAX_ATTEMPTS:
+        bury(path)
+        return
+    message_id = os.path.basename(path)[:-len(SENDING_SUFFIX)].partition(
+        ATTEMPTS_SEPARATOR
+    )[0].partition('-')[2]
+    retry_at = time.time() + settings.EMAIL_SPOOL_RETRY_DELAY * 2 ** (
+        count - 1
+    )
+    os.replace(path, os.path.join(
+        settings.EMAIL_SPOOL_DIR,
+        f'{retry_at:.6f}-{message_id}{ATTEMPTS_SEPARATOR}{count}'
+        f'{SPOOL_SUFFIX}',
+    ))
+
+
+def recover():
+    """Возвращает в очередь письма отправителей, которые не завершились."""
+    try:
+        names = os.listdir(settings.EMAIL_SPOOL_DIR)
+    except FileNotFoundError:
+        return 0
+    stale_before = time.time() - settings.EMAIL_SPOOL_LOCK_TIMEOUT
+    recovered = 0
+    for name in names:
+        path = os.path.join(settings.EMAIL_SPOOL_DIR, name)
+        try:
+            if (
+                name.endswith(SENDING_SUFFIX)
+                and os.path.getmtime(path) < stale_before
+            ):
+                # Письмо могло уйти до сбоя, поэтому это тоже попытка.
+                fail(path)
+                recovered += 1
+        except FileNotFoundError:
+            continue
+    return recovered
+
+
+def load(path):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def send_one(connection, path):
+    """Отправляет письмо path; True, если оно ушло."""
+    try:
+        message = load(path)
+    except Exception:
+        logger.exception('Письмо %s не читается', path)
+        bury(path)
+        return False
+    try:
+        connection.send_messages([message])
+    except Exception:
+        logger.exception('Письмо %s не отправлено', path)
+        fail(path)
+        # После ошибки соединение могло оборваться.
+        connection.close()
+        connection.open()
+        return False
+    os.remove(path)
+    return True
+
+
+def send_batch(batch_size=None):
+    """Отправляет одну пачку писем; возвращает число отправленных.
+
+    Если не удалось открыть соединение, оставшиеся письма возвращаются
+    в очередь.
+    """
+    paths = claim(batch_size or settings.EMAIL_SPOOL_BATCH_SIZE)
+    if not paths:
+        return 0
+    connection = get_connection(settings.EMAIL_SPOOL_BACKEND)
+    sent = 0
+    number = 0
+    try:
+        connection.open()
+        for number, path in enumerate(paths, start=1):
+            sent += send_one(connection, path)
+    except Exception:
+        release(paths[number:])
+        raise
+    finally:
+        connection.close()
+    return sent
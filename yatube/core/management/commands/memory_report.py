@@ -0,0 +1,98 @@
+import os
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import memory
+
+
+def kib(size):
+    return f'{size / 1024:.1f} КиБ'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка по снимкам памяти страницы: пики, остаток после ответа и '
+        'крупнейшие места выделения. С --compare показывает, что выросло '
+        'между первым и последним снимком одного процесса (кандидаты в '
+        'утечки). Без страницы перечисляет страницы со снимками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'view_name', nargs='?', help='Имя страницы, например posts:index'
+        )
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Сравнить первый и последний снимки страницы.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['view_name']:
+            self.list_views()
+            return
+        paths = memory.records(options['view_name'])
+        if not paths:
+            raise CommandError('Для этой страницы снимков нет.')
+        if options['compare']:
+            self.compare(paths, options['limit'])
+        else:
+            self.summary(paths, options['limit'])
+
+    def list_views(self):
+        if not os.path.isdir(settings.MEMORY_TRACING_DIR):
+            self.stdout.write('Снимков нет.')
+            return
+        for name in sorted(os.listdir(settings.MEMORY_TRACING_DIR)):
+            view_name = name.replace('.', ':')
+            peaks = [
+                memory.load(path)['peak']
+                for path in memory.records(view_name)
+            ]
+            if peaks:
+                self.stdout.write(
+                    f'{view_name}: снимков {len(peaks)}, пик медиана '
+                    f'{kib(statistics.median(peaks))}, '
+                    f'максимум {kib(max(peaks))}'
+                )
+
+    def summary(self, paths, limit):
+        records = [memory.load(path) for path in paths]
+        peaks = [record['peak'] for record in records]
+        retained = [record['retained'] for record in records]
+        self.stdout.write(
+            f'Снимков: {len(records)}\n'
+            f'Пик: медиана {kib(statistics.median(peaks))}, '
+            f'максимум {kib(max(peaks))}\n'
+            f'Остаток после ответа: медиана '
+            f'{kib(statistics.median(retained))}, '
+            f'максимум {kib(max(retained))}\n'
+            f'Крупнейшие места выделения в запросе с наибольшим пиком:'
+        )
+        worst = max(records, key=lambda record: record['peak'])
+        for item in worst['top'][:limit]:
+            self.write_site(item, item['size'])
+
+    def compare(self, paths, limit):
+        paths = memory.process_records(paths)
+        if len(paths) < 2:
+            raise CommandError(
+                'Для сравнения нужно хотя бы два снимка одного процесса.'
+            )
+        first = memory.load_snapshot(paths[0])
+        last = memory.load_snapshot(paths[-1])
+        self.stdout.write(
+            f'Рост между первым и последним из {len(paths)} снимков '
+            f'процесса {memory.pid_of(paths[-1])}:'
+        )
+        for item in memory.top_sites(last, first, limit):
+            if item['size_diff'] > 0:
+                self.write_site(item, item['size_diff'], sign='+')
+
+    def write_site(self, item, size, sign=''):
+        self.stdout.write(
+            f'{sign}{kib(size):>12} {item["count"]:>8} '
+            f'{item["site"]}  {item["line"]}'
+        )
@@ -0,0 +1,50 @@
+import os
+import pstats
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        'Объединяет профили страницы и показывает функции с наибольшим '
+        'накопленным временем. Без страницы перечисляет профили.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'view_name', nargs='?', help='Имя страницы, например posts:index'
+        )
+        parser.add_argument('--limit', type=int, default=30)
+        parser.add_argument(
+            '--sort', default='cumulative',
+            help='Порядок сортировки pstats.',
+        )
+        parser.add_argument(
+            '--token', action='store_true',
+            help='Показать значение заголовка X-Profile.',
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(profiling.make_token())
+            return
+        if not options['view_name']:
+            self.list_profiles()
+            return
+        paths = profiling.profiles(options['view_name'])
+        if not paths:
+            raise CommandError('Для этой страницы профилей нет.')
+        stats = pstats.Stats(*paths, stream=self.stdout)
+        self.stdout.write(f'Профилей: {len(paths)}')
+        stats.sort_stats(options['sort']).print_stats(options['limit'])
+
+    def list_profiles(self):
+        if not os.path.isdir(settings.PROFILING_DIR):
+            self.stdout.write('Профилей нет.')
+            return
+        for name in sorted(os.listdir(settings.PROFILING_DIR)):
+            count = len(profiling.profiles(name.replace('.', ':')))
+            self.stdout.write(f'{name.replace(".", ":")}: {count}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Показывает, сколько запросов пропущено и отклонено лимитами.'
+
+    def handle(self, *args, **options):
+        for view_name, counts in ratelimit.counters().items():
+            self.stdout.write(
+                f'{view_name}: пропущено {counts[ratelimit.ALLOWED]}, '
+                f'отклонено {counts[ratelimit.BLOCKED]}'
+            )
@@ -0,0 +1,62 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from core import jobs
+
+
+def work(interval, once):
+    """Цикл одного процесса-обработчика.
+
+    Задачи упавших обработчиков возвращаются в очередь на каждом круге.
+    """
+    while True:
+        jobs.requeue_stale()
+        processed = jobs.run_pending()
+        close_old_connections()
+        if once:
+            return
+        if not processed:
+            time.sleep(interval)
+
+
+class Command(BaseCommand):
+    help = 'Запускает процессы, выполняющие задачи из очереди core.Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOBS_WORKERS,
+            help='Число процессов-обработчиков.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            work(options['interval'], options['once'])
+            return
+        # Дочерние процессы не должны делить соединения с родителем.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(
+                target=work, args=(options['interval'], options['once'])
+            )
+            for _ in range(options['processes'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди EMAIL_SPOOL_DIR пачками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Проверять очередь каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                self.send(options['batch_size'])
+            except Exception as error:
+                if not options['interval']:
+                    raise
+                # Почтовый сервер недоступен: попробуем на следующем круге.
+                self.stderr.write(f'Ошибка отправки: {error!r}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def send(self, batch_size):
+        recovered = mail.recover()
+        if recovered:
+            self.stdout.write(f'Возвращено в очередь: {recovered}')
+        sent = 0
+        while True:
+            batch = mail.send_batch(batch_size)
+            if not batch:
+                break
+            sent += batch
+        if sent:
+            self.stdout.write(f'Отправлено писем: {sent}')
@@ -0,0 +1,70 @@
+import json
+import os
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Числа и строки в SQL заменяются, чтобы одинаковые запросы
+# с разными литералами попали в одну группу.
+LITERALS = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def read_entries(path):
+    """Записи журнала и его ротированных копий, от старых к новым."""
+    paths = [path]
+    number = 1
+    while os.path.exists(f'{path}.{number}'):
+        paths.append(f'{path}.{number}')
+        number += 1
+    for log_path in reversed(paths):
+        if not os.path.exists(log_path):
+            continue
+        with open(log_path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов по страницам и местам вызова.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=settings.SLOW_QUERY_LOG)
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько групп с наибольшим суммарным временем показать.',
+        )
+
+    def handle(self, *args, **options):
+        groups = {}
+        for entry in read_entries(options['path']):
+            key = (
+                entry['view'],
+                entry['call_site'],
+                LITERALS.sub('?', entry['sql']),
+            )
+            group = groups.setdefault(key, {
+                'count': 0, 'total': 0, 'max': 0, 'plan': None,
+            })
+            group['count'] += 1
+            group['total'] += entry['duration']
+            group['max'] = max(group['max'], entry['duration'])
+            group['plan'] = entry['plan'] or group['plan']
+        if not groups:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        ranked = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True
+        )
+        for (view, site, sql), group in ranked[:options['top']]:
+            self.stdout.write(self.style.WARNING(
+                f'{group["total"]:.3f} с всего, {group["count"]} раз, '
+                f'до {group["max"]:.3f} с — {view or "вне страницы"}, '
+                f'{site or "место вызова неизвестно"}'
+            ))
+            self.stdout.write(f'  {sql}')
+            for step in group['plan'] or ():
+                self.stdout.write(f'    {step}')
@@ -0,0 +1,82 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в новом процессе: время запуска WSGI-приложения и первых
+# запросов, как у только что запущенного процесса сервера.
+CHILD = '''
+import io, json, sys, time
+from wsgiref.util import setup_testing_defaults
+started = time.perf_counter()
+from django.conf import settings
+settings.WARMUP_ON_STARTUP = sys.argv[2] == '1'
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+result = {'setup': time.perf_counter() - started}
+
+def request(key):
+    environ = {'PATH_INFO': sys.argv[1], 'SERVER_NAME': 'localhost',
+               'wsgi.errors': io.StringIO()}
+    setup_testing_defaults(environ)
+    began = time.perf_counter()
+    b''.join(application(environ, start_response))
+    result[key] = time.perf_counter() - began
+
+def start_response(status, headers):
+    result['status'] = status
+
+request('first')
+request('second')
+print(json.dumps(result))
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает новые процессы и измеряет время запуска WSGI-приложения, '
+        'первого и второго запроса к странице с прогревом и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/')
+        parser.add_argument('--runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"":<16}{"запуск, мс":>12}{"1-й запрос":>12}'
+            f'{"2-й запрос":>12}{"итого":>10}'
+        )
+        for title, warmup in (('без прогрева', '0'), ('с прогревом', '1')):
+            runs = [
+                self.measure(options['path'], warmup)
+                for _ in range(options['runs'])
+            ]
+            median = {
+                key: statistics.median(run[key] for run in runs) * 1000
+                for key in ('setup', 'first', 'second')
+            }
+            self.stdout.write(
+                f'{title:<16}{median["setup"]:>12.1f}'
+                f'{median["first"]:>12.1f}{median["second"]:>12.1f}'
+                f'{median["setup"] + median["first"]:>10.1f}'
+            )
+        self.stdout.write(f'Ответ: {runs[-1]["status"]}')
+
+    def measure(self, path, warmup):
+        environ = dict(
+            os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE
+        )
+        process = subprocess.run(
+            [sys.executable, '-c', CHILD, path, warmup],
+            cwd=settings.BASE_DIR, env=environ,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if process.returncode:
+            raise CommandError(process.stderr)
+        return json.loads(process.stdout.strip().splitlines()[-1])
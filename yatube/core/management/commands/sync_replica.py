@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную SQLite-базу в реплики из REPLICA_DATABASES.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Повторять синхронизацию каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('REPLICA_DATABASES не заданы.')
+        primary = connections.databases['default']['NAME']
+        while True:
+            for alias in settings.REPLICA_DATABASES:
+                started = time.monotonic()
+                self.sync(primary, connections.databases[alias]['NAME'])
+                self.stdout.write(
+                    f'{alias}: {time.monotonic() - started:.2f} с'
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, source_name, target_name):
+        # Копируем во временный файл и подменяем реплику целиком, чтобы
+        # читатели никогда не видели наполовину записанную базу.
+        tmp_name = f'{target_name}.tmp'
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(tmp_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        os.replace(tmp_name, target_name)
@@ -0,0 +1,172 @@
+"""Выборочное отслеживание выделений памяти tracemalloc.
+
+Отслеживается случайная доля MEMORY_TRACING_SAMPLE_RATE запросов,
+запрос с заголовком X-Memory-Trace (значение — токен profile_report
+--token) и запрос сотрудника с параметром ?memory=1. Для каждого такого
+запроса в MEMORY_TRACING_DIR/<страница>/ пишутся снимок .tracemalloc и
+сводка .json: пик памяти, сколько осталось занято после ответа и
+крупнейшие места выделения. Пик попадает ещё и в метрику
+memory_peak_bytes. Сравнивает снимки команда memory_report.
+
+tracemalloc общий для всего процесса, поэтому после первого
+отслеживаемого запроса он работает до конца процесса: его не
+останавливают посреди чужого снимка, а снимки разных запросов можно
+сравнивать между собой и видеть, что копится от запроса к запросу.
+Отслеживаемые запросы выполняются по одному, но выделения других
+потоков в это время тоже попадают в снимок: точные замеры — на сервере
+с одним потоком.
+"""
+import json
+import linecache
+import os
+import random
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+
+from . import profiling
+
+HEADER = 'HTTP_X_MEMORY_TRACE'
+# Выделения самого tracemalloc и импорта модулей только мешают.
+FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+_lock = threading.Lock()
+
+
+def should_trace(request):
+    if request.GET.get('memory') == '1' and request.user.is_staff:
+        return True
+    token = request.META.get(HEADER)
+    if token:
+        return profiling.valid_token(token)
+    rate = settings.MEMORY_TRACING_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+class Trace:
+    """Отслеживание одного запроса.
+
+    Снимок до запроса вычитается из снимка после него. Без reset_peak
+    (Python до 3.9) пиком считается остаток после ответа.
+    """
+
+    def __init__(self):
+        self.before = None
+
+    def start(self):
+        _lock.acquire()
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(settings.MEMORY_TRACING_FRAMES)
+            self.before = take_snapshot()
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self.started, _ = tracemalloc.get_traced_memory()
+        except BaseException:
+            _lock.release()
+            raise
+
+    def stop(self):
+        """Возвращает (пик, остаток после ответа, снимок)."""
+        try:
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = take_snapshot()
+        finally:
+            _lock.release()
+        retained = current - self.started
+        if not hasattr(tracemalloc, 'reset_peak'):
+            peak = current
+        return peak - self.started, retained, snapshot
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(FILTERS)
+
+
+def top_sites(snapshot, before=None, limit=None):
+    """Крупнейшие места выделения: список словарей по убыванию размера."""
+    limit = limit or settings.MEMORY_TRACING_TOP
+    if before is None:
+        stats = snapshot.statistics('lineno')
+    else:
+        stats = snapshot.compare_to(before, 'lineno')
+    return [
+        {
+            'site': site(stat.traceback),
+            'line': linecache.getline(
+                stat.traceback[0].filename, stat.traceback[0].lineno
+            ).strip(),
+            'size': stat.size,
+            'count': stat.count,
+            'size_diff': getattr(stat, 'size_diff', stat.size),
+        }
+        for stat in stats[:limit]
+    ]
+
+
+def site(traceback):
+    frame = traceback[0]
+    path = os.path.relpath(frame.filename, settings.BASE_DIR)
+    return f'{path}:{frame.lineno}'
+
+
+def view_dir(view_name):
+    return os.path.join(
+        settings.MEMORY_TRACING_DIR,
+        view_name.replace(':', '.') or 'unresolved',
+    )
+
+
+def dump(view_name, trace, peak, retained, snapshot):
+    """Пишет снимок и сводку запроса, возвращает путь сводки."""
+    directory = view_dir(view_name)
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f'{time.time():.6f}-{os.getpid()}')
+    snapshot.dump(f'{base}.tracemalloc')
+    with open(f'{base}.json', 'w', encoding='utf-8') as file:
+        json.dump({
+            'view': view_name,
+            'peak': peak,
+            'retained': retained,
+            'top': top_sites(snapshot, trace.before),
+        }, file, ensure_ascii=False)
+    return f'{base}.json'
+
+
+def records(view_name):
+    """Пути сводок страницы от старых к новым."""
+    directory = view_dir(view_name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith('.json')
+    )
+
+
+def process_records(paths):
+    """Сводки того же процесса, что и последняя: снимки других
+    процессов сняты другим tracemalloc, сравнивать с ними нечего."""
+    pid = pid_of(paths[-1])
+    return [path for path in paths if pid_of(path) == pid]
+
+
+def pid_of(path):
+    return os.path.basename(path)[:-len('.json')].rsplit('-', 1)[-1]
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def load_snapshot(path):
+    return tracemalloc.Snapshot.load(
+        path[:-len('.json')] + '.tracemalloc'
+    )
@@ -0,0 +1,203 @@
+"""Гистограммы времени, запросов к базе и размера ответов по страницам.
+
+MetricsMiddleware складывает наблюдения в словарь процесса; там же
+копятся счётчики, например время шаблонов из TemplateProfilerMiddleware.
+Раз в METRICS_FLUSH_SECONDS процесс записывает свои метрики в файл
+METRICS_DIR/<pid>.json, а страница /metrics суммирует файлы всех
+процессов и отдаёт их в текстовом формате Prometheus.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+METRICS = {
+    'request_seconds': (
+        'Полное время обработки запроса, с', TIME_BUCKETS,
+    ),
+    'db_seconds': ('Время запросов к базе, с', TIME_BUCKETS),
+    'db_queries': (
+        'Число запросов к базе', (1, 2, 5, 10, 20, 50, 100, 200, 500),
+    ),
+    'render_seconds': ('Время отрисовки шаблонов, с', TIME_BUCKETS),
+    'response_bytes': (
+        'Размер ответа, байт',
+        (1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+    'memory_peak_bytes': (
+        'Пик выделенной памяти за запрос (выборочно), байт',
+        (65536, 262144, 1048576, 4194304, 16777216, 67108864, 268435456),
+    ),
+}
+COUNTERS = {
+    'template_seconds_total': 'Время отрисовки шаблона, тега или фильтра, с',
+    'template_calls_total': 'Число отрисовок шаблона, тега или фильтра',
+}
+PREFIX = 'yatube_'
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_last_flush = 0
+_local = threading.local()
+
+
+def observe(metric, view_name, value):
+    buckets = METRICS[metric][1]
+    key = f'{metric}|{view_name}'
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                'buckets': [0] * (len(buckets) + 1), 'sum': 0, 'count': 0,
+            }
+        histogram['buckets'][bisect_left(buckets, value)] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def increment(metric, view_name, item, value):
+    key = f'{metric}|{view_name}|{item}'
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def start():
+    _local.stats = {}
+
+
+def finish():
+    stats = _local.stats
+    _local.stats = None
+    return stats
+
+
+def current():
+    """Счётчики текущего запроса или None вне измеряемого запроса."""
+    return getattr(_local, 'stats', None)
+
+
+def add(name, value):
+    """Добавляет value к счётчику name текущего запроса."""
+    stats = current()
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + value
+
+
+class QueryTimer:
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            add('db_seconds', time.perf_counter() - started)
+            add('db_queries', 1)
+
+
+def snapshot():
+    with _lock:
+        return json.loads(json.dumps({
+            'histograms': _histograms, 'counters': _counters,
+        }))
+
+
+def flush(force=False):
+    """Записывает гистограммы процесса в METRICS_DIR не чаще раза в период."""
+    global _last_flush
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_SECONDS:
+        return
+    _last_flush = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.json')
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(snapshot(), file)
+    os.replace(f'{path}.tmp', path)
+
+
+def merge(total, data):
+    histograms = total['histograms']
+    for key, histogram in data['histograms'].items():
+        if key not in histograms:
+            histograms[key] = histogram
+            continue
+        merged = histograms[key]
+        merged['buckets'] = [
+            left + right
+            for left, right in zip(merged['buckets'], histogram['buckets'])
+        ]
+        merged['sum'] += histogram['sum']
+        merged['count'] += histogram['count']
+    counters = total['counters']
+    for key, value in data['counters'].items():
+        counters[key] = counters.get(key, 0) + value
+
+
+def collect():
+    """Метрики всех процессов: файлы METRICS_DIR или память процесса."""
+    if not settings.METRICS_DIR:
+        return snapshot()
+    flush(force=True)
+    total = {'histograms': {}, 'counters': {}}
+    for name in sorted(os.listdir(settings.METRICS_DIR)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as file:
+                merge(total, json.load(file))
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(data):
+    histograms = data['histograms']
+    lines = []
+    for metric, (description, buckets) in METRICS.items():
+        name = PREFIX + metric
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} histogram')
+        for key in sorted(histograms):
+            key_metric, view_name = key.split('|', 1)
+            if key_metric != metric:
+                continue
+            histogram = histograms[key]
+            view = label(view_name)
+            cumulative = 0
+            for bound, count in zip(
+                buckets + ('+Inf',), histogram['buckets']
+            ):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{name}_sum{{view="{view}"}} {histogram["sum"]}')
+            lines.append(
+                f'{name}_count{{view="{view}"}} {histogram["count"]}'
+            )
+    for metric, description in COUNTERS.items():
+        name = PREFIX + metric
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} counter')
+        for key in sorted(data['counters']):
+            key_metric, view_name, item = key.split('|', 2)
+            if key_metric != metric:
+                continue
+            lines.append(
+                f'{name}{{view="{label(view_name)}",item="{label(item)}"}} '
+                f'{data["counters"][key]}'
+            )
+    return '\n'.join(lines) + '\n'
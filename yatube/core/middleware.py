@@ -0,0 +1,276 @@
+import cProfile
+import logging
+import time
+from contextlib import ExitStack
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+
+from . import memory, metrics, profiling, ratelimit, slowlog, templates
+from .routers import use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+TEMPLATE_PROFILE_HEADER = 'X-Template-Profile'
+
+template_logger = logging.getLogger('yatube.templates')
+PRIMARY_UNTIL_KEY = '_primary_until'
+
+
+class ReplicaMiddleware:
+    """Выбирает базу для чтения на время запроса.
+
+    После любого изменяющего запроса сессия «прилипает» к основной базе
+    на REPLICA_STICKY_SECONDS, чтобы пользователь сразу видел свои
+    изменения, даже если реплика ещё не синхронизирована.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replica(False)
+        if request.method not in SAFE_METHODS:
+            request.session[PRIMARY_UNTIL_KEY] = (
+                time.time() + settings.REPLICA_STICKY_SECONDS
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        sticky = request.session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+        use_replica(
+            not sticky
+            and request.method in SAFE_METHODS
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+        )
+
+
+class RateLimitMiddleware:
+    """Отвечает 429, если клиент превысил лимит страницы из RATELIMITS."""
+
+    def __init__(self, get_response):
+        if not settings.RATELIMITS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        retry_after = ratelimit.check(
+            request, request.resolver_match.view_name
+        )
+        if retry_after:
+            response = HttpResponse(
+                'Слишком много запросов, попробуйте позже.',
+                content_type='text/plain; charset=utf-8',
+                status=HTTPStatus.TOO_MANY_REQUESTS,
+            )
+            response['Retry-After'] = retry_after
+            return response
+
+
+class StreamingContent:
+    """Тело потокового ответа, после отправки которого закрывается stack.
+
+    Потоковое тело читается из базы и отрисовывается уже после выхода из
+    middleware, поэтому замеры запроса остаются включёнными до конца
+    тела или до закрытия ответа.
+    """
+
+    def __init__(self, content, stack):
+        self.content = iter(content)
+        self.stack = stack
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.content)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        self.stack.close()
+
+
+def keep_open(response, stack):
+    """Для потокового ответа переносит закрытие stack в конец тела."""
+    if response.streaming:
+        response.streaming_content = StreamingContent(
+            response.streaming_content, stack.pop_all()
+        )
+
+
+def view_name_of(request):
+    match = request.resolver_match
+    return match.view_name if match else '<unresolved>'
+
+
+class MetricsMiddleware:
+    """Записывает гистограммы времени и запросов к базе по страницам."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.start()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            stack.callback(self.finish, request, started)
+            timer = metrics.QueryTimer()
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+            if not response.streaming:
+                metrics.observe(
+                    'response_bytes', view_name_of(request),
+                    len(response.content),
+                )
+            keep_open(response, stack)
+        return response
+
+    def finish(self, request, started):
+        stats = metrics.finish()
+        view_name = view_name_of(request)
+        metrics.observe(
+            'request_seconds', view_name, time.perf_counter() - started
+        )
+        for metric in ('db_seconds', 'db_queries', 'render_seconds'):
+            metrics.observe(metric, view_name, stats.get(metric, 0))
+        metrics.flush()
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал запросы к базе дольше SLOW_QUERY_SECONDS."""
+
+    def __init__(self, get_response):
+        if settings.SLOW_QUERY_SECONDS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.logger = slowlog.SlowQueryLogger()
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            stack.callback(slowlog.set_view_name, None)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.logger))
+            response = self.get_response(request)
+            keep_open(response, stack)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slowlog.set_view_name(request.resolver_match.view_name)
+
+
+class ProfilerMiddleware:
+    """Профилирует выбранные запросы, см. core/profiling.py."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling.should_profile(request):
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Уже работает другой профилировщик.
+            return self.get_response(request)
+        with ExitStack() as stack:
+            stack.callback(self.finish, request, profiler)
+            response = self.get_response(request)
+            keep_open(response, stack)
+        return response
+
+    def finish(self, request, profiler):
+        profiler.disable()
+        match = request.resolver_match
+        profiling.dump(profiler, match.view_name if match else '')
+
+
+class MemoryTracingMiddleware:
+    """Отслеживает выделения памяти выбранных запросов, см. core/memory.py."""
+
+    def __init__(self, get_response):
+        if not settings.MEMORY_TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not memory.should_trace(request):
+            return self.get_response(request)
+        trace = memory.Trace()
+        trace.start()
+        with ExitStack() as stack:
+            stack.callback(self.finish, request, trace)
+            response = self.get_response(request)
+            keep_open(response, stack)
+        return response
+
+    def finish(self, request, trace):
+        peak, retained, snapshot = trace.stop()
+        match = request.resolver_match
+        view_name = match.view_name if match else ''
+        metrics.observe(
+            'memory_peak_bytes', view_name or '<unresolved>', peak
+        )
+        memory.dump(view_name, trace, peak, retained, snapshot)
+
+
+class TemplateProfilerMiddleware:
+    """Время шаблонов, тегов и фильтров страницы.
+
+    Пишется в счётчики метрик, в лог yatube.templates и, если включён
+    TEMPLATE_PROFILING_HEADER, в заголовок X-Template-Profile.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        templates.install_profiler()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            templates.start_profile()
+            stack.callback(self.finish, request)
+            response = self.get_response(request)
+            if response.streaming:
+                # Заголовки уже отправлены вместе с началом тела: сводка
+                # потоковой страницы попадает только в метрики и лог.
+                keep_open(response, stack)
+                return response
+            stack.pop_all()
+        summary = self.finish(request)
+        if summary and settings.TEMPLATE_PROFILING_HEADER:
+            response[TEMPLATE_PROFILE_HEADER] = summary
+        return response
+
+    def finish(self, request):
+        items = templates.finish_profile()
+        if not items:
+            return ''
+        view_name = view_name_of(request)
+        for item, (seconds, calls) in items.items():
+            metrics.increment(
+                'template_seconds_total', view_name, item, seconds
+            )
+            metrics.increment('template_calls_total', view_name, item, calls)
+        summary = templates.summary(items)
+        template_logger.debug('%s %s', view_name, summary)
+        return summary
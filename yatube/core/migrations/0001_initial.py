@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Функция')),
+                ('arguments', models.TextField(default='{}', verbose_name='Аргументы (JSON)')),
+                ('dedup_key', models.CharField(blank=True, db_index=True, max_length=200, verbose_name='Ключ дедупликации')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Состояние')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('max_attempts', models.PositiveIntegerField(verbose_name='Наибольшее число попыток')),
+                ('run_after', models.DateTimeField(db_index=True, verbose_name='Не раньше')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Обработчик')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Взята в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'Задача',
+                'verbose_name_plural': 'Задачи',
+                'ordering': ('run_after', 'id'),
+                'index_together': {('status', 'run_after')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:35
+
+from django.db import migrations, models
+
+
+def close_duplicates(apps, schema_editor):
+    """Оставляет в очереди по одной задаче на ключ дедупликации."""
+    Job = apps.get_model('core', 'Job')
+    pending = Job.objects.filter(status='pending').exclude(dedup_key='')
+    seen = set()
+    for job in pending.order_by('run_after', 'id'):
+        if job.dedup_key in seen:
+            job.status = 'failed'
+            job.save(update_fields=['status'])
+        seen.add(job.dedup_key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(close_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending'), models.Q(_negated=True, dedup_key='')), fields=('dedup_key',), name='core_job_pending_dedup_key'),
+        ),
+    ]
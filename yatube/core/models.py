@@ -0,0 +1,51 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """Отложенная задача для run_workers (см. core/jobs.py)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Функция', max_length=200)
+    arguments = models.TextField('Аргументы (JSON)', default='{}')
+    dedup_key = models.CharField(
+        'Ключ дедупликации', max_length=200, blank=True, db_index=True
+    )
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUSES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Наибольшее число попыток')
+    run_after = models.DateTimeField('Не раньше', db_index=True)
+    locked_by = models.CharField('Обработчик', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('run_after', 'id')
+        index_together = ('status', 'run_after')
+        constraints = [
+            # Одна ожидающая задача на ключ дедупликации
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending') & ~models.Q(
+                    dedup_key=''
+                ),
+                name='core_job_pending_dedup_key',
+            ),
+        ]
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,67 @@
+"""Выборочное профилирование запросов cProfile.
+
+Профилируется случайная доля PROFILING_SAMPLE_RATE запросов, запрос с
+заголовком X-Profile, подписанным ключом проекта (см. make_token), и
+запрос сотрудника с параметром ?profile=1. Результаты пишутся файлами
+.pstats в PROFILING_DIR/<страница>/, сводку показывает profile_report.
+"""
+import os
+import random
+import time
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'core.profiling'
+TOKEN_VALUE = 'profile'
+
+
+def make_token():
+    """Значение заголовка X-Profile, действительное PROFILING_TOKEN_MAX_AGE."""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(TOKEN_VALUE)
+
+
+def valid_token(token):
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE
+        ) == TOKEN_VALUE
+    except signing.BadSignature:
+        return False
+
+
+def should_profile(request):
+    if request.GET.get('profile') == '1' and request.user.is_staff:
+        return True
+    token = request.META.get(HEADER)
+    if token:
+        return valid_token(token)
+    rate = settings.PROFILING_SAMPLE_RATE
+    return bool(rate) and random.random() < rate
+
+
+def view_dir(view_name):
+    return os.path.join(
+        settings.PROFILING_DIR, view_name.replace(':', '.') or 'unresolved'
+    )
+
+
+def dump(profiler, view_name):
+    directory = view_dir(view_name)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f'{time.time():.6f}-{os.getpid()}.pstats'
+    )
+    profiler.dump_stats(path)
+    return path
+
+
+def profiles(view_name):
+    directory = view_dir(view_name)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith('.pstats')
+    )
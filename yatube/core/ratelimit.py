@@ -0,0 +1,98 @@
+"""Ограничение частоты запросов корзиной токенов.
+
+Для каждой страницы из RATELIMITS у пользователя (или IP-адреса анонима,
+за прокси — см. RATELIMIT_PROXY_COUNT) есть корзина на burst токенов,
+которая наполняется за period секунд. Запрос забирает токен; когда
+токенов нет, отвечаем 429. Корзины и счётчики хранятся в кеше, поэтому
+общие для процессов, если кеш общий.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+ALLOWED = 'allowed'
+BLOCKED = 'blocked'
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def client_ip(request):
+    """Адрес клиента с учётом RATELIMIT_PROXY_COUNT доверенных прокси.
+
+    Каждый прокси дописывает в конец X-Forwarded-For адрес, с которого к
+    нему пришли; всё левее записи первого доверенного прокси мог
+    подставить сам клиент.
+    """
+    proxies = settings.RATELIMIT_PROXY_COUNT
+    if proxies:
+        forwarded = [
+            address.strip()
+            for address in request.META.get(
+                'HTTP_X_FORWARDED_FOR', ''
+            ).split(',')
+            if address.strip()
+        ]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+def take(key, burst, period):
+    """Забирает токен; возвращает 0 или число секунд до нового токена."""
+    now = time.time()
+    tokens, updated = cache.get(key, (burst, now))
+    tokens = min(burst, tokens + (now - updated) * burst / period)
+    if tokens < 1:
+        return math.ceil((1 - tokens) * period / burst)
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def counter_key(view_name, outcome):
+    return f'ratelimit:count:{view_name}:{outcome}'
+
+
+def count(view_name, outcome):
+    key = counter_key(view_name, outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кеша между add и incr.
+        cache.add(key, 1, None)
+
+
+def check(request, view_name):
+    """0, если запрос можно выполнить, иначе секунды до повтора."""
+    limit = settings.RATELIMITS.get(view_name)
+    if limit is None:
+        return 0
+    burst, period = limit
+    retry_after = take(
+        f'ratelimit:{view_name}:{client_key(request)}', burst, period
+    )
+    count(view_name, BLOCKED if retry_after else ALLOWED)
+    return retry_after
+
+
+def counters():
+    """Счётчики пропущенных и отклонённых запросов по страницам."""
+    keys = {
+        counter_key(view_name, outcome): (view_name, outcome)
+        for view_name in settings.RATELIMITS
+        for outcome in (ALLOWED, BLOCKED)
+    }
+    result = {
+        view_name: {ALLOWED: 0, BLOCKED: 0}
+        for view_name in settings.RATELIMITS
+    }
+    for key, value in cache.get_many(list(keys)).items():
+        view_name, outcome = keys[key]
+        result[view_name][outcome] = value
+    return result
@@ -0,0 +1,52 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def use_replica(enabled):
+    """Включает или выключает чтение с реплик для текущего потока."""
+    _state.use_replica = enabled
+
+
+def replica_enabled():
+    return getattr(_state, 'use_replica', False)
+
+
+class ReplicaRouter:
+    """Отправляет чтение постов на реплики, а запись — на основную БД.
+
+    Реплики используются только внутри «читающих» страниц из
+    REPLICA_VIEWS: решение принимает ReplicaMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if (
+            replicas
+            and replica_enabled()
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and (
+            instance._state.db in settings.REPLICA_DATABASES
+        ):
+            return 'default'
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
@@ -0,0 +1,106 @@
+"""Журнал медленных запросов к базе.
+
+SlowQueryMiddleware оборачивает выполнение запросов страницы. Запрос
+дольше SLOW_QUERY_SECONDS пишется в логгер yatube.slow_queries одной
+JSON-строкой: страница, место вызова в коде проекта или шаблоне,
+параметры без строковых значений и план SQLite EXPLAIN QUERY PLAN.
+Отчёт по журналу строит команда slow_queries.
+"""
+import datetime
+import decimal
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.slow_queries')
+# Модули core (middleware, метрики, этот журнал) — обвязка запроса, а не
+# место вызова.
+CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_local = threading.local()
+
+
+def set_view_name(view_name):
+    _local.view_name = view_name
+
+
+def redact(value):
+    """Оставляет числа и даты, строки и байты заменяет описанием."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (decimal.Decimal, datetime.date, datetime.time)):
+        return str(value)
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__} len={len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def call_site():
+    """Ближайший к запросу вызов из кода проекта или узел шаблона."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        filename = code.co_filename
+        if (
+            filename.startswith(settings.BASE_DIR)
+            and os.path.dirname(filename) != CORE_DIR
+            and '/tests/' not in filename
+        ):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            return f'{path}:{frame.f_lineno} {code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def query_plan(connection, sql, params):
+    if connection.vendor != 'sqlite' or not sql.lstrip().upper().startswith(
+        'SELECT'
+    ):
+        return None
+    _local.explaining = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+    except Exception:
+        return None
+    finally:
+        _local.explaining = False
+
+
+class SlowQueryLogger:
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= settings.SLOW_QUERY_SECONDS:
+                self.log(sql, params, many, context['connection'], duration)
+
+    def log(self, sql, params, many, connection, duration):
+        logger.warning(json.dumps({
+            'time': datetime.datetime.now().isoformat(timespec='seconds'),
+            'duration': round(duration, 6),
+            'database': connection.alias,
+            'view': getattr(_local, 'view_name', None),
+            'call_site': call_site(),
+            'sql': sql,
+            'params': None if many else [
+                redact(value) for value in params or ()
+            ],
+            'plan': None if many else query_plan(connection, sql, params),
+        }, ensure_ascii=False))
@@ -0,0 +1,160 @@
+"""Шаблонный движок Django, который замеряет время отрисовки."""
+import functools
+import threading
+import time
+
+from django.template import TemplateDoesNotExist, base, engines
+from django.template.backends.django import (
+    DjangoTemplates as BaseDjangoTemplates, Template, reraise
+)
+
+from . import metrics
+
+_local = threading.local()
+
+
+class TimedRender:
+    """Добавляет время отрисовки шаблона движка в метрики запроса."""
+
+    def render(self, context=None, request=None):
+        # Вложенные отрисовки уже входят во время внешней.
+        depth = getattr(_local, 'depth', 0)
+        _local.depth = depth + 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            _local.depth = depth
+            if not depth:
+                metrics.add('render_seconds', time.perf_counter() - started)
+
+
+class TimedTemplate(TimedRender, Template):
+    pass
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+# Профилировщик шаблонов (TemplateProfilerMiddleware): время и число
+# отрисовок каждого шаблона, тега и фильтра из сторонних библиотек.
+_profile = threading.local()
+_installed = False
+
+
+def start_profile():
+    _profile.items = {}
+
+
+def finish_profile():
+    items = getattr(_profile, 'items', None) or {}
+    _profile.items = None
+    return items
+
+
+def record(item, seconds):
+    items = getattr(_profile, 'items', None)
+    if items is not None:
+        totals = items.setdefault(item, [0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+
+
+def profiling():
+    return getattr(_profile, 'items', None) is not None
+
+
+def summary(items, limit=10):
+    """Строка «элемент=мс/вызовов» для самых долгих элементов."""
+    ranked = sorted(items.items(), key=lambda item: item[1][0], reverse=True)
+    return ', '.join(
+        f'{item}={seconds * 1000:.1f}ms/{calls}'
+        for item, (seconds, calls) in ranked[:limit]
+    )
+
+
+def tag_name(node):
+    token = getattr(node, 'token', None)
+    if token and token.contents:
+        return token.contents.split()[0]
+    return type(node).__name__
+
+
+def install_profiler():
+    """Оборачивает отрисовку шаблонов, узлов и фильтров замером времени."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    render_template = base.Template._render
+    render_node = base.Node.render_annotated
+
+    def _render(self, context):
+        if not profiling():
+            return render_template(self, context)
+        started = time.perf_counter()
+        try:
+            return render_template(self, context)
+        finally:
+            record(
+                f'template:{self.origin.template_name or self.name}',
+                time.perf_counter() - started,
+            )
+
+    def render_annotated(self, context):
+        if not profiling() or isinstance(
+            self, (base.TextNode, base.VariableNode)
+        ):
+            return render_node(self, context)
+        started = time.perf_counter()
+        try:
+            return render_node(self, context)
+        finally:
+            record(f'tag:{tag_name(self)}', time.perf_counter() - started)
+
+    base.Template._render = _render
+    base.Node.render_annotated = render_annotated
+    wrap_filters()
+
+
+def wrap_filters():
+    """Замеряет фильтры всех библиотек тегов, кроме встроенных в Django."""
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name, module in engine.libraries.items():
+            if module.startswith('django.'):
+                continue
+            library = engine.template_libraries[name]
+            for filter_name, func in library.filters.items():
+                library.filters[filter_name] = timed_filter(
+                    filter_name, func
+                )
+        # Уже разобранные шаблоны держат исходные фильтры.
+        for loader in engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+def timed_filter(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiling():
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(f'filter:{name}', time.perf_counter() - started)
+    return wrapper
@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.management.commands import run_workers
+from core.models import Job
+
+CALLS = []
+
+
+def record(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+def fail():
+    raise ValueError('Сбой задачи')
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=2, JOBS_RETRY_DELAY=60)
+class JobsTest(TransactionTestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача из очереди выполняется с сохранёнными аргументами."""
+        jobs.enqueue(record, 1, 'два', key='значение')
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(CALLS, [((1, 'два'), {'key': 'значение'})])
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertIsNotNone(job.finished)
+
+    def test_dedup_key(self):
+        """Задача с тем же ключом не ставится, пока первая ждёт."""
+        for _ in range(3):
+            jobs.enqueue(record, dedup_key='ключ')
+        self.assertEqual(Job.objects.count(), 1)
+        jobs.run_pending()
+        jobs.enqueue(record, dedup_key='ключ')
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_retry_with_backoff(self):
+        """Упавшая задача повторяется позже, затем помечается ошибкой."""
+        jobs.enqueue(fail)
+        jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertIn('Сбой задачи', job.last_error)
+        self.assertGreater(
+            job.run_after, timezone.now() + timedelta(seconds=50)
+        )
+        self.assertEqual(jobs.run_pending(), 0)
+        Job.objects.update(run_after=timezone.now())
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_delayed_job(self):
+        """Отложенная задача не выполняется раньше срока."""
+        jobs.enqueue(record, delay=60)
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(CALLS, [])
+
+    def test_requeue_stale(self):
+        """Задача зависшего обработчика возвращается в очередь."""
+        jobs.enqueue(record)
+        Job.objects.update(
+            status=Job.RUNNING,
+            locked_at=timezone.now() - timedelta(days=1),
+        )
+        call_command(
+            'run_workers', processes=1, once=True, stdout=StringIO()
+        )
+        self.assertEqual(len(CALLS), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_dedup_enforced_by_database(self):
+        """Вторая ожидающая задача с тем же ключом не записывается."""
+        jobs.enqueue(record, dedup_key='ключ')
+        job = Job.objects.get()
+        job.pk = None
+        with self.assertRaises(IntegrityError):
+            job.save()
+
+    def test_retry_superseded_by_pending_duplicate(self):
+        """Повтор не ставится, если такая же задача уже ждёт."""
+        jobs.enqueue(fail, dedup_key='ключ')
+        job = jobs.claim()
+        jobs.enqueue(record, dedup_key='ключ')
+        jobs.run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn(jobs.SUPERSEDED, job.last_error)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(len(CALLS), 1)
+
+    def test_requeue_on_every_cycle(self):
+        """Задачи, зависшие после запуска обработчика, тоже
+        возвращаются."""
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 1:
+                jobs.enqueue(record)
+                Job.objects.update(
+                    status=Job.RUNNING,
+                    locked_at=timezone.now() - timedelta(days=1),
+                )
+            else:
+                raise KeyboardInterrupt
+
+        with mock.patch.object(run_workers.time, 'sleep', sleep):
+            with self.assertRaises(KeyboardInterrupt):
+                run_workers.work(interval=1, once=False)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(len(CALLS), 1)
@@ -0,0 +1,152 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import mail
+from posts.models import User
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SPOOL_DIR = os.path.join(TEMP_DIR, 'spool')
+SENT_DIR = os.path.join(TEMP_DIR, 'sent')
+DEAD_DIR = os.path.join(TEMP_DIR, 'dead')
+SEND_MESSAGES = (
+    'django.core.mail.backends.filebased.EmailBackend.send_messages'
+)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.SpoolEmailBackend',
+    EMAIL_SPOOL_DIR=SPOOL_DIR,
+    EMAIL_FILE_PATH=SENT_DIR,
+    EMAIL_SPOOL_DEAD_DIR=DEAD_DIR,
+    EMAIL_SPOOL_MAX_ATTEMPTS=2,
+    EMAIL_SPOOL_RETRY_DELAY=0,
+)
+class SpoolEmailBackendTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def sent(self):
+        if not os.path.exists(SENT_DIR):
+            return []
+        sent = []
+        for name in os.listdir(SENT_DIR):
+            with open(os.path.join(SENT_DIR, name)) as file:
+                content = file.read()
+            if content:
+                sent.append(content)
+        return sent
+
+    def test_password_reset_is_spooled(self):
+        """Письмо сброса пароля попадает в очередь, а не отправляется."""
+        User.objects.create_user(
+            username='auth', email='auth@example.com', password='пароль'
+        )
+        self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'auth@example.com'},
+        )
+        self.assertEqual(len(os.listdir(SPOOL_DIR)), 1)
+        self.assertEqual(self.sent(), [])
+
+    def test_batch_sent_over_one_connection(self):
+        """Письма из очереди уходят пачкой через одно соединение."""
+        for number in range(3):
+            send_mail(
+                'Письмо', f'Текст {number}', 'from@example.com',
+                ['to@example.com'],
+            )
+        call_command('send_spooled_mail', stdout=StringIO())
+        sent = self.sent()
+        self.assertEqual(len(sent), 1)
+        for number in range(3):
+            self.assertIn(f'Текст {number}', sent[0])
+        self.assertEqual(os.listdir(SPOOL_DIR), [])
+
+    def send(self, number=1):
+        for _ in range(number):
+            send_mail(
+                'Письмо', 'Текст', 'from@example.com', ['to@example.com']
+            )
+
+    def test_failed_message_retried(self):
+        """Неотправленное письмо не мешает остальным и повторяется."""
+        self.send(2)
+        with mock.patch(SEND_MESSAGES, side_effect=[OSError, 1]), \
+                self.assertLogs('yatube.mail', 'ERROR'):
+            self.assertEqual(mail.send_batch(), 1)
+        self.assertEqual(len(os.listdir(SPOOL_DIR)), 1)
+        self.assertEqual(mail.send_batch(), 1)
+        self.assertEqual(len(self.sent()), 1)
+
+    def test_retry_delayed(self):
+        """Повтор неотправленного письма откладывается."""
+        self.send()
+        with self.settings(EMAIL_SPOOL_RETRY_DELAY=60):
+            with mock.patch(SEND_MESSAGES, side_effect=OSError), \
+                    self.assertLogs('yatube.mail', 'ERROR'):
+                mail.send_batch()
+            self.assertEqual(mail.send_batch(), 0)
+
+    def test_dead_letters(self):
+        """Нечитаемое письмо и письмо после всех попыток уходят в
+        каталог неотправленных."""
+        self.send()
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        with open(os.path.join(SPOOL_DIR, '0.000000-bad.mail'), 'wb') as f:
+            f.write(b'not a pickle')
+        with mock.patch(SEND_MESSAGES, side_effect=OSError), \
+                self.assertLogs('yatube.mail', 'ERROR') as logs:
+            self.assertEqual(mail.send_batch(), 0)
+            self.assertEqual(mail.send_batch(), 0)
+        self.assertIn('не читается', logs.output[0])
+        self.assertEqual(len(os.listdir(DEAD_DIR)), 2)
+        self.assertEqual(os.listdir(SPOOL_DIR), [])
+
+    def test_connection_failure_returns_batch(self):
+        """Если соединение не открылось, письма остаются в очереди."""
+        self.send()
+        with mock.patch(
+            'django.core.mail.backends.filebased.EmailBackend.open',
+            side_effect=OSError,
+        ):
+            with self.assertRaises(OSError):
+                mail.send_batch()
+        self.assertEqual(mail.send_batch(), 1)
+
+    def test_orphaned_message_recovered(self):
+        """Письмо упавшего отправителя возвращается в очередь."""
+        self.send()
+        path, = mail.claim(1)
+        os.utime(path, (0, 0))
+        call_command('send_spooled_mail', stdout=StringIO())
+        self.assertEqual(len(self.sent()), 1)
+
+    def test_interval_loop_survives_errors(self):
+        """Цикл с --interval продолжается после ошибки."""
+        stderr = StringIO()
+        with mock.patch.object(
+            mail, 'send_batch', side_effect=OSError
+        ), mock.patch(
+            'core.management.commands.send_spooled_mail.time.sleep',
+            side_effect=[None, KeyboardInterrupt],
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command(
+                    'send_spooled_mail', interval=1, stdout=StringIO(),
+                    stderr=stderr,
+                )
+        self.assertEqual(stderr.getvalue().count('Ошибка отправки'), 2)
@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import threading
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import memory, metrics, profiling
+from posts.models import Post, User
+
+TEMP_MEMORY_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+LEAK = []
+
+
+@override_settings(
+    MEMORY_TRACING_DIR=TEMP_MEMORY_DIR, MEMORY_TRACING_SAMPLE_RATE=0
+)
+class MemoryTracingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        tracemalloc.stop()
+        LEAK.clear()
+        shutil.rmtree(TEMP_MEMORY_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_MEMORY_DIR, ignore_errors=True)
+
+    def get(self, data=None, **headers):
+        self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            data, **headers
+        )
+
+    def records(self):
+        return memory.records('posts:post_detail')
+
+    def test_not_sampled_by_default(self):
+        """Без выборки, заголовка и флага память не отслеживается."""
+        self.get({'memory': '1'})
+        self.get(HTTP_X_MEMORY_TRACE='поддельный')
+        self.assertEqual(self.records(), [])
+
+    def test_signed_header(self):
+        """Запрос с подписанным заголовком пишет снимок и сводку."""
+        self.get(HTTP_X_MEMORY_TRACE=profiling.make_token())
+        paths = self.records()
+        self.assertEqual(len(paths), 1)
+        record = memory.load(paths[0])
+        self.assertGreater(record['peak'], 0)
+        self.assertGreaterEqual(record['peak'], record['retained'])
+        self.assertTrue(record['top'])
+        self.assertTrue(memory.load_snapshot(paths[0]).traces)
+        self.assertIn(
+            'memory_peak_bytes|posts:post_detail',
+            metrics.snapshot()['histograms'],
+        )
+
+    @override_settings(MEMORY_TRACING_SAMPLE_RATE=1)
+    def test_report_and_compare(self):
+        """Отчёт показывает пики, а --compare — рост между снимками."""
+        self.get()
+        self.get()
+        out = StringIO()
+        call_command('memory_report', 'posts:post_detail', stdout=out)
+        self.assertIn('Снимков: 2', out.getvalue())
+        out = StringIO()
+        call_command(
+            'memory_report', 'posts:post_detail', '--compare', stdout=out
+        )
+        self.assertIn('Рост между первым и последним', out.getvalue())
+        out = StringIO()
+        call_command('memory_report', stdout=out)
+        self.assertIn('posts:post_detail: снимков 2', out.getvalue())
+
+    def test_tracer_keeps_running(self):
+        """Отслеживание не выключается после запроса."""
+        self.get(HTTP_X_MEMORY_TRACE=profiling.make_token())
+        self.assertTrue(tracemalloc.is_tracing())
+
+    def test_concurrent_traces(self):
+        """Параллельные отслеживаемые запросы не мешают друг другу."""
+        errors = []
+
+        def trace():
+            try:
+                for _ in range(5):
+                    item = memory.Trace()
+                    item.start()
+                    LEAK.append(bytearray(1000))
+                    item.stop()
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=trace) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_compare_finds_leak_across_requests(self):
+        """--compare видит память, которая копится от запроса к запросу."""
+        for _ in range(3):
+            trace = memory.Trace()
+            trace.start()
+            LEAK.extend(bytearray(10000) for _ in range(10))
+            memory.dump('leaky', trace, *trace.stop())
+        out = StringIO()
+        call_command('memory_report', 'leaky', '--compare', stdout=out)
+        self.assertIn('core/tests/test_memory.py', out.getvalue())
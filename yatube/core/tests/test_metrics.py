@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post, User
+
+TEMP_METRICS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(METRICS_TOKEN='test-token')
+class MetricsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_METRICS_DIR, ignore_errors=True)
+
+    def setUp(self):
+        metrics._histograms.clear()
+        metrics._counters.clear()
+
+    def get_metrics(self):
+        response = self.client.get(
+            reverse('metrics'),
+            HTTP_AUTHORIZATION=f'Bearer {settings.METRICS_TOKEN}',
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.content.decode()
+
+    def test_view_histograms(self):
+        """Для страницы пишутся все гистограммы, кроме выборочных."""
+        self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        content = self.get_metrics()
+        for metric in set(metrics.METRICS) - {'memory_peak_bytes'}:
+            with self.subTest(metric=metric):
+                self.assertIn(
+                    f'yatube_{metric}_count{{view="posts:post_detail"}} 1',
+                    content,
+                )
+        histograms = metrics.snapshot()['histograms']
+        self.assertGreater(
+            histograms['db_queries|posts:post_detail']['sum'], 0
+        )
+        self.assertGreater(
+            histograms['render_seconds|posts:post_detail']['sum'], 0
+        )
+
+    def test_metrics_protected(self):
+        """Без токена метрики недоступны, сотруднику доступны."""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_histogram_buckets_cumulative(self):
+        """Корзины гистограммы накопительные, +Inf равна count."""
+        for value in (0.001, 0.2, 100):
+            metrics.observe('request_seconds', 'test', value)
+        content = metrics.render_prometheus(metrics.snapshot())
+        self.assertIn(
+            'yatube_request_seconds_bucket{view="test",le="0.005"} 1',
+            content,
+        )
+        self.assertIn(
+            'yatube_request_seconds_bucket{view="test",le="0.25"} 2',
+            content,
+        )
+        self.assertIn(
+            'yatube_request_seconds_bucket{view="test",le="+Inf"} 3',
+            content,
+        )
+
+    @override_settings(METRICS_DIR=TEMP_METRICS_DIR)
+    def test_workers_merged(self):
+        """Метрики других процессов суммируются из общего каталога."""
+        metrics.observe('db_queries', 'test', 3)
+        other = {
+            'histograms': {'db_queries|test': {
+                'buckets': [0, 0, 1] + [0] * 7, 'sum': 2, 'count': 1,
+            }},
+            'counters': {},
+        }
+        with open(os.path.join(TEMP_METRICS_DIR, '1.json'), 'w') as file:
+            json.dump(other, file)
+        histogram = metrics.collect()['histograms']['db_queries|test']
+        self.assertEqual(histogram['count'], 2)
+        self.assertEqual(histogram['sum'], 5)
@@ -0,0 +1,58 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from posts.models import User
+
+TEMP_PROFILING_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(PROFILING_DIR=TEMP_PROFILING_DIR, PROFILING_SAMPLE_RATE=0)
+class ProfilerTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def count(self):
+        return len(profiling.profiles('about:author'))
+
+    def get(self, data=None, **headers):
+        self.client.get(reverse('about:author'), data, **headers)
+
+    def test_not_sampled_by_default(self):
+        """Без выборки, заголовка и флага запрос не профилируется."""
+        self.get({'profile': '1'})
+        self.get(HTTP_X_PROFILE='поддельный')
+        self.assertEqual(self.count(), 0)
+
+    def test_staff_flag(self):
+        """Сотрудник профилирует запрос параметром ?profile=1."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        self.get({'profile': '1'})
+        self.assertEqual(self.count(), 1)
+
+    def test_signed_header(self):
+        """Запрос с подписанным заголовком X-Profile профилируется."""
+        self.get(HTTP_X_PROFILE=profiling.make_token())
+        self.assertEqual(self.count(), 1)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sample_rate_and_report(self):
+        """Профили выборки объединяются в отчёт."""
+        self.get()
+        self.get()
+        out = StringIO()
+        call_command('profile_report', 'about:author', stdout=out)
+        self.assertIn('Профилей: 2', out.getvalue())
+        self.assertIn('cumulative', out.getvalue())
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from posts.models import User
+
+
+@override_settings(RATELIMITS={'posts:index': (2, 60)})
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+
+    def get_index(self, client=None):
+        return (client or self.client).get(reverse('posts:index'))
+
+    def test_limit_exceeded(self):
+        """После burst запросов страница отвечает 429 с Retry-After."""
+        for _ in range(2):
+            self.assertEqual(self.get_index().status_code, HTTPStatus.OK)
+        response = self.get_index()
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_buckets_per_client(self):
+        """У пользователя своя корзина, отдельная от его IP."""
+        for _ in range(3):
+            self.get_index()
+        self.client.force_login(self.user)
+        self.assertEqual(self.get_index().status_code, HTTPStatus.OK)
+
+    @override_settings(RATELIMIT_PROXY_COUNT=1)
+    def test_proxy_forwarded_for(self):
+        """За прокси у каждого анонима своя корзина по X-Forwarded-For."""
+        def get(forwarded_for):
+            return self.client.get(
+                reverse('posts:index'), HTTP_X_FORWARDED_FOR=forwarded_for
+            ).status_code
+
+        for address in ('1.1.1.1', '2.2.2.2'):
+            for spoofed in ('8.8.8.8', '9.9.9.9'):
+                with self.subTest(address=address, spoofed=spoofed):
+                    self.assertEqual(
+                        get(f'{spoofed}, {address}'), HTTPStatus.OK
+                    )
+        # Адрес левее записи прокси подставляет сам клиент.
+        self.assertEqual(
+            get('7.7.7.7, 1.1.1.1'), HTTPStatus.TOO_MANY_REQUESTS
+        )
+
+    def test_tokens_refill(self):
+        """Токены восстанавливаются со временем."""
+        with mock.patch('core.ratelimit.time.time', return_value=1000):
+            for _ in range(3):
+                self.get_index()
+        with mock.patch('core.ratelimit.time.time', return_value=1030):
+            self.assertEqual(self.get_index().status_code, HTTPStatus.OK)
+            self.assertEqual(
+                self.get_index().status_code,
+                HTTPStatus.TOO_MANY_REQUESTS,
+            )
+
+    def test_unlimited_views(self):
+        """Страницы без лимита не ограничиваются."""
+        for _ in range(3):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_counters(self):
+        """Пропущенные и отклонённые запросы считаются."""
+        for _ in range(3):
+            self.get_index()
+        self.assertEqual(
+            ratelimit.counters(),
+            {'posts:index': {ratelimit.ALLOWED: 2, ratelimit.BLOCKED: 1}},
+        )
+        out = StringIO()
+        call_command('ratelimit_stats', stdout=out)
+        self.assertIn('отклонено 1', out.getvalue())
@@ -0,0 +1,59 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve
+
+from core.middleware import PRIMARY_UNTIL_KEY, ReplicaMiddleware
+from core.routers import ReplicaRouter, replica_enabled, use_replica
+from posts.models import Post, User
+
+
+@override_settings(REPLICA_DATABASES=['replica'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(lambda request: None)
+
+    def tearDown(self):
+        use_replica(False)
+
+    def make_request(self, path, method='get'):
+        request = getattr(self.factory, method)(path)
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(path)
+        return request
+
+    def test_reads_go_to_replica_only_when_enabled(self):
+        """Чтение постов уходит на реплику только внутри читающих страниц."""
+        self.assertIsNone(self.router.db_for_read(Post))
+        use_replica(True)
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertIsNone(self.router.db_for_read(User))
+        post = Post(text='Тестовый пост')
+        post._state.db = 'replica'
+        self.assertEqual(
+            self.router.db_for_write(Post, instance=post), 'default'
+        )
+
+    def test_middleware_enables_replica_for_read_views(self):
+        """Главная страница читает с реплики, создание поста — нет."""
+        request = self.make_request('/')
+        self.middleware.process_view(request, None, (), {})
+        self.assertTrue(replica_enabled())
+        request = self.make_request('/create/')
+        self.middleware.process_view(request, None, (), {})
+        self.assertFalse(replica_enabled())
+
+    def test_session_sticks_to_primary_after_write(self):
+        """После записи сессия какое-то время читает с основной базы."""
+        request = self.make_request('/create/', method='post')
+        self.middleware(request)
+        self.assertGreater(request.session[PRIMARY_UNTIL_KEY], time.time())
+        read_request = self.make_request('/')
+        read_request.session = request.session
+        self.middleware.process_view(read_request, None, (), {})
+        self.assertFalse(replica_enabled())
@@ -0,0 +1,31 @@
+import importlib
+import os
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+with mock.patch.dict(os.environ, YATUBE_SECRET_KEY='test-secret'):
+    from yatube import settings_production
+
+
+class ProductionSettingsTest(SimpleTestCase):
+    def load(self, **environ):
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return importlib.reload(settings_production)
+
+    def tearDown(self):
+        self.load(YATUBE_SECRET_KEY='test-secret')
+
+    def test_secret_key_required(self):
+        """Без YATUBE_SECRET_KEY боевые настройки не загружаются."""
+        with self.assertRaises(ImproperlyConfigured):
+            self.load()
+
+    def test_secret_key_and_profilers(self):
+        """Ключ берётся из окружения, профилировщики выключены."""
+        production = self.load(YATUBE_SECRET_KEY='test-secret')
+        self.assertEqual(production.SECRET_KEY, 'test-secret')
+        self.assertFalse(production.PROFILING_ENABLED)
+        self.assertFalse(production.MEMORY_TRACING_ENABLED)
+        self.assertFalse(production.TEMPLATE_PROFILING)
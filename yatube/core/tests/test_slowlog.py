@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import redact
+from posts.models import Comment, Post, User
+
+
+@override_settings(SLOW_QUERY_SECONDS=0)
+class SlowQueryLogTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.author)
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Комментарий'
+        )
+
+    def get_entries(self, url):
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            self.client.get(url)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_entries_attributed_to_view(self):
+        """Запросы записываются со страницей, местом вызова и планом."""
+        entries = self.get_entries(
+            reverse('posts:profile', kwargs={'username': 'auth'})
+        )
+        self.assertTrue(entries)
+        for entry in entries:
+            self.assertEqual(entry['view'], 'posts:profile')
+            self.assertIsNotNone(entry['call_site'])
+        user_query = next(
+            entry for entry in entries if 'auth_user' in entry['sql']
+        )
+        self.assertIn('<str len=4>', user_query['params'])
+        self.assertTrue(user_query['plan'])
+
+    def test_template_call_site(self):
+        """Запрос, выполненный при отрисовке, указывает на шаблон."""
+        entries = self.get_entries(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        comments = next(
+            entry for entry in entries if 'posts_comment' in entry['sql']
+        )
+        self.assertRegex(
+            comments['call_site'], r'^posts/add_comment\.html:\d+$'
+        )
+
+    def test_redact(self):
+        """Строки скрываются, числа остаются."""
+        self.assertEqual(redact(5), 5)
+        self.assertEqual(redact(None), None)
+        self.assertEqual(redact('пароль'), '<str len=6>')
+
+    def test_report(self):
+        """slow_queries группирует записи и показывает план."""
+        entry = {
+            'view': 'posts:index', 'call_site': 'posts/views.py:1 index',
+            'sql': 'SELECT * FROM posts_post WHERE id = 1',
+            'duration': 0.7, 'plan': ['SCAN posts_post'],
+        }
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.log', delete=False
+        ) as file:
+            for post_id in (1, 2):
+                entry['sql'] = f'SELECT * FROM posts_post WHERE id = {post_id}'
+                file.write(json.dumps(entry) + '\n')
+        out = StringIO()
+        try:
+            call_command('slow_queries', path=file.name, stdout=out)
+        finally:
+            os.remove(file.name)
+        report = out.getvalue()
+        self.assertIn('1.400 с всего, 2 раз', report)
+        self.assertIn('SCAN posts_post', report)
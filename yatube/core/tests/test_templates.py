@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from core.middleware import TEMPLATE_PROFILE_HEADER
+from posts.models import Post, User
+
+
+@override_settings(TEMPLATE_PROFILING=True, TEMPLATE_PROFILING_HEADER=True)
+class TemplateProfilerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        metrics._counters.clear()
+        cache.clear()
+
+    def test_index_templates_and_tags(self):
+        """Главная раскладывается по шаблонам, включениям и тегам."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertIn(
+            'template:posts/index.html=', response[TEMPLATE_PROFILE_HEADER]
+        )
+        counters = metrics.snapshot()['counters']
+        for item in (
+            'template:posts/index.html',
+            'template:posts/includes/paginator.html',
+            'tag:include',
+            'tag:url',
+        ):
+            with self.subTest(item=item):
+                self.assertIn(
+                    f'template_calls_total|posts:index|{item}', counters
+                )
+
+    def test_custom_filter(self):
+        """Фильтр addclass замеряется отдельно."""
+        self.client.get(reverse('users:login'))
+        self.assertEqual(
+            metrics.snapshot()['counters'][
+                'template_calls_total|users:login|filter:addclass'
+            ],
+            2,
+        )
+
+    @override_settings(TEMPLATE_PROFILING_HEADER=False)
+    def test_header_optional(self):
+        """Без TEMPLATE_PROFILING_HEADER заголовка нет."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header(TEMPLATE_PROFILE_HEADER))
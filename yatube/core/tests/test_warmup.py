@@ -0,0 +1,44 @@
+import os
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import get_resolver
+
+from core import warmup
+
+with mock.patch.dict(os.environ, YATUBE_SECRET_KEY='test-secret'):
+    from yatube import settings_production
+
+
+@override_settings(TEMPLATES=settings_production.TEMPLATES)
+class WarmupTest(TestCase):
+    def test_compile_templates(self):
+        """Все шаблоны проекта попадают в кеш загрузчика."""
+        files = [
+            name
+            for backend in engines.all()
+            for directory in backend.dirs
+            for _, _, names in os.walk(directory)
+            for name in names if name.endswith('.html')
+        ]
+        self.assertEqual(warmup.compile_templates(), len(files))
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertIn('posts/index.html', {
+            template.origin.template_name
+            for template in loader.get_template_cache.values()
+            if hasattr(template, 'origin')
+        })
+
+    def test_populate_urls(self):
+        """Резолвер и вложенные резолверы приложений заполняются."""
+        self.assertGreater(warmup.populate_urls(), 1)
+        self.assertIn('posts', get_resolver().namespace_dict)
+
+    def test_import_modules(self):
+        """Тяжёлые модули импортируются заранее."""
+        warmup.import_modules()
+        for name in settings.WARMUP_IMPORTS:
+            self.assertIn(name, sys.modules)
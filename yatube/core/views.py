@@ -1,6 +1,13 @@
+import hmac
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 from http import HTTPStatus
 
+from . import metrics
+
 
 def page_not_found(request, exception):
     return render(
@@ -23,3 +30,18 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=HTTPStatus.FORBIDDEN)
+
+
+def metrics_view(request):
+    """Метрики для Prometheus: по токену METRICS_TOKEN или для staff."""
+    token = settings.METRICS_TOKEN
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = request.user.is_staff or (
+        token and hmac.compare_digest(authorization, f'Bearer {token}')
+    )
+    if not allowed:
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.render_prometheus(metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,93 @@
+"""Прогрев процесса до первого запроса.
+
+Приложение warmup стоит последним в INSTALLED_APPS: его ready()
+выполняется, когда остальные приложения уже готовы (например, админка
+зарегистрировала модели, и её адреса попадут в прогретый резолвер).
+При WARMUP_ON_STARTUP оно компилирует все шаблоны из каталогов
+TEMPLATES в кеш загрузчика, заполняет резолвер адресов и импортирует
+тяжёлые модули из WARMUP_IMPORTS.
+"""
+import importlib
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger('yatube.warmup')
+
+
+def template_names(backend):
+    """Имена шаблонов из каталогов движка без каталогов других движков."""
+    foreign = {
+        os.path.abspath(directory)
+        for other in engines.all() if other is not backend
+        for directory in other.dirs
+    }
+    for directory in backend.dirs:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [
+                name for name in dirs
+                if os.path.abspath(os.path.join(root, name)) not in foreign
+            ]
+            for name in files:
+                if name.endswith(('.html', '.txt', '.xml')):
+                    yield os.path.relpath(
+                        os.path.join(root, name), directory
+                    ).replace(os.sep, '/')
+
+
+def compile_templates():
+    """Разбирает шаблоны заранее; возвращает число разобранных."""
+    if settings.TEMPLATE_PROFILING:
+        # Установка профилировщика сбрасывает кеш загрузчика.
+        from core.templates import install_profiler
+        install_profiler()
+    compiled = 0
+    for backend in engines.all():
+        for name in template_names(backend):
+            try:
+                backend.get_template(name)
+            except Exception:
+                logger.exception('Шаблон %s не разобран', name)
+            else:
+                compiled += 1
+    return compiled
+
+
+def populate_urls(resolver=None):
+    """Заполняет резолвер и вложенные резолверы; возвращает их число."""
+    resolver = resolver or get_resolver()
+    # Свойства заполняют словари для reverse() и пространств имён.
+    resolver.reverse_dict
+    resolver.namespace_dict
+    count = 1
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += populate_urls(pattern)
+    return count
+
+
+def import_modules():
+    for name in settings.WARMUP_IMPORTS:
+        importlib.import_module(name)
+    # Pillow регистрирует форматы картинок при первом открытии файла.
+    from PIL import Image
+    Image.init()
+    return len(settings.WARMUP_IMPORTS)
+
+
+def run():
+    """Выполняет прогрев и возвращает время шагов в секундах."""
+    timings = {}
+    for step in (import_modules, populate_urls, compile_templates):
+        started = time.perf_counter()
+        result = step()
+        timings[step.__name__] = time.perf_counter() - started
+        logger.info(
+            '%s: %s за %.3f с', step.__name__, result,
+            timings[step.__name__],
+        )
+    return timings
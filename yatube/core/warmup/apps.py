@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+
+class WarmupConfig(AppConfig):
+    name = 'core.warmup'
+    label = 'warmup'
+
+    def ready(self):
+        if settings.WARMUP_ON_STARTUP:
+            from . import run
+            run()
@@ -1,5 +1,18 @@
 from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from django.contrib.auth.admin import UserAdmin
+from .deletion import schedule
+from .models import Post, Group, Comment, Deletion, Follow, User
+
+
+def delete_in_background(modeladmin, request, queryset):
+    for obj in queryset:
+        schedule(obj)
+    modeladmin.message_user(
+        request, 'Объекты скрыты и будут удалены в фоне.'
+    )
+
+
+delete_in_background.short_description = 'Скрыть и удалить в фоне'
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -14,6 +27,7 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = (delete_in_background,)
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -25,6 +39,7 @@ class GroupAdmin(admin.ModelAdmin):
     search_fields = ('title',)
     list_filter = ('description',)
     empty_value_display = '-пусто-'
+    actions = (delete_in_background,)
 
 
 class CommentAdmin(admin.ModelAdmin):
@@ -48,7 +63,26 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('author__username',)
 
 
+class DeletionAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'created',
+        'finished',
+    )
+    list_filter = ('kind',)
+    empty_value_display = '-пусто-'
+
+
+class YatubeUserAdmin(UserAdmin):
+    actions = (delete_in_background,)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(Deletion, DeletionAdmin)
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
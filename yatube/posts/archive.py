@@ -0,0 +1,111 @@
+"""Архив старых постов и комментариев.
+
+Команда archive_posts переносит посты старше POSTS_ARCHIVE_AFTER_DAYS
+в таблицы ArchivedPost/ArchivedComment (в базе POSTS_ARCHIVE_DATABASE),
+чтобы горячие таблицы и их индексы оставались небольшими. Страница поста
+и глубокие страницы профиля находят архивные посты сами.
+"""
+from django.conf import settings
+from django.http import Http404
+
+from . import sharding
+from .models import ArchivedComment, ArchivedPost
+
+ARCHIVE_MODELS = (ArchivedPost, ArchivedComment)
+
+
+class ArchiveRouter:
+    """Хранит архивные таблицы в базе POSTS_ARCHIVE_DATABASE."""
+
+    def _db_for(self, model):
+        database = settings.POSTS_ARCHIVE_DATABASE
+        if model in ARCHIVE_MODELS and database != 'default':
+            return database
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if isinstance(obj1, ARCHIVE_MODELS) or isinstance(
+            obj2, ARCHIVE_MODELS
+        ):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        database = settings.POSTS_ARCHIVE_DATABASE
+        if app_label == 'posts' and model_name in (
+            'archivedpost', 'archivedcomment'
+        ):
+            return db == database
+        if database != 'default' and db == database:
+            return False
+        return None
+
+
+class TieredPosts:
+    """Посты автора: сначала горячие, затем архивные.
+
+    В архив попадают только посты старше любого горячего, поэтому общая
+    лента — это горячая выборка, продолженная архивной.
+    """
+
+    def __init__(self, hot, archived):
+        self.hot = hot
+        self.archived = archived
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + self.archived.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        hot_count = self.hot_count()
+        if stop is not None and stop <= hot_count:
+            return self.hot[start:stop]
+        archived_stop = None if stop is None else stop - hot_count
+        archived = list(
+            self.archived[max(start - hot_count, 0):archived_stop]
+        )
+        if start >= hot_count:
+            return archived
+        return list(self.hot[start:]) + archived
+
+
+def author_posts(author):
+    return TieredPosts(
+        sharding.author_posts(author),
+        ArchivedPost.objects.filter(author=author).prefetch_related(
+            'author', 'group'
+        ),
+    )
+
+
+def get_post_or_404(post_id):
+    """Пост из горячей таблицы или, если его там нет, из архива."""
+    try:
+        return sharding.get_post_or_404(post_id)
+    except Http404:
+        try:
+            post = ArchivedPost.objects.get(id=post_id)
+        except ArchivedPost.DoesNotExist:
+            raise Http404('Пост не найден.')
+    # Архивные посты удаляемого автора удаляются только фоновой задачей,
+    # а скрываются вместе с автором.
+    if not post.author.is_active:
+        raise Http404('Пост не найден.')
+    return post
@@ -0,0 +1,211 @@
+"""Замеры страниц постов на большом наборе данных.
+
+Каждый сценарий — запрос тестового клиента к одной странице. Для него
+считаются перцентили времени p50/p95/p99, число запросов к базе и пик
+памяти tracemalloc (отдельными прогонами, чтобы трассировка не искажала
+время). Результаты сохраняются базовой линией в BENCHMARKS_DIR, и
+следующий прогон сравнивается с ней. Набор данных готовит команда
+benchmark через generate_dataset.
+"""
+import json
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from .models import Group, Post, User
+
+# Во сколько прогонов меряется память.
+MEMORY_RUNS = 3
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def busiest(queryset, related):
+    return queryset.annotate(
+        activity=Count(related)
+    ).order_by('-activity', 'id').first()
+
+
+class Targets:
+    """Объекты, на которых страницы тяжелее всего."""
+
+    def __init__(self):
+        self.group = busiest(Group.objects.all(), 'posts')
+        self.author = busiest(User.objects.all(), 'posts')
+        self.post = busiest(Post.objects.all(), 'comments')
+        self.reader = busiest(User.objects.all(), 'follower')
+
+
+class Scenario:
+    """Запрос к странице: GET, а с data — POST от имени читателя."""
+
+    def __init__(self, view_name, kwargs=None, data=None, login=False):
+        self.view_name = view_name
+        self.kwargs = kwargs
+        self.data = data
+        self.login = login or data is not None
+
+    def request(self, targets):
+        url = reverse(
+            self.view_name, kwargs=self.kwargs and self.kwargs(targets)
+        )
+        if self.data is None:
+            return 'get', url, None
+        return 'post', url, self.data(targets)
+
+
+# Сначала страницы чтения: сценарии записи меняют данные.
+SCENARIOS = {
+    'index': Scenario('posts:index'),
+    'group_posts': Scenario(
+        'posts:group_list', lambda targets: {'slug': targets.group.slug}
+    ),
+    'profile': Scenario(
+        'posts:profile',
+        lambda targets: {'username': targets.author.username},
+    ),
+    'post_detail': Scenario(
+        'posts:post_detail', lambda targets: {'post_id': targets.post.id}
+    ),
+    'follow_index': Scenario('posts:follow_index', login=True),
+    'post_create': Scenario(
+        'posts:post_create',
+        data=lambda targets: {
+            'text': 'Пост из замера', 'group': targets.group.id,
+        },
+    ),
+    'add_comment': Scenario(
+        'posts:add_comment',
+        lambda targets: {'post_id': targets.post.id},
+        data=lambda targets: {'text': 'Комментарий из замера'},
+    ),
+}
+
+
+def percentile(values, rank):
+    """Перцентиль по ближайшему рангу."""
+    values = sorted(values)
+    return values[max(0, -(-len(values) * rank // 100) - 1)]
+
+
+def measure(client, scenario, targets, iterations, warmup):
+    method, url, data = scenario.request(targets)
+
+    def call():
+        # Страницы меряются без кеша, иначе index отдаётся из cache_page.
+        cache.clear()
+        return getattr(client, method)(url, data)
+
+    for _ in range(warmup):
+        call()
+    timings = []
+    queries = 0
+    for _ in range(iterations):
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        queries = max(queries, counter.count)
+    memory = 0
+    for _ in range(MEMORY_RUNS):
+        tracemalloc.start()
+        try:
+            call()
+            memory = max(memory, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return {
+        'p50': percentile(timings, 50) * 1000,
+        'p95': percentile(timings, 95) * 1000,
+        'p99': percentile(timings, 99) * 1000,
+        'queries': queries,
+        'memory_kib': memory / 1024,
+    }
+
+
+def run(names=None, iterations=50, warmup=3):
+    """Результаты сценариев: имя -> p50/p95/p99 (мс), запросы, память."""
+    targets = Targets()
+    anonymous = Client()
+    user = Client()
+    user.force_login(targets.reader)
+    return {
+        name: measure(
+            user if scenario.login else anonymous,
+            scenario, targets, iterations, warmup,
+        )
+        for name, scenario in SCENARIOS.items()
+        if not names or name in names
+    }
+
+
+def baseline_path(name):
+    return os.path.join(settings.BENCHMARKS_DIR, f'{name}.json')
+
+
+def save(name, results, **meta):
+    os.makedirs(settings.BENCHMARKS_DIR, exist_ok=True)
+    path = baseline_path(name)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+        json.dump({
+            'meta': dict(
+                meta,
+                python=platform.python_version(),
+                django=django.get_version(),
+            ),
+            'results': results,
+        }, file, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(f'{path}.tmp', path)
+    return path
+
+
+def load(name):
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def regressions(results, baseline, tolerance):
+    """Список описаний ухудшений относительно базовой линии.
+
+    Время p50/p95 и память могут вырасти не больше чем на tolerance,
+    число запросов к базе расти не должно вовсе.
+    """
+    found = []
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            continue
+        for metric in ('p50', 'p95', 'memory_kib'):
+            if result[metric] > before[metric] * (1 + tolerance):
+                found.append(
+                    f'{name}: {metric} {result[metric]:.1f} > '
+                    f'{before[metric]:.1f}'
+                )
+        if result['queries'] > before['queries']:
+            found.append(
+                f'{name}: queries {result["queries"]} > {before["queries"]}'
+            )
+    return found
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+from django.db import connections
+
+
+@contextmanager
+def preserve_auto_dates(*models):
+    """Отключает auto_now_add, чтобы bulk_create сохранял даты из данных."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@contextmanager
+def muted_signals(*signals):
+    """Временно отключает обработчики сигналов на время массовой загрузки."""
+    saved = [(signal, signal.receivers) for signal in signals]
+    for signal in signals:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def table_indexes(table, using='default'):
+    """SQL создания вторичных индексов таблицы SQLite."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            'AND tbl_name = %s AND sql IS NOT NULL',
+            [table],
+        )
+        return dict(cursor.fetchall())
+
+
+def drop_indexes(table, using='default'):
+    indexes = table_indexes(table, using)
+    with connections[using].cursor() as cursor:
+        for name in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    return indexes
+
+
+def create_indexes(indexes, table, using='default'):
+    existing = table_indexes(table, using)
+    with connections[using].cursor() as cursor:
+        for name, sql in indexes.items():
+            if name not in existing:
+                cursor.execute(sql)
@@ -0,0 +1,180 @@
+"""Фоновое удаление пользователей, групп и постов пачками.
+
+Каскадное удаление Django собирает все связанные записи в память и
+удаляет их одной транзакцией, а SQLite на это время блокирует любую
+запись. Здесь объект сразу скрывается, а зависимые записи удаляются
+короткими транзакциями по DELETION_BATCH_SIZE строк. Архивные копии
+постов и комментариев удаляются вместе с горячими.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import delete as delete_thumbnails
+
+from api.views import post_cache_key
+from core import jobs
+
+from . import feeds, sitemaps
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Deletion, Follow, Group, Post,
+    User
+)
+
+
+def schedule(obj):
+    """Скрывает объект и ставит его удаление в очередь.
+
+    Посты пользователя скрываются сразу, но каждая пачка — своей
+    транзакцией: одна общая заблокировала бы запись в базу на всё время
+    скрытия. Если скрытие прервётся, его доделает задача удаления.
+    """
+    if isinstance(obj, User):
+        obj.is_active = False
+        obj.save(update_fields=['is_active'])
+        kind = Deletion.USER
+    elif isinstance(obj, Group):
+        obj.is_hidden = True
+        obj.save(update_fields=['is_hidden'])
+        kind = Deletion.GROUP
+    else:
+        obj.is_hidden = True
+        obj.save(update_fields=['is_hidden'])
+        kind = Deletion.POST
+    item = Deletion.objects.create(kind=kind, object_id=obj.pk)
+    jobs.enqueue(
+        'posts.tasks.process_deletion', item.pk,
+        dedup_key=f'deletion:{item.pk}',
+    )
+    if kind == Deletion.USER:
+        for source in _sources():
+            _hide_posts(
+                Post._base_manager.using(source).filter(author_id=obj.pk),
+                settings.DELETION_BATCH_SIZE,
+            )
+    return item
+
+
+def _sources():
+    return settings.POST_SHARDS or ['default']
+
+
+def _batches(queryset, batch_size):
+    """Пачки id из queryset; каждая пачка — отдельный короткий запрос."""
+    queryset = queryset.order_by('id').values_list('id', flat=True)
+    while True:
+        ids = list(queryset[:batch_size])
+        if not ids:
+            return
+        yield ids
+
+
+def _forget(posts):
+    """Сбрасывает кеши постов: update() не посылает сигналы, которые
+    делают это при сохранении."""
+    posts = list(posts.only('id', 'author_id', 'group_id'))
+    cache.delete_many([post_cache_key(post.id) for post in posts])
+    feeds.forget_posts(posts)
+    sitemaps.forget('posts', [post.id for post in posts])
+
+
+def _hide_posts(posts, batch_size):
+    for ids in _batches(posts.filter(is_hidden=False), batch_size):
+        batch = Post._base_manager.using(posts.db).filter(id__in=ids)
+        with transaction.atomic(using=posts.db):
+            batch.update(is_hidden=True)
+        _forget(batch)
+
+
+def _delete_in_batches(queryset, batch_size):
+    model = queryset.model
+    for ids in _batches(queryset, batch_size):
+        with transaction.atomic(using=queryset.db):
+            model._base_manager.using(queryset.db).filter(
+                id__in=ids
+            ).delete()
+
+
+def _delete_posts(posts, batch_size, comment_model=Comment):
+    for ids in _batches(posts, batch_size):
+        _delete_in_batches(
+            comment_model._base_manager.using(posts.db).filter(
+                post_id__in=ids
+            ),
+            batch_size,
+        )
+        batch = posts.model._base_manager.using(posts.db).filter(id__in=ids)
+        for post in batch.exclude(image=''):
+            # Удаляет файл, его миниатюры и записи о них в кеше sorl.
+            delete_thumbnails(post.image)
+        with transaction.atomic(using=posts.db):
+            batch.delete()
+
+
+def delete_post(post_id, batch_size):
+    for source in _sources():
+        _delete_posts(
+            Post._base_manager.using(source).filter(id=post_id), batch_size
+        )
+    _delete_posts(
+        ArchivedPost._base_manager.filter(id=post_id), batch_size,
+        ArchivedComment,
+    )
+
+
+def delete_group(group_id, batch_size):
+    for source in _sources():
+        posts = Post._base_manager.using(source).filter(group_id=group_id)
+        for ids in _batches(posts, batch_size):
+            with transaction.atomic(using=source):
+                Post._base_manager.using(source).filter(
+                    id__in=ids
+                ).update(group=None)
+    archived = ArchivedPost._base_manager.filter(group_id=group_id)
+    for ids in _batches(archived, batch_size):
+        with transaction.atomic(using=archived.db):
+            archived.filter(id__in=ids).update(group=None)
+    Group.objects.filter(id=group_id).delete()
+
+
+def delete_user(user_id, batch_size):
+    for source in _sources():
+        posts = Post._base_manager.using(source).filter(author_id=user_id)
+        _hide_posts(posts, batch_size)
+        _delete_posts(posts, batch_size)
+        _delete_in_batches(
+            Comment._base_manager.using(source).filter(author_id=user_id),
+            batch_size,
+        )
+    _delete_posts(
+        ArchivedPost._base_manager.filter(author_id=user_id), batch_size,
+        ArchivedComment,
+    )
+    _delete_in_batches(
+        ArchivedComment._base_manager.filter(author_id=user_id), batch_size
+    )
+    _delete_in_batches(Follow.objects.filter(user_id=user_id), batch_size)
+    _delete_in_batches(Follow.objects.filter(author_id=user_id), batch_size)
+    User.objects.filter(id=user_id).delete()
+
+
+HANDLERS = {
+    Deletion.USER: delete_user,
+    Deletion.GROUP: delete_group,
+    Deletion.POST: delete_post,
+}
+
+
+def process(deletion, batch_size=None):
+    """Выполняет удаление; после сбоя его можно безопасно повторить."""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    HANDLERS[deletion.kind](deletion.object_id, batch_size)
+    deletion.finished = timezone.now()
+    deletion.save(update_fields=['finished'])
+
+
+def process_pending(batch_size=None):
+    pending = list(Deletion.objects.filter(finished__isnull=True))
+    for deletion in pending:
+        process(deletion, batch_size)
+    return len(pending)
@@ -0,0 +1,141 @@
+"""Потоковая выгрузка постов автора или группы в JSONL, CSV или ZIP.
+
+Посты читаются запросами по POSTS_EXPORT_CHUNK_SIZE записей с продолжением
+по id. Так в памяти держится одна пачка, а SQLite не держит открытый
+курсор (и блокировку) всё время, пока клиент скачивает файл.
+"""
+import csv
+import io
+import json
+import zipfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from . import sharding
+from .models import ArchivedPost, Group, Post, User
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'zip': 'application/zip',
+}
+FIELDS = ('id', 'text', 'pub_date', 'author', 'group', 'image')
+
+
+def author_sources(author):
+    return [
+        sharding.author_posts(author),
+        ArchivedPost.objects.filter(author=author),
+    ]
+
+
+def group_sources(group):
+    return [
+        Post.objects.using(shard).filter(group=group)
+        for shard in settings.POST_SHARDS or ['default']
+    ] + [ArchivedPost.objects.filter(group=group)]
+
+
+def _chunks(querysets, chunk_size):
+    for queryset in querysets:
+        queryset = queryset.order_by('id').values(
+            'id', 'text', 'pub_date', 'author_id', 'group_id', 'image'
+        )
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1]['id']
+            yield chunk
+
+
+def rows(querysets, chunk_size=None):
+    """Словари постов с username автора и slug группы вместо id."""
+    chunk_size = chunk_size or settings.POSTS_EXPORT_CHUNK_SIZE
+    for chunk in _chunks(querysets, chunk_size):
+        authors = dict(User.objects.filter(
+            id__in={row['author_id'] for row in chunk}
+        ).values_list('id', 'username'))
+        groups = dict(Group.objects.filter(
+            id__in={row['group_id'] for row in chunk}
+        ).values_list('id', 'slug'))
+        for row in chunk:
+            yield {
+                'id': row['id'],
+                'text': row['text'],
+                'pub_date': row['pub_date'].isoformat(),
+                'author': authors.get(row['author_id']),
+                'group': groups.get(row['group_id']),
+                'image': row['image'],
+            }
+
+
+def to_jsonl(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class _Buffer:
+    """Файл-приёмник, из которого генератор забирает записанное."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def to_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def to_zip(querysets):
+    """posts.jsonl и картинки постов; архив пишется без перемотки.
+
+    Картинки добавляются вторым проходом по постам, чтобы не копить
+    их список в памяти.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.jsonl', 'w') as entry:
+            for line in to_jsonl(rows(querysets)):
+                entry.write(line.encode())
+                yield buffer.pop()
+        for row in rows(querysets):
+            name = row['image']
+            if not name or not default_storage.exists(name):
+                continue
+            with default_storage.open(name) as source, archive.open(
+                name, 'w'
+            ) as entry:
+                for data in source.chunks():
+                    entry.write(data)
+                    yield buffer.pop()
+    yield buffer.pop()
+
+
+def export(querysets, fmt):
+    """Генератор частей файла выгрузки в формате fmt."""
+    if fmt == 'zip':
+        return to_zip(querysets)
+    if fmt == 'csv':
+        return to_csv(rows(querysets))
+    return to_jsonl(rows(querysets))
@@ -0,0 +1,209 @@
+"""RSS и Atom ленты главной страницы, групп и авторов.
+
+Готовое тело ленты кешируется по области (главная, группа, автор) и
+сбрасывается сигналами при изменении постов, поэтому частые опросы
+читалок не обращаются к базе. Повторный запрос с If-None-Match или
+If-Modified-Since получает ответ 304.
+"""
+import hashlib
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import parse_http_date_safe
+
+from . import archive, sharding
+from .models import Group, Post, User
+
+FEED_TYPES = {
+    'rss': Rss201rev2Feed,
+    'atom': Atom1Feed,
+}
+
+
+def cache_key(fmt, scope):
+    # В области бывают slug и username не в ASCII, а такие ключи
+    # memcached не принимает.
+    return 'feeds:{}:{}'.format(
+        fmt, hashlib.md5(scope.encode()).hexdigest()
+    )
+
+
+def forget(*scopes):
+    cache.delete_many([
+        cache_key(fmt, scope) for fmt in FEED_TYPES for scope in scopes
+    ])
+
+
+class PostsFeed(ABC, Feed):
+    @abstractmethod
+    def posts(self, obj):
+        """Посты ленты объекта obj, от новых к старым."""
+
+    def items(self, obj):
+        return self.posts(obj)[:settings.FEEDS_ITEMS]
+
+    def item_title(self, item):
+        return str(item)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item.id})
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class IndexFeed(PostsFeed):
+    title = 'Последние обновления на сайте'
+    description = 'Новые посты Yatube'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return sharding.index_posts()
+
+
+class GroupFeed(PostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug, is_hidden=False)
+
+    def title(self, obj):
+        return obj.title
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def posts(self, obj):
+        return sharding.group_posts(obj)
+
+
+class ProfileFeed(PostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username, is_active=True)
+
+    def title(self, obj):
+        return f'Посты {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return self.title(obj)
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def posts(self, obj):
+        return archive.author_posts(obj)
+
+
+def cached_feed(feed_class, scope):
+    """View ленты feed_class, тело которой кешируется по области scope.
+
+    scope — шаблон, который заполняется аргументами из URL.
+    """
+    def view(request, fmt, **kwargs):
+        if fmt not in FEED_TYPES:
+            raise Http404
+        key = cache_key(fmt, scope.format(**kwargs))
+        cached = cache.get(key)
+        if cached is None:
+            feed = feed_class()
+            feed.feed_type = FEED_TYPES[fmt]
+            response = feed(request, **kwargs)
+            cached = {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'etag': '"{}"'.format(
+                    hashlib.md5(response.content).hexdigest()
+                ),
+                'last_modified': response.get('Last-Modified'),
+            }
+            cache.set(key, cached, settings.FEEDS_CACHE_SECONDS)
+        last_modified = cached['last_modified']
+        response = get_conditional_response(
+            request,
+            etag=cached['etag'],
+            last_modified=last_modified and parse_http_date_safe(
+                last_modified
+            ),
+        )
+        if response is None:
+            response = HttpResponse(
+                cached['content'], content_type=cached['content_type']
+            )
+        response['ETag'] = cached['etag']
+        if last_modified:
+            response['Last-Modified'] = last_modified
+        return response
+    return view
+
+
+index_feed = cached_feed(IndexFeed, 'index')
+group_feed = cached_feed(GroupFeed, 'group:{slug}')
+profile_feed = cached_feed(ProfileFeed, 'profile:{username}')
+
+
+def forget_posts(posts, group_ids=()):
+    """Сбрасывает ленты, в которые входят посты posts, и ленты групп
+    group_ids."""
+    author_ids = {post.author_id for post in posts}
+    group_ids = {post.group_id for post in posts if post.group_id}.union(
+        group_ids
+    )
+    scopes = ['index']
+    scopes.extend(
+        f'profile:{username}'
+        for username in User.objects.filter(
+            id__in=author_ids
+        ).values_list('username', flat=True)
+    )
+    scopes.extend(
+        f'group:{slug}'
+        for slug in Group.objects.filter(
+            id__in=group_ids
+        ).values_list('slug', flat=True)
+    )
+    forget(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_group(sender, instance, raw, using, **kwargs):
+    # Пост, перенесённый в другую группу, уходит и из ленты прежней.
+    if instance.pk and not raw:
+        instance._feeds_group_id = Post._base_manager.using(using).filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Post)
+def forget_post_feeds(sender, instance, **kwargs):
+    old_group_id = getattr(instance, '_feeds_group_id', None)
+    forget_posts([instance], [old_group_id] if old_group_id else ())
+
+
+@receiver(post_save, sender=User)
+def forget_profile_feed(sender, instance, **kwargs):
+    # Закешированная лента отдаётся раньше проверки is_active.
+    if not instance.is_active:
+        forget(f'profile:{instance.username}')
+
+
+@receiver(post_save, sender=Group)
+def forget_group_feed(sender, instance, **kwargs):
+    forget(f'group:{instance.slug}')
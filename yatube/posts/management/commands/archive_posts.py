@@ -0,0 +1,139 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, router, transaction
+from django.utils import timezone
+
+from posts import sharding
+from posts.models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image')
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше POSTS_ARCHIVE_AFTER_DAYS вместе с '
+        'комментариями в архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Возраст поста в днях, после которого он уходит в архив.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.POSTS_ARCHIVE_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--vacuum', action='store_true',
+            help='Сжать базы после переноса (блокирует запись).',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        self.batch_size = options['batch_size']
+        sources = settings.POST_SHARDS or ['default']
+        before = self.report(sources)
+        archived = sum(self.archive(source, cutoff) for source in sources)
+        if options['vacuum']:
+            for source in sources:
+                connections[source].cursor().execute('VACUUM')
+        after = self.report(sources)
+        self.stdout.write(f'Перенесено постов: {archived}')
+        for name in before:
+            self.stdout.write(f'{name}: {before[name]} -> {after[name]}')
+
+    def archive(self, source, cutoff):
+        archive_db = router.db_for_write(ArchivedPost) or 'default'
+        posts = Post._base_manager.using(source)
+        archived = 0
+        while True:
+            # Скрытые посты ждут удаления и в архив не попадают.
+            ids = list(posts.filter(
+                pub_date__lt=cutoff, is_hidden=False
+            ).order_by(
+                'pub_date', 'id'
+            ).values_list('id', flat=True)[:self.batch_size])
+            if not ids:
+                return archived
+            # Сначала копия, потом удаление: после сбоя посты просто
+            # скопируются повторно, ignore_conflicts пропустит дубли.
+            with transaction.atomic(using=archive_db):
+                ArchivedPost.objects.using(archive_db).bulk_create(
+                    [
+                        ArchivedPost(**row)
+                        for row in posts.filter(id__in=ids).values(
+                            *POST_FIELDS
+                        )
+                    ],
+                    ignore_conflicts=True,
+                )
+                self.copy_comments(source, archive_db, ids)
+            with transaction.atomic(using=source):
+                Comment._base_manager.using(source).filter(
+                    post_id__in=ids
+                ).delete()
+                posts.filter(id__in=ids).delete()
+            archived += len(ids)
+
+    def copy_comments(self, source, archive_db, post_ids):
+        comments = Comment._base_manager.using(source).filter(
+            post_id__in=post_ids
+        ).order_by('id').values(*COMMENT_FIELDS)
+        last_id = 0
+        while True:
+            batch = list(comments.filter(id__gt=last_id)[:self.batch_size])
+            if not batch:
+                return
+            last_id = batch[-1]['id']
+            ArchivedComment.objects.using(archive_db).bulk_create(
+                [ArchivedComment(**row) for row in batch],
+                ignore_conflicts=True,
+            )
+
+    def report(self, sources):
+        """Размер горячих таблиц и время первой страницы главной."""
+        result = {
+            'Постов в горячей таблице': sum(
+                Post._base_manager.using(source).count()
+                for source in sources
+            ),
+            'Комментариев в горячей таблице': sum(
+                Comment._base_manager.using(source).count()
+                for source in sources
+            ),
+        }
+        table_size = sum(
+            self.table_size(source, table)
+            for source in sources
+            for table in (Post._meta.db_table, Comment._meta.db_table)
+        )
+        if table_size:
+            result['Размер горячих таблиц, КБ'] = table_size // 1024
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            page = sharding.index_posts()
+            page.count()
+            list(page[:settings.POSTS_QUANTITY])
+            timings.append(time.perf_counter() - started)
+        result['Первая страница главной, мс'] = round(
+            statistics.median(timings) * 1000, 2
+        )
+        return result
+
+    def table_size(self, source, table):
+        # dbstat есть не во всех сборках SQLite.
+        try:
+            with connections[source].cursor() as cursor:
+                cursor.execute(
+                    'SELECT SUM(pgsize) FROM dbstat WHERE name = %s', [table]
+                )
+                return cursor.fetchone()[0] or 0
+        except OperationalError:
+            return 0
@@ -0,0 +1,101 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+
+from posts import benchmarks
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет страницы постов на сгенерированных данных в отдельной '
+        'тестовой базе и сравнивает результат с сохранённой базовой '
+        'линией. Завершается ошибкой, если сценарий стал медленнее '
+        'допуска или сделал больше запросов к базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=0.2)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--scenario', action='append', choices=list(benchmarks.SCENARIOS),
+            help='Замерить только этот сценарий; можно указать несколько.',
+        )
+        parser.add_argument(
+            '--baseline', default='default',
+            help='Имя базовой линии в BENCHMARKS_DIR.',
+        )
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Сохранить результат как базовую линию.',
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени и памяти, доля.',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Не удалять тестовую базу с данными между запусками.',
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_config = setup_databases(
+            verbosity=0, interactive=False, keepdb=options['keepdb']
+        )
+        try:
+            results = self.run(options)
+        finally:
+            teardown_databases(
+                old_config, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
+        self.report(results)
+        if options['save']:
+            path = benchmarks.save(
+                options['baseline'], results,
+                scale=options['scale'], seed=options['seed'],
+                iterations=options['iterations'],
+            )
+            self.stdout.write(f'Базовая линия сохранена: {path}')
+            return
+        baseline = benchmarks.load(options['baseline'])
+        if baseline is None:
+            self.stdout.write('Базовой линии нет, сравнивать не с чем.')
+            return
+        found = benchmarks.regressions(
+            results, baseline, options['tolerance']
+        )
+        if found:
+            raise CommandError('Ухудшения:\n' + '\n'.join(found))
+        self.stdout.write(self.style.SUCCESS('Ухудшений нет.'))
+
+    def run(self, options):
+        if not User.objects.exists():
+            call_command(
+                'generate_dataset', scale=options['scale'],
+                seed=options['seed'], stdout=self.stdout,
+            )
+        # Лимиты частоты не дали бы сделать столько запросов подряд.
+        with override_settings(RATELIMITS={}):
+            return benchmarks.run(
+                options['scenario'], options['iterations'],
+                options['warmup'],
+            )
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"сценарий":<14}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"p99, мс":>10}{"запросов":>10}{"память, КиБ":>13}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14}{result["p50"]:>10.1f}{result["p95"]:>10.1f}'
+                f'{result["p99"]:>10.1f}{result["queries"]:>10}'
+                f'{result["memory_kib"]:>13.0f}'
+            )
@@ -0,0 +1,97 @@
+import statistics
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.utils import InvalidTemplateEngineError
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, User
+from posts.pagination import PostsPaginator
+
+TEMPLATES = (
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/follow.html',
+)
+
+
+def page_context(posts_count):
+    """Контекст страницы ленты из несохранённых объектов, без базы."""
+    group = Group(id=1, title='Группа', slug='group', description='Группа')
+    author = User(
+        id=1, username='author', first_name='Лев', last_name='Толстой'
+    )
+    posts = [
+        Post(
+            id=number, text='Текст поста ' * 20, author=author, group=group,
+            pub_date=timezone.now(),
+        )
+        for number in range(1, posts_count * 50 + 1)
+    ]
+    paginator = PostsPaginator(posts, posts_count)
+    page_obj = paginator.get_page(25)
+    return {
+        'page_obj': page_obj,
+        'page_range': list(paginator.get_elided_page_range(25)),
+        'paginator': paginator,
+        'group': group,
+        'author': author,
+        'following': False,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время отрисовки шаблонов лент движками Django и '
+        'Jinja2 на странице из N постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument(
+            '--template', action='append', choices=TEMPLATES,
+            help='Шаблон для замера; по умолчанию все шаблоны лент.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            jinja = engines['jinja2']
+        except InvalidTemplateEngineError:
+            raise CommandError('Движок jinja2 не настроен: установите jinja2.')
+        django_engine = engines.all()[0]
+        request = RequestFactory().get(reverse('posts:index'))
+        request.user = AnonymousUser()
+        request.resolver_match = resolve(request.path)
+        context = page_context(options['posts'])
+        self.stdout.write(
+            f'{"шаблон":<24}{"Django, мс":>12}{"Jinja2, мс":>12}'
+            f'{"ускорение":>11}'
+        )
+        for name in options['template'] or TEMPLATES:
+            times = [
+                self.measure(
+                    engine.get_template(name), context, request,
+                    options['repeat'],
+                )
+                for engine in (django_engine, jinja)
+            ]
+            self.stdout.write(
+                f'{name:<24}{times[0]:>12.2f}{times[1]:>12.2f}'
+                f'{times[0] / times[1]:>10.1f}x'
+            )
+
+    def measure(self, template, context, request, repeat):
+        """Медиана времени одной отрисовки в миллисекундах."""
+        template.render(dict(context), request)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            template.render(dict(context), request)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import sitemaps
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее записывает на диск закрытые части карты сайта, чтобы '
+        'поисковые роботы не ждали их сборки. Адреса строятся от '
+        'SITEMAP_BASE_URL.'
+    )
+
+    def handle(self, *args, **options):
+        written = sitemaps.build()
+        self.stdout.write(f'Записано частей: {written}')
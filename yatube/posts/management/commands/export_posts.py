@@ -0,0 +1,47 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает все посты автора или группы в JSONL, CSV или ZIP.'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--author', help='username автора.')
+        source.add_argument('--group', help='slug группы.')
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='jsonl'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки, по умолчанию stdout.'
+        )
+
+    def handle(self, *args, **options):
+        if options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError('Автор не найден.')
+            querysets = export.author_sources(author)
+        else:
+            try:
+                group = Group.objects.get(slug=options['group'])
+            except Group.DoesNotExist:
+                raise CommandError('Группа не найдена.')
+            querysets = export.group_sources(group)
+        if options['output']:
+            output = open(options['output'], 'wb')
+        else:
+            output = sys.stdout.buffer
+        try:
+            for part in export.export(querysets, options['format']):
+                if isinstance(part, str):
+                    part = part.encode()
+                output.write(part)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,311 @@
+import bisect
+import io
+import itertools
+import math
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, signals
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from posts import sharding
+from posts.bulk import (
+    create_indexes, drop_indexes, muted_signals, preserve_auto_dates
+)
+from posts.models import Comment, Follow, Group, Post, User
+
+# Записей на единицу --scale: при --scale 20 получается миллион постов.
+PER_SCALE = {
+    'users': 1000,
+    'groups': 10,
+    'posts': 50000,
+    'comments': 100000,
+}
+# Доля комментариев, которые достаются «вирусным» постам, и доля таких
+# постов среди всех.
+VIRAL_SHARE = 0.5
+VIRAL_RATE = 0.001
+# Показатель степенного закона активности авторов и популярности групп.
+ZIPF_EXPONENT = 1.1
+WORDS = (
+    'пост', 'день', 'город', 'книга', 'кофе', 'утро', 'друг', 'работа',
+    'дорога', 'море', 'кот', 'музыка', 'фильм', 'вечер', 'идея', 'лето',
+    'сегодня', 'вчера', 'очень', 'снова', 'новый', 'хороший', 'первый',
+    'думаю', 'вижу', 'читаю', 'пишу', 'люблю', 'и', 'в', 'на', 'про',
+)
+
+
+def zipf_weights(count, rng):
+    """Накопленные веса степенного закона для случайно переставленных id.
+
+    Самые активные пользователи и группы не совпадают с первыми id.
+    """
+    ranks = list(range(count))
+    rng.shuffle(ranks)
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** ZIPF_EXPONENT for rank in ranks
+    ))
+
+
+def heavy_tail(rng, minimum, maximum, alpha=1.5):
+    """Целое с распределением Парето, обрезанное до maximum."""
+    return min(maximum, int(minimum * rng.paretovariate(alpha)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для проверки '
+        'производительности: пользователи, группы, посты с датами, '
+        'сгущающимися к концу периода, подписки и комментарии по '
+        'степенному закону и картинки. При одинаковых --scale и --seed '
+        'на пустой базе данные получаются одинаковыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=float, default=1,
+            help='Масштаб: единица — {users} пользователей и {posts} '
+                 'постов.'.format(**PER_SCALE),
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--end', default='2024-01-01',
+            help='Дата последнего поста, ГГГГ-ММ-ДД.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=3 * 365,
+            help='За сколько дней до --end начинаются посты.',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок создать.',
+        )
+        parser.add_argument(
+            '--image-rate', type=float, default=0.05,
+            help='Доля постов с картинкой.',
+        )
+        parser.add_argument('--prefix', default='user')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if sharding.is_enabled():
+            raise CommandError(
+                'Создайте данные без шардов и перенесите их командой '
+                'reshard.'
+            )
+        if User.objects.filter(
+            username__startswith=options['prefix']
+        ).exists():
+            raise CommandError(
+                f'Пользователи с префиксом {options["prefix"]} уже есть.'
+            )
+        self.rng = random.Random(options['seed'])
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.counts = {
+            kind: max(1, round(count * options['scale']))
+            for kind, count in PER_SCALE.items()
+        }
+        self.end = timezone.make_aware(
+            datetime.strptime(options['end'], '%Y-%m-%d'), timezone.utc
+        )
+        self.start = self.end - timedelta(days=options['days'])
+        with muted_signals(
+            signals.pre_save, signals.post_save, signals.m2m_changed
+        ), preserve_auto_dates(Post, Comment):
+            self.users = self.create_users()
+            self.groups = self.create_groups()
+            self.images = self.create_images()
+            self.create_posts()
+            self.create_follows()
+            self.create_comments()
+        # Кеш страниц собран без созданных записей.
+        cache.clear()
+
+    def first_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def save(self, model, objects, indexed=True):
+        """Сохраняет записи пачками, возвращает их число."""
+        table = model._meta.db_table
+        indexes = {} if indexed else drop_indexes(table)
+        started = time.monotonic()
+        saved = 0
+        try:
+            while True:
+                batch = list(itertools.islice(objects, self.batch_size))
+                if not batch:
+                    break
+                # Размер одного INSERT Django подбирает сам: в SQLite
+                # есть предел на число строк в запросе.
+                with transaction.atomic():
+                    model.objects.bulk_create(batch)
+                saved += len(batch)
+        finally:
+            create_indexes(indexes, table)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{table}: {saved} за {elapsed:.1f} с '
+            f'({saved / elapsed if elapsed else 0:.0f} записей/с)'
+        )
+        return saved
+
+    def create_users(self):
+        first = self.first_id(User)
+        ids = range(first, first + self.counts['users'])
+        password = make_password(None)
+        prefix = self.options['prefix']
+        self.save(User, (
+            User(
+                id=user_id,
+                username=f'{prefix}{user_id - first:07d}',
+                first_name=f'Пользователь {user_id - first}',
+                password=password,
+                date_joined=self.start - timedelta(
+                    days=self.rng.randrange(365)
+                ),
+            )
+            for user_id in ids
+        ))
+        return ids
+
+    def create_groups(self):
+        first = self.first_id(Group)
+        ids = range(first, first + self.counts['groups'])
+        self.save(Group, (
+            Group(
+                id=group_id,
+                title=f'Группа {group_id - first}',
+                slug=f'{self.options["prefix"]}-group-{group_id - first}',
+                description=self.text(3)[:40],
+            )
+            for group_id in ids
+        ))
+        return ids
+
+    def create_images(self):
+        """Картинки постов; уже созданные раньше не перерисовываются."""
+        names = []
+        for number in range(self.options['images']):
+            name = f'posts/dataset-{self.options["seed"]}-{number}.jpg'
+            width = self.rng.choice((320, 640, 960, 1280))
+            height = self.rng.choice((240, 480, 720, 960))
+            background, *spots = [
+                (
+                    tuple(self.rng.randrange(256) for _ in range(3)),
+                    self.rng.randrange(width),
+                    self.rng.randrange(height),
+                )
+                for _ in range(4)
+            ]
+            names.append(name)
+            # Случайные числа уже выбраны: существующая картинка не
+            # сдвигает последовательность для постов.
+            if default_storage.exists(name):
+                continue
+            image = Image.new('RGB', (width, height), background[0])
+            draw = ImageDraw.Draw(image)
+            for color, x, y in spots:
+                draw.ellipse(
+                    (x, y, x + width // 3, y + height // 3), fill=color
+                )
+            content = io.BytesIO()
+            image.save(content, 'JPEG', quality=85)
+            default_storage.save(name, ContentFile(content.getvalue()))
+        return names
+
+    def text(self, minimum):
+        length = heavy_tail(self.rng, minimum, 300)
+        words = self.rng.choices(WORDS, k=length)
+        return ' '.join(words).capitalize() + '.'
+
+    def moment(self, fraction):
+        """Дата доли fraction постов: ближе к концу постов всё больше."""
+        return self.start + (self.end - self.start) * math.sqrt(fraction)
+
+    def create_posts(self):
+        self.first_post = first = self.first_id(Post)
+        authors = zipf_weights(len(self.users), self.rng)
+        groups = zipf_weights(len(self.groups), self.rng)
+
+        def build():
+            for number in range(self.counts['posts']):
+                pub_date = self.moment(
+                    (number + self.rng.random()) / self.counts['posts']
+                )
+                group = None
+                if self.rng.random() < 0.7:
+                    group = self.groups[self.pick(groups)]
+                image = ''
+                if self.images and (
+                    self.rng.random() < self.options['image_rate']
+                ):
+                    image = self.rng.choice(self.images)
+                yield Post(
+                    id=first + number,
+                    text=self.text(5),
+                    pub_date=pub_date,
+                    author_id=self.users[self.pick(authors)],
+                    group_id=group,
+                    image=image,
+                )
+        self.save(Post, build(), indexed=False)
+
+    def pick(self, cum_weights):
+        """Индекс по накопленным весам."""
+        return bisect.bisect(
+            cum_weights, self.rng.random() * cum_weights[-1]
+        )
+
+    def create_follows(self):
+        """Подписки: популярные авторы собирают большую часть подписчиков."""
+        popularity = zipf_weights(len(self.users), self.rng)
+
+        def build():
+            for user_id in self.users:
+                wanted = heavy_tail(self.rng, 1, len(self.users) - 1, 1.2)
+                authors = set()
+                for _ in range(wanted * 2):
+                    if len(authors) >= wanted:
+                        break
+                    authors.add(self.users[self.pick(popularity)])
+                authors.discard(user_id)
+                for author_id in sorted(authors):
+                    yield Follow(user_id=user_id, author_id=author_id)
+        self.save(Follow, build(), indexed=False)
+
+    def create_comments(self):
+        """Комментарии: половина уходит немногим «вирусным» постам."""
+        posts = self.counts['posts']
+        viral = self.rng.sample(
+            range(posts), max(1, round(posts * VIRAL_RATE))
+        )
+        viral_weights = zipf_weights(len(viral), self.rng)
+        first = self.first_id(Comment)
+
+        def build():
+            for number in range(self.counts['comments']):
+                if self.rng.random() < VIRAL_SHARE:
+                    post = viral[self.pick(viral_weights)]
+                else:
+                    post = self.rng.randrange(posts)
+                # Не раньше конца промежутка, в который попал пост.
+                created = self.moment((post + 1) / posts) + timedelta(
+                    seconds=self.rng.expovariate(1 / (6 * 60 * 60))
+                )
+                yield Comment(
+                    id=first + number,
+                    post_id=self.first_post + post,
+                    author_id=self.rng.choice(self.users),
+                    text=self.text(2),
+                    created=min(created, self.end),
+                )
+        self.save(Comment, build(), indexed=False)
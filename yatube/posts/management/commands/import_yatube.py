@@ -0,0 +1,213 @@
+import csv
+import itertools
+import json
+import os
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import signals
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import sharding
+from posts.bulk import (
+    create_indexes, drop_indexes, muted_signals, preserve_auto_dates
+)
+from posts.models import Comment, Follow, Group, Post, User
+
+# Порядок загрузки: сначала то, на что ссылаются остальные записи.
+KINDS = ('users', 'groups', 'posts', 'comments', 'follows')
+MODELS = {
+    'users': User,
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+
+
+def read_records(path):
+    """Построчно читает JSONL или CSV, не загружая файл в память."""
+    with open(path, encoding='utf-8', newline='') as file:
+        if path.endswith('.csv'):
+            yield from csv.DictReader(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Массовая загрузка пользователей, групп, постов, комментариев и '
+        'подписок из JSONL или CSV. Пользователи, группы и авторы '
+        'указываются по username и slug, посты — по id из файла постов.'
+    )
+
+    def add_arguments(self, parser):
+        for kind in KINDS:
+            parser.add_argument(f'--{kind}', help=f'Файл {kind}.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint', default='import_yatube.checkpoint.json',
+            help='Файл с прогрессом; повторный запуск продолжит загрузку.',
+        )
+
+    def handle(self, *args, **options):
+        if sharding.is_enabled():
+            raise CommandError(
+                'Загрузите данные без шардов и перенесите их командой '
+                'reshard.'
+            )
+        if not any(options[kind] for kind in KINDS):
+            raise CommandError('Не указано ни одного файла.')
+        self.batch_size = options['batch_size']
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = {'done': {}, 'indexes': {}}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as file:
+                self.checkpoint = json.load(file)
+        self.users = None
+        self.groups = None
+        self.follows = None
+        with muted_signals(
+            signals.pre_save, signals.post_save, signals.m2m_changed
+        ), preserve_auto_dates(Post, Comment):
+            for kind in KINDS:
+                if options[kind]:
+                    self.load(kind, options[kind])
+        # Кеш страниц собран без загруженных записей.
+        cache.clear()
+        os.remove(self.checkpoint_path)
+
+    def save_checkpoint(self):
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def load(self, kind, path):
+        model = MODELS[kind]
+        table = model._meta.db_table
+        done = self.checkpoint['done'].get(kind, 0)
+        # Вторичные индексы удаляются на время загрузки и создаются
+        # заново в конце; их SQL хранится в checkpoint на случай сбоя.
+        indexes = self.checkpoint['indexes'].get(table, {})
+        indexes.update(drop_indexes(table))
+        self.checkpoint['indexes'][table] = indexes
+        self.save_checkpoint()
+        build = getattr(self, f'build_{kind[:-1]}')
+        records = itertools.islice(read_records(path), done, None)
+        started = time.monotonic()
+        loaded = 0
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                break
+            objects = [build(record) for record in batch]
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [obj for obj in objects if obj is not None],
+                    batch_size=self.batch_size,
+                    ignore_conflicts=True,
+                )
+            loaded += len(batch)
+            self.checkpoint['done'][kind] = done + loaded
+            self.save_checkpoint()
+            self.stdout.write(
+                f'{kind}: {done + loaded} '
+                f'({loaded / (time.monotonic() - started):.0f} записей/с)'
+            )
+        create_indexes(indexes, table)
+        del self.checkpoint['indexes'][table]
+        self.save_checkpoint()
+        if kind == 'users':
+            self.users = None
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{kind}: загружено {loaded} за {elapsed:.1f} с '
+            f'({loaded / elapsed if elapsed else 0:.0f} записей/с)'
+        ))
+
+    def user_id(self, username):
+        if self.users is None:
+            self.users = dict(User.objects.values_list('username', 'id'))
+        try:
+            return self.users[username]
+        except KeyError:
+            raise CommandError(f'Неизвестный пользователь {username}')
+
+    def group_id(self, slug):
+        if not slug:
+            return None
+        if self.groups is None:
+            self.groups = dict(Group.objects.values_list('slug', 'id'))
+        try:
+            return self.groups[slug]
+        except KeyError:
+            raise CommandError(f'Неизвестная группа {slug}')
+
+    def build_user(self, record):
+        return User(
+            username=record['username'],
+            first_name=record.get('first_name', ''),
+            last_name=record.get('last_name', ''),
+            email=record.get('email', ''),
+            password=record.get('password') or make_password(None),
+            date_joined=parse_date(record.get('date_joined')),
+        )
+
+    def build_group(self, record):
+        return Group(
+            title=record['title'],
+            slug=record['slug'],
+            description=record.get('description', ''),
+        )
+
+    def build_post(self, record):
+        return Post(
+            id=record.get('id') or None,
+            text=record['text'],
+            pub_date=parse_date(record.get('pub_date')),
+            author_id=self.user_id(record['author']),
+            group_id=self.group_id(record.get('group')),
+            image=record.get('image', ''),
+        )
+
+    def build_comment(self, record):
+        return Comment(
+            id=record.get('id') or None,
+            post_id=record['post'],
+            author_id=self.user_id(record['author']),
+            text=record['text'],
+            created=parse_date(record.get('created')),
+        )
+
+    def build_follow(self, record):
+        user_id = self.user_id(record['user'])
+        author_id = self.user_id(record['author'])
+        if user_id == author_id:
+            return None
+        # У подписок нет уникального ключа, и ignore_conflicts не
+        # отсеет ни повторы в файле, ни пачку, загруженную ещё раз после
+        # сбоя до записи checkpoint: отсеиваем их по уже известным парам.
+        if self.follows is None:
+            self.follows = set(
+                Follow.objects.values_list('user_id', 'author_id')
+            )
+        if (user_id, author_id) in self.follows:
+            return None
+        self.follows.add((user_id, author_id))
+        return Follow(user_id=user_id, author_id=author_id)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import deletion
+
+
+class Command(BaseCommand):
+    help = 'Пачками удаляет записи объектов, поставленных в очередь удаления.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Проверять очередь каждые N секунд.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = deletion.process_pending(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Удалено объектов: {processed}')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from posts import sharding
+from posts.bulk import preserve_auto_dates
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты и комментарии из текущих POST_SHARDS (или из '
+        'основной базы) в новый набор шардов. После переноса укажите '
+        'новые алиасы в POST_SHARDS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('shards', nargs='+', help='Алиасы новых шардов.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.targets = options['shards']
+        unknown = set(self.targets) - set(connections.databases)
+        if unknown:
+            raise CommandError(f'Неизвестные базы: {", ".join(unknown)}')
+        self.sharded = sharding.is_enabled()
+        if not self.sharded and 'default' in self.targets:
+            raise CommandError('Основная база не может быть шардом.')
+        self.batch_size = options['batch_size']
+        # Посты из нешардированной базы получают новые id с ключом автора;
+        # старые id нужны, чтобы перенести комментарии.
+        self.renamed = {}
+        self.last_ids = {}
+        sources = settings.POST_SHARDS or ['default']
+        with preserve_auto_dates(Post, Comment):
+            for source in sources:
+                posts = self.copy(Post, source)
+                comments = self.copy(Comment, source)
+                self.stdout.write(
+                    f'{source}: постов {posts}, комментариев {comments}'
+                )
+        # Удаляем только после копирования: удаление поста каскадом
+        # удалило бы ещё не перенесённые комментарии.
+        for source in sources:
+            self.cleanup(Comment, source)
+            self.cleanup(Post, source)
+
+    def batches(self, model, source):
+        queryset = model._base_manager.using(source).order_by('id')
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:self.batch_size])
+            if not batch:
+                return
+            last_id = batch[-1].id
+            yield batch
+
+    def copy(self, model, source):
+        copied = 0
+        for batch in self.batches(model, source):
+            by_target = {}
+            for instance in batch:
+                target = self.relocate(instance)
+                if target != source:
+                    by_target.setdefault(target, []).append(instance)
+            for target, instances in by_target.items():
+                with transaction.atomic(using=target):
+                    model._base_manager.using(target).bulk_create(instances)
+                copied += len(instances)
+        return copied
+
+    def relocate(self, instance):
+        if isinstance(instance, Comment):
+            instance.post_id = self.renamed.get(
+                instance.post_id, instance.post_id
+            )
+        key = (
+            instance.author_id
+            if isinstance(instance, Post) and not self.sharded
+            else sharding.shard_key(instance)
+        )
+        target = sharding.shard_for_author(key, self.targets)
+        if not self.sharded:
+            new_id = self.next_id(type(instance), target, key)
+            if isinstance(instance, Post):
+                self.renamed[instance.id] = new_id
+            instance.id = new_id
+        return target
+
+    def next_id(self, model, target, key):
+        counter = (model, target, key)
+        if counter not in self.last_ids:
+            self.last_ids[counter] = sharding.next_id(model, target, key) - 1
+        self.last_ids[counter] += 1
+        return self.last_ids[counter]
+
+    def cleanup(self, model, source):
+        for batch in self.batches(model, source):
+            ids = [
+                instance.id for instance in batch
+                if not self.sharded
+                or sharding.shard_for_author(
+                    sharding.shard_key(instance), self.targets
+                ) != source
+            ]
+            with transaction.atomic(using=source):
+                model._base_manager.using(source).filter(
+                    id__in=ids
+                ).delete()
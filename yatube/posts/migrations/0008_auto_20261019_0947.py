@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_archivedcomment_archivedpost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Deletion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Пользователь'), ('group', 'Группа'), ('post', 'Пост')], max_length=10, verbose_name='Что удаляем')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+            ],
+            options={
+                'verbose_name': 'Удаление',
+                'verbose_name_plural': 'Удаления',
+                'ordering': ('created',),
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыта'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='is_hidden',
+            field=models.BooleanField(default=False, verbose_name='Скрыт'),
+        ),
+    ]
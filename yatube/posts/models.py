@@ -1,21 +1,75 @@
-from django.db import models
+from contextlib import nullcontext
+
+from django.db import IntegrityError, models, router, transaction
 from django.contrib.auth import get_user_model
 
 from django.conf import settings
 
 User = get_user_model()
 
+# Столько раз сохранение повторяется, если выданный шардом id уже занят.
+SHARDED_ID_ATTEMPTS = 5
+
+
+class RoutedManager(models.Manager):
+    """Создаёт объекты через save(), чтобы роутер выбирал базу по объекту.
+
+    Обычный create() выбирает базу до появления объекта, и при
+    шардировании пост попал бы в основную базу вместо шарда автора.
+    """
+
+    def create(self, **kwargs):
+        obj = self.model(**kwargs)
+        self._for_write = True
+        obj.save(force_insert=True, using=self._db)
+        return obj
+
+
+class ShardedModel(models.Model):
+    """Модель, которой при шардировании id выдаёт posts/sharding.py.
+
+    Id берётся как MAX(id) + 1 в диапазоне автора, и два одновременных
+    сохранения могут получить один и тот же: проигравшее получает
+    IntegrityError и сохраняется заново со следующим id.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, using=None, **kwargs):
+        if not settings.POST_SHARDS or self.pk is not None:
+            return super().save(*args, using=using, **kwargs)
+        using = using or router.db_for_write(type(self), instance=self)
+        for attempt in range(1, SHARDED_ID_ATTEMPTS + 1):
+            # Внутри транзакции ошибку изолирует точка сохранения.
+            in_atomic = transaction.get_connection(using).in_atomic_block
+            try:
+                with transaction.atomic(using) if in_atomic else nullcontext():
+                    return super().save(*args, using=using, **kwargs)
+            except IntegrityError:
+                self.pk = None
+                if attempt == SHARDED_ID_ATTEMPTS:
+                    raise
+
+
+class PostManager(RoutedManager):
+    """Посты без скрытых: скрытый пост ждёт фонового удаления."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_hidden=False)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField(max_length=40)
+    is_hidden = models.BooleanField('Скрыта', default=False)
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class Post(ShardedModel):
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -45,6 +99,9 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    is_hidden = models.BooleanField('Скрыт', default=False)
+
+    objects = PostManager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -55,7 +112,7 @@ class Post(models.Model):
         return self.text[:settings.TEXT_LEN]
 
 
-class Comment(models.Model):
+class Comment(ShardedModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -76,6 +133,8 @@ class Comment(models.Model):
         auto_now_add=True
     )
 
+    objects = RoutedManager()
+
     class Meta:
         ordering = ('created',)
 
@@ -96,3 +155,97 @@ class Follow(models.Model):
         verbose_name='Автор',
         on_delete=models.CASCADE,
     )
+
+
+class ArchivedPost(models.Model):
+    """Старый пост, перенесённый из горячей таблицы командой archive_posts.
+
+    id совпадает с id исходного поста, поэтому адрес поста не меняется.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:settings.TEXT_LEN]
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        db_constraint=False,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Текст комментария')
+    created = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('created',)
+
+    def __str__(self):
+        return self.text
+
+
+class Deletion(models.Model):
+    """Отложенное удаление пользователя, группы или поста.
+
+    Объект скрывается сразу, а связанные записи удаляет пачками задача
+    в run_workers или команда process_deletions (см. posts/deletion.py).
+    """
+    USER = 'user'
+    GROUP = 'group'
+    POST = 'post'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+        (POST, 'Пост'),
+    )
+
+    kind = models.CharField('Что удаляем', max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField('id объекта')
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    finished = models.DateTimeField('Завершено', blank=True, null=True)
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
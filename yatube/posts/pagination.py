@@ -0,0 +1,82 @@
+"""Паджинатор для больших лент постов.
+
+Точный COUNT(*) по большой ленте дорог, а ссылок на все страницы
+слишком много. Поэтому число постов ленты (scope) с не меньше чем
+POSTS_COUNT_CACHE_MIN постами хранится в кеше. После
+POSTS_COUNT_CACHE_SECONDS его пересчитывает один запрос, а остальные
+до конца пересчёта получают прежнее значение. Навигация показывает
+только первые и последние страницы и соседей текущей.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+ELLIPSIS = '…'
+
+
+def count_key(scope):
+    return f'posts:count:{scope}'
+
+
+def cached_count(scope, object_list):
+    """Число постов ленты: из кеша, а для небольших лент — точное."""
+    key = count_key(scope)
+    entry = cache.get(key)
+    if entry is not None:
+        count, fresh_until = entry
+        if fresh_until > time.time() or not cache.add(
+            f'{key}:lock', True, settings.POSTS_COUNT_CACHE_SECONDS
+        ):
+            return count
+    try:
+        count = object_list.count()
+    finally:
+        cache.delete(f'{key}:lock')
+    if count >= settings.POSTS_COUNT_CACHE_MIN:
+        # Без срока в кеше: устаревшее значение лучше нового подсчёта
+        # в каждом запросе, пока идёт пересчёт.
+        cache.set(
+            key, (count, time.time() + settings.POSTS_COUNT_CACHE_SECONDS),
+            None,
+        )
+    else:
+        cache.delete(key)
+    return count
+
+
+class PostsPaginator(Paginator):
+    ELLIPSIS = ELLIPSIS
+
+    def __init__(self, object_list, per_page, scope=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scope = scope
+
+    @cached_property
+    def count(self):
+        if self.scope is None:
+            return super().count
+        return cached_count(self.scope, self.object_list)
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц с ELLIPSIS вместо длинных пропусков."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield ELLIPSIS
+            yield from range(
+                self.num_pages - on_ends + 1, self.num_pages + 1
+            )
+        else:
+            yield from range(number + 1, self.num_pages + 1)
@@ -0,0 +1,215 @@
+"""Шардирование постов и комментариев по автору.
+
+Включается списком алиасов в POST_SHARDS. Пост хранится в шарде своего
+автора, комментарии — в шарде поста. В старших битах id поста и
+комментария записан id автора-ключа, поэтому по одному id всегда можно
+найти шард, а перешардирование не меняет адреса постов.
+
+Без шардов функции выборки возвращают обычные querysets.
+"""
+import heapq
+import itertools
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models import Max, prefetch_related_objects
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.http import Http404
+
+from .models import Comment, Follow, Post
+
+User = get_user_model()
+
+SHARD_KEY_SHIFT = 32
+SHARDED_MODELS = (Post, Comment)
+
+
+def is_enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def shard_for_author(author_id, shards=None):
+    shards = shards or settings.POST_SHARDS
+    return shards[author_id % len(shards)]
+
+
+def author_from_id(object_id):
+    return object_id >> SHARD_KEY_SHIFT
+
+
+def shard_for_post(post_id, shards=None):
+    return shard_for_author(author_from_id(post_id), shards)
+
+
+def next_id(model, using, author_id):
+    """Следующий id в диапазоне автора внутри шарда."""
+    low = author_id << SHARD_KEY_SHIFT
+    last = model._base_manager.using(using).filter(
+        id__gt=low, id__lt=(author_id + 1) << SHARD_KEY_SHIFT
+    ).aggregate(last=Max('id'))['last']
+    return (last or low) + 1
+
+
+def shard_key(instance):
+    """Id автора, по которому шардируется объект."""
+    if isinstance(instance, Post):
+        if instance.pk:
+            return author_from_id(instance.pk)
+        return instance.author_id
+    return author_from_id(instance.post_id)
+
+
+class ShardRouter:
+    """Направляет запросы к постам и комментариям в шард автора."""
+
+    def _db_for(self, model, instance):
+        if not is_enabled():
+            return None
+        if model not in SHARDED_MODELS:
+            # Авторы и группы постов из шарда лежат в основной базе.
+            if isinstance(instance, SHARDED_MODELS):
+                return 'default'
+            return None
+        if isinstance(instance, SHARDED_MODELS):
+            return shard_for_author(shard_key(instance))
+        if isinstance(instance, User):
+            return shard_for_author(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model, hints.get('instance'))
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_enabled() and (
+            isinstance(obj1, SHARDED_MODELS)
+            or isinstance(obj2, SHARDED_MODELS)
+        ):
+            return True
+        return None
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def assign_sharded_id(sender, instance, raw, using, **kwargs):
+    if is_enabled() and not raw and instance.pk is None:
+        instance.pk = next_id(sender, using, shard_key(instance))
+
+
+@receiver(connection_created)
+def disable_foreign_keys(sender, connection, **kwargs):
+    # Авторы и группы лежат в основной базе, и SQLite не может проверить
+    # ссылки на них из шарда.
+    if connection.alias in settings.POST_SHARDS:
+        connection.cursor().execute('PRAGMA foreign_keys = OFF')
+
+
+class ShardedQuerySet:
+    """Выборка из нескольких шардов, отсортированная по свежести.
+
+    Срез собирается k-путевым слиянием: из каждого шарда берутся первые
+    stop постов, и heapq.merge выдаёт нужный кусок общей ленты. Авторы и
+    группы лежат в основной базе, поэтому вместо select_related они
+    подгружаются одним запросом на страницу.
+    """
+
+    def __init__(self, querysets, related=()):
+        self.querysets = [
+            queryset.order_by('-pub_date', '-id') for queryset in querysets
+        ]
+        self.related = related
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def _merge(self, querysets):
+        return heapq.merge(
+            *querysets,
+            key=lambda post: (post.pub_date, post.id),
+            reverse=True,
+        )
+
+    def __iter__(self):
+        return self._merge(
+            queryset.iterator() for queryset in self.querysets
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            if key.stop is None:
+                return list(itertools.islice(self, start, None))
+            parts = [queryset[:key.stop] for queryset in self.querysets]
+            posts = list(itertools.islice(
+                self._merge(parts), start, key.stop
+            ))
+            prefetch_related_objects(posts, *self.related)
+            return posts
+        return self[key:key + 1][0]
+
+
+def per_shard(queryset):
+    """Список querysets: по одному на шард или один исходный."""
+    if is_enabled():
+        return [queryset.using(shard) for shard in settings.POST_SHARDS]
+    return [queryset]
+
+
+def _scatter(queryset, related=()):
+    return ShardedQuerySet(
+        (queryset.using(shard) for shard in settings.POST_SHARDS),
+        related,
+    )
+
+
+def index_posts():
+    if is_enabled():
+        return _scatter(Post.objects.all(), ('group', 'author'))
+    return Post.objects.select_related(
+        'group',
+        'author',
+    ).order_by('-pub_date')
+
+
+def group_posts(group):
+    if is_enabled():
+        return _scatter(Post.objects.filter(group=group), ('author',))
+    return group.posts.select_related('author').order_by('-pub_date')
+
+
+def author_posts(author):
+    if is_enabled():
+        return Post.objects.using(shard_for_author(author.pk)).filter(
+            author=author
+        )
+    return author.posts.all()
+
+
+def follow_posts(user):
+    if is_enabled():
+        authors = list(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+        return _scatter(
+            Post.objects.filter(author_id__in=authors), ('group', 'author')
+        )
+    return Post.objects.filter(author__following__user=user)
+
+
+def get_post_or_404(post_id):
+    posts = Post.objects
+    if is_enabled():
+        posts = posts.using(shard_for_post(post_id))
+    try:
+        return posts.get(id=post_id)
+    except Post.DoesNotExist:
+        raise Http404('Пост не найден.')
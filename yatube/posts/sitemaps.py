@@ -0,0 +1,261 @@
+"""Карта сайта, разбитая на части по диапазонам id.
+
+Раздел (посты, профили, группы) делится на части по SITEMAP_CHUNK_SIZE
+id. Id растут, поэтому часть, за которой уже есть записи, больше не
+пополняется: такая «закрытая» часть один раз пишется в SITEMAP_DIR и
+дальше отдаётся с диска. Заново собирается только последняя часть.
+С шардами id поста растут внутри диапазона автора, и последней считается
+часть, за которой нет постов того же автора.
+
+Записанная часть удаляется сигналами, когда меняется или удаляется
+объект из неё (пост скрыт, удалён или перенесён в архив, профиль
+отключён), и при следующем запросе собирается заново. Адреса строятся
+от SITEMAP_BASE_URL, а не от Host запроса.
+
+Части собираются потоковым запросом, поэтому память не растёт с
+размером раздела.
+"""
+import os
+from abc import ABC, abstractmethod
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
+
+from . import sharding
+from .models import Group, Post, User
+
+CONTENT_TYPE = 'application/xml'
+URLSET_START = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_END = '</urlset>\n'
+
+
+class Section(ABC):
+    name = None
+    model = None
+    columns = ('id',)
+
+    def querysets(self):
+        return [self.model.objects.all()]
+
+    @abstractmethod
+    def location(self, row):
+        """Путь страницы записи row."""
+
+    def lastmod(self, row):
+        return None
+
+    def range_end(self, chunk):
+        """Граница, до которой могут появиться записи этой части."""
+        return None
+
+    def chunks(self):
+        """Номера непустых частей по возрастанию."""
+        key = chunks_key(self.name)
+        chunks = cache.get(key)
+        if chunks is None:
+            size = settings.SITEMAP_CHUNK_SIZE
+            chunks = set()
+            for queryset in self.querysets():
+                chunks.update(queryset.annotate(
+                    chunk=F('id') / size
+                ).order_by().values_list('chunk', flat=True).distinct())
+            chunks = sorted(chunks)
+            cache.set(key, chunks, settings.SITEMAP_CHUNKS_CACHE_SECONDS)
+        return chunks
+
+    def bounds(self, chunk):
+        size = settings.SITEMAP_CHUNK_SIZE
+        return chunk * size, (chunk + 1) * size
+
+    def is_sealed(self, chunk):
+        """Есть ли записи после части в пределах её диапазона."""
+        end = self.range_end(chunk)
+        return any(
+            queryset.filter(id__gte=self.bounds(chunk)[1]).filter(
+                **({'id__lt': end} if end is not None else {})
+            ).exists()
+            for queryset in self.querysets()
+        )
+
+    def rows(self, chunk):
+        start, stop = self.bounds(chunk)
+        for queryset in self.querysets():
+            yield from queryset.filter(
+                id__gte=start, id__lt=stop
+            ).order_by('id').values(*self.columns).iterator(chunk_size=2000)
+
+
+class PostSection(Section):
+    name = 'posts'
+    model = Post
+    columns = ('id', 'pub_date')
+
+    def querysets(self):
+        return sharding.per_shard(Post.objects.all())
+
+    def location(self, row):
+        return reverse('posts:post_detail', kwargs={'post_id': row['id']})
+
+    def lastmod(self, row):
+        return row['pub_date']
+
+    def range_end(self, chunk):
+        if not sharding.is_enabled():
+            return None
+        author_id = sharding.author_from_id(self.bounds(chunk)[0])
+        return (author_id + 1) << sharding.SHARD_KEY_SHIFT
+
+
+class ProfileSection(Section):
+    name = 'profiles'
+    model = User
+    columns = ('id', 'username')
+
+    def querysets(self):
+        return [User.objects.filter(is_active=True)]
+
+    def location(self, row):
+        return reverse('posts:profile', kwargs={'username': row['username']})
+
+
+class GroupSection(Section):
+    name = 'groups'
+    model = Group
+    columns = ('id', 'slug')
+
+    def querysets(self):
+        return [Group.objects.filter(is_hidden=False)]
+
+    def location(self, row):
+        return reverse('posts:group_list', kwargs={'slug': row['slug']})
+
+
+SECTIONS = {
+    section.name: section
+    for section in (PostSection(), ProfileSection(), GroupSection())
+}
+
+
+def chunks_key(name):
+    return f'sitemaps:chunks:{name}'
+
+
+def chunk_path(name, chunk):
+    return os.path.join(settings.SITEMAP_DIR, f'{name}-{chunk}.xml')
+
+
+def forget(name, object_ids):
+    """Удаляет записанные части раздела с объектами object_ids."""
+    size = settings.SITEMAP_CHUNK_SIZE
+    for chunk in {object_id // size for object_id in object_ids}:
+        try:
+            os.remove(chunk_path(name, chunk))
+        except FileNotFoundError:
+            pass
+    cache.delete(chunks_key(name))
+
+
+@receiver([post_save, post_delete], sender=Post)
+def forget_post(sender, instance, **kwargs):
+    forget('posts', [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_profile(sender, instance, update_fields=None, **kwargs):
+    # Вход пользователя сохраняет только last_login.
+    if update_fields and not {'is_active', 'username'} & set(update_fields):
+        return
+    forget('profiles', [instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Group)
+def forget_group(sender, instance, **kwargs):
+    forget('groups', [instance.pk])
+
+
+def base_url():
+    return settings.SITEMAP_BASE_URL.rstrip('/')
+
+
+def render_chunk(section, chunk):
+    """Генератор частей XML одной части карты."""
+    yield URLSET_START
+    for row in section.rows(chunk):
+        lastmod = section.lastmod(row)
+        yield '<url><loc>{}</loc>{}</url>\n'.format(
+            escape(base_url() + section.location(row)),
+            f'<lastmod>{lastmod.date().isoformat()}</lastmod>'
+            if lastmod else '',
+        )
+    yield URLSET_END
+
+
+def write_chunk(name, chunk):
+    """Пишет закрытую часть на диск через временный файл."""
+    os.makedirs(settings.SITEMAP_DIR, exist_ok=True)
+    path = chunk_path(name, chunk)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        for data in render_chunk(SECTIONS[name], chunk):
+            file.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def build():
+    """Записывает на диск все ещё не записанные закрытые части."""
+    written = 0
+    for name, section in SECTIONS.items():
+        for chunk in section.chunks():
+            if os.path.exists(chunk_path(name, chunk)):
+                continue
+            if section.is_sealed(chunk):
+                write_chunk(name, chunk)
+                written += 1
+    return written
+
+
+def sitemap_index(request):
+    root = base_url()
+
+    def generate():
+        yield (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex '
+            'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for name, section in SECTIONS.items():
+            for chunk in section.chunks():
+                location = reverse(
+                    'posts:sitemap_chunk',
+                    kwargs={'section': name, 'chunk': chunk},
+                )
+                yield (
+                    f'<sitemap><loc>{escape(root + location)}</loc>'
+                    '</sitemap>\n'
+                )
+        yield '</sitemapindex>\n'
+    return StreamingHttpResponse(generate(), content_type=CONTENT_TYPE)
+
+
+def sitemap_chunk(request, section, chunk):
+    if section not in SECTIONS or chunk not in SECTIONS[section].chunks():
+        raise Http404
+    path = chunk_path(section, chunk)
+    if not os.path.exists(path):
+        if not SECTIONS[section].is_sealed(chunk):
+            return StreamingHttpResponse(
+                render_chunk(SECTIONS[section], chunk),
+                content_type=CONTENT_TYPE,
+            )
+        write_chunk(section, chunk)
+    return FileResponse(open(path, 'rb'), content_type=CONTENT_TYPE)
@@ -0,0 +1,53 @@
+"""Потоковая отрисовка длинных страниц (POSTS_STREAMING = True).
+
+Страница отрисовывается без списка: вместо него шаблон выводит метку
+stream. Всё до метки — head, шапка и начало страницы — уходит клиенту
+сразу, браузер начинает грузить стили. Затем по одному отрисовываются
+элементы списка, а после них — остаток страницы после метки.
+
+Заголовки ответа уходят до отрисовки списка, поэтому всё, что их
+меняет, делается заранее: CSRF-токен создаётся, а сессия читается до
+возврата ответа, чтобы CsrfViewMiddleware поставил cookie, а
+SessionMiddleware — Vary: Cookie. Элементы списка отрисовываются без
+контекст-процессоров: им доступны контекст страницы, user и request.
+"""
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+MARKER = mark_safe('<!-- stream -->')
+
+
+def render_stream(request, template_name, context, items, item_template,
+                  item_name='post', separator='', using=None):
+    """Ответ, в котором items отрисовываются по одному шаблоном
+    item_template на месте метки stream шаблона template_name."""
+    get_token(request)
+    # Обращение к user читает сессию.
+    request.user.is_authenticated
+    if isinstance(items, QuerySet):
+        # Выбор реплики ReplicaMiddleware действует только до возврата
+        # ответа: закрепляем базу, пока список ещё не прочитан.
+        items = items.using(items.db)
+    page = get_template(template_name, using=using).render(
+        dict(context, stream=MARKER), request
+    )
+    if MARKER not in page:
+        return HttpResponse(page)
+    head, tail = page.split(MARKER, 1)
+    item_context = dict(context, request=request, user=request.user)
+    return StreamingHttpResponse(_chunks(
+        head, tail, items, get_template(item_template, using=using),
+        item_context, item_name, separator,
+    ))
+
+
+def _chunks(head, tail, items, template, context, item_name, separator):
+    yield head
+    for number, item in enumerate(items):
+        if number and separator:
+            yield separator
+        yield template.render(dict(context, **{item_name: item}))
+    yield tail
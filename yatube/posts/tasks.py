@@ -0,0 +1,31 @@
+"""Задачи постов для очереди core.jobs."""
+from django.http import Http404
+from sorl.thumbnail import get_thumbnail
+
+from . import deletion, sharding
+from .models import Deletion
+
+# Миниатюры, которые показывают шаблоны ленты и поста.
+THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+
+def warm_thumbnails(post_id):
+    """Заранее строит миниатюры картинки, чтобы первый показ не ждал."""
+    try:
+        post = sharding.get_post_or_404(post_id)
+    except Http404:
+        return
+    if not post.image:
+        return
+    for geometry, options in THUMBNAILS:
+        get_thumbnail(post.image, geometry, **options)
+
+
+def process_deletion(deletion_id):
+    item = Deletion.objects.filter(
+        id=deletion_id, finished__isnull=True
+    ).first()
+    if item is not None:
+        deletion.process(item)
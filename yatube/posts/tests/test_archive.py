@@ -0,0 +1,80 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import ArchivedPost, Comment, Group, Post, User
+
+
+@override_settings(POSTS_QUANTITY=2)
+class ArchiveTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.old_posts = [
+            Post.objects.create(
+                text=f'Старый пост {number}',
+                author=cls.author,
+                group=cls.group,
+            )
+            for number in range(3)
+        ]
+        cls.new_post = Post.objects.create(
+            text='Новый пост', author=cls.author
+        )
+        Comment.objects.create(
+            post=cls.old_posts[0], author=cls.author, text='Комментарий'
+        )
+        for days, post in enumerate(cls.old_posts, start=400):
+            Post.objects.filter(id=post.id).update(
+                pub_date=timezone.now() - timedelta(days=days)
+            )
+        call_command('archive_posts', days=365, stdout=io.StringIO())
+
+    def test_old_posts_moved_to_archive(self):
+        """Старые посты и комментарии уходят из горячих таблиц."""
+        self.assertEqual(
+            list(Post.objects.values_list('id', flat=True)),
+            [self.new_post.id],
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('id', flat=True)),
+            {post.id for post in self.old_posts},
+        )
+
+    def test_post_detail_shows_archived_post(self):
+        """Архивный пост открывается по старому адресу с комментариями."""
+        post = self.old_posts[0]
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Комментарий'],
+        )
+
+    def test_profile_continues_into_archive(self):
+        """Глубокие страницы профиля продолжаются архивными постами."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        pages = [
+            [post.text for post in self.client.get(
+                url, {'page': number}
+            ).context['page_obj']]
+            for number in (1, 2)
+        ]
+        self.assertEqual(pages, [
+            ['Новый пост', 'Старый пост 0'],
+            ['Старый пост 1', 'Старый пост 2'],
+        ])
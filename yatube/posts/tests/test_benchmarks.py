@@ -0,0 +1,63 @@
+import io
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import benchmarks
+
+TEMP_BENCHMARKS_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(BENCHMARKS_DIR=TEMP_BENCHMARKS_DIR, RATELIMITS={})
+class BenchmarksTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'generate_dataset', scale=0.01, images=0, stdout=io.StringIO()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_BENCHMARKS_DIR, ignore_errors=True)
+
+    def test_run_and_baseline(self):
+        """Сценарии замеряются, результат сохраняется базовой линией."""
+        results = benchmarks.run(
+            ['post_detail', 'add_comment'], iterations=3, warmup=0
+        )
+        self.assertEqual(set(results), {'post_detail', 'add_comment'})
+        for result in results.values():
+            self.assertLessEqual(result['p50'], result['p95'])
+            self.assertLessEqual(result['p95'], result['p99'])
+            self.assertGreater(result['queries'], 0)
+            self.assertGreater(result['memory_kib'], 0)
+        benchmarks.save('test', results, scale=0.01)
+        baseline = benchmarks.load('test')
+        self.assertEqual(baseline['results'], results)
+        self.assertEqual(baseline['meta']['scale'], 0.01)
+        self.assertIsNone(benchmarks.load('missing'))
+
+    def test_regressions(self):
+        """Ухудшение времени сверх допуска и рост запросов — регрессии."""
+        before = {
+            'p50': 10, 'p95': 20, 'p99': 30, 'queries': 5, 'memory_kib': 100,
+        }
+        baseline = {'results': {'index': before}}
+        self.assertEqual(benchmarks.regressions(
+            {'index': dict(before, p95=23, p99=90)}, baseline, 0.2
+        ), [])
+        self.assertEqual(benchmarks.regressions(
+            {'index': dict(before, p50=13, queries=6)}, baseline, 0.2
+        ), ['index: p50 13.0 > 10.0', 'index: queries 6 > 5'])
+
+    def test_percentile(self):
+        """Перцентиль считается по ближайшему рангу."""
+        values = list(range(1, 101))
+        self.assertEqual(benchmarks.percentile(values, 50), 50)
+        self.assertEqual(benchmarks.percentile(values, 99), 99)
+        self.assertEqual(benchmarks.percentile([7], 95), 7)
@@ -0,0 +1,79 @@
+import io
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.test import TestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class GenerateDatasetTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def generate(self, seed=1):
+        call_command(
+            'generate_dataset', scale=0.02, seed=seed, images=2,
+            image_rate=0.5, stdout=io.StringIO(),
+        )
+
+    def fingerprint(self):
+        return (
+            list(Post.objects.order_by('id').values_list(
+                'text', 'pub_date', 'author__username', 'group__slug', 'image'
+            )),
+            list(Comment.objects.order_by('id').values_list(
+                'post__text', 'author__username', 'created'
+            )),
+            sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+        )
+
+    def test_counts_and_shape(self):
+        """Данные нужного объёма с перекосами, как в жизни."""
+        self.generate()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 1000)
+        self.assertEqual(Comment.objects.count(), 2000)
+        self.assertFalse(Follow.objects.filter(user=F('author')).exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        dates = list(Post.objects.order_by('id').values_list(
+            'pub_date', flat=True
+        ))
+        self.assertEqual(dates, sorted(dates))
+        self.assertLessEqual(
+            dates[-1], datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+        # Во второй половине периода постов заметно больше, чем в первой.
+        middle = dates[0] + (dates[-1] - dates[0]) / 2
+        recent = sum(date >= middle for date in dates)
+        self.assertGreater(recent, 2 * (len(dates) - recent))
+        # Вирусный пост собирает больше комментариев, чем сотни обычных.
+        top = Comment.objects.values('post').annotate(
+            count=Count('id')
+        ).order_by('-count')[0]['count']
+        self.assertGreater(top, 500)
+
+    def test_deterministic(self):
+        """При одном seed данные совпадают, при другом — нет."""
+        self.generate()
+        first = self.fingerprint()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.generate()
+        self.assertEqual(self.fingerprint(), first)
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.generate(seed=2)
+        self.assertNotEqual(self.fingerprint(), first)
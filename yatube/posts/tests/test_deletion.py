@@ -0,0 +1,148 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from api.views import post_cache_key
+from posts import deletion
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Deletion, Follow, Group, Post,
+    User
+)
+
+
+class DeletionTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        for post in cls.posts:
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий'
+            )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Ответ'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_hidden_then_deleted(self):
+        """Пост сразу пропадает со страниц, а потом удаляется."""
+        post = self.posts[0]
+        deletion.schedule(post)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(post, response.context['page_obj'])
+        self.assertEqual(deletion.process_pending(batch_size=1), 1)
+        self.assertFalse(Post._base_manager.filter(id=post.id).exists())
+        self.assertFalse(Comment.objects.filter(post_id=post.id).exists())
+        self.assertIsNotNone(Deletion.objects.get().finished)
+
+    def test_group_hidden_then_deleted(self):
+        """Группа скрывается, посты остаются без группы."""
+        deletion.schedule(self.group)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(response.status_code, 404)
+        deletion.process_pending(batch_size=2)
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(
+            Post.objects.filter(group__isnull=True).count(), len(self.posts)
+        )
+
+    def test_user_hidden_then_deleted_in_batches(self):
+        """Автор скрывается сразу, его записи удаляются пачками."""
+        deletion.schedule(self.author)
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': self.author})
+        )
+        self.assertEqual(response.status_code, 404)
+        deletion.process_pending(batch_size=2)
+        self.assertFalse(User.objects.filter(username='auth').exists())
+        self.assertFalse(Post._base_manager.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertTrue(User.objects.filter(username='reader').exists())
+
+    def test_user_posts_hidden_right_away(self):
+        """Посты автора пропадают из лент и кешей до фоновой задачи."""
+        feed = reverse('posts:index_feed', kwargs={'fmt': 'rss'})
+        self.assertContains(self.client.get(feed), 'Пост 4')
+        cache.set(post_cache_key(self.posts[0].id), {'id': 1})
+        deletion.schedule(self.author)
+        self.assertFalse(Post.objects.exists())
+        self.assertNotContains(self.client.get(feed), 'Пост 4')
+        self.assertIsNone(cache.get(post_cache_key(self.posts[0].id)))
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_archived_rows_deleted(self):
+        """Архивные посты автора скрываются сразу и удаляются задачей."""
+        archived = ArchivedPost.objects.create(
+            id=10 ** 6, text='Архивный пост', author=self.author,
+            pub_date=timezone.now(),
+        )
+        ArchivedComment.objects.create(
+            id=10 ** 6, post=archived, author=self.reader,
+            text='Комментарий', created=timezone.now(),
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': archived.id})
+        self.assertEqual(self.client.get(url).status_code, 200)
+        deletion.schedule(self.author)
+        self.assertEqual(self.client.get(url).status_code, 404)
+        deletion.process_pending(batch_size=2)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(ArchivedComment.objects.exists())
+
+    def test_hidden_posts_not_archived(self):
+        """Скрытые посты не переносятся в архив."""
+        deletion.schedule(self.posts[0])
+        call_command('archive_posts', days=-1, stdout=io.StringIO())
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('id', flat=True)),
+            {post.id for post in self.posts[1:]},
+        )
+
+
+class HideUserPostsTest(TransactionTestCase):
+    @override_settings(DELETION_BATCH_SIZE=2)
+    def test_batches_committed_separately(self):
+        """Посты автора скрываются пачками, каждая — своей транзакцией."""
+        author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author) for number in range(5)
+        )
+        hidden = []
+
+        def forget(posts):
+            self.assertFalse(connection.in_atomic_block)
+            self.assertFalse(User.objects.get(id=author.id).is_active)
+            hidden.append(Post._base_manager.filter(is_hidden=True).count())
+
+        with mock.patch.object(deletion, '_forget', side_effect=forget):
+            deletion.schedule(author)
+        self.assertEqual(hidden, [2, 4, 5])
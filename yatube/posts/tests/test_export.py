@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POSTS_EXPORT_CHUNK_SIZE=2)
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        cls.posts[0].image = SimpleUploadedFile(
+            'small.gif', b'GIF89a', content_type='image/gif'
+        )
+        cls.posts[0].save()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def get(self, name, fmt, **kwargs):
+        response = self.client.get(
+            reverse(name, kwargs={'fmt': fmt, **kwargs})
+        )
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_profile_export_jsonl(self):
+        """Профиль выгружается построчно в JSONL."""
+        content = self.get(
+            'posts:profile_export', 'jsonl', username=self.author.username
+        )
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [row['id'] for row in rows], [post.id for post in self.posts]
+        )
+        self.assertEqual(rows[1]['author'], self.author.username)
+        self.assertEqual(rows[1]['group'], self.group.slug)
+
+    def test_group_export_csv(self):
+        """Группа выгружается в CSV с заголовком."""
+        content = self.get('posts:group_export', 'csv', slug=self.group.slug)
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), len(self.posts))
+        self.assertEqual(rows[0]['text'], 'Пост 0')
+
+    def test_zip_export_contains_images(self):
+        """ZIP содержит посты и их картинки."""
+        content = self.get(
+            'posts:profile_export', 'zip', username=self.author.username
+        )
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(
+                archive.namelist(), ['posts.jsonl', self.posts[0].image.name]
+            )
+            self.assertEqual(
+                archive.read(self.posts[0].image.name), b'GIF89a'
+            )
+
+    def test_unknown_format_not_found(self):
+        """Неизвестный формат отдаёт 404."""
+        response = self.client.get(reverse(
+            'posts:group_export', kwargs={'slug': self.group.slug, 'fmt': 'x'}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_access(self):
+        """Выгрузку профиля получают только автор и персонал, выгрузку
+        группы — вошедшие пользователи."""
+        profile = reverse('posts:profile_export', kwargs={
+            'username': self.author.username, 'fmt': 'csv'
+        })
+        group = reverse('posts:group_export', kwargs={
+            'slug': self.group.slug, 'fmt': 'csv'
+        })
+        self.client.logout()
+        for url in (profile, group):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertRedirects(
+                    response, f'{reverse("users:login")}?next={url}'
+                )
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(profile).status_code, 403)
+        self.assertEqual(self.client.get(group).status_code, 200)
+        self.other.is_staff = True
+        self.other.save()
+        self.assertEqual(self.client.get(profile).status_code, 200)
+
+    @override_settings(RATELIMITS={'posts:group_export': (1, 3600)})
+    def test_export_rate_limited(self):
+        """Выгрузка ограничена лимитом запросов."""
+        url = reverse('posts:group_export', kwargs={
+            'slug': self.group.slug, 'fmt': 'csv'
+        })
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(url).status_code, 429)
@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class FeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_urls(self):
+        for fmt in ('rss', 'atom'):
+            yield reverse('posts:index_feed', kwargs={'fmt': fmt})
+            yield reverse(
+                'posts:group_feed',
+                kwargs={'slug': self.group.slug, 'fmt': fmt},
+            )
+            yield reverse(
+                'posts:profile_feed',
+                kwargs={'username': self.author.username, 'fmt': fmt},
+            )
+
+    def test_feeds_contain_posts(self):
+        """Ленты отдают посты своей области."""
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, self.post.text)
+
+    def test_cached_feed_skips_database(self):
+        """Повторный запрос ленты не обращается к базе."""
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(0):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_conditional_get(self):
+        """Запрос с ETag или датой изменения получает 304."""
+        url = reverse('posts:index_feed', kwargs={'fmt': 'rss'})
+        response = self.client.get(url)
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(
+                    self.client.get(url, **headers).status_code,
+                    HTTPStatus.NOT_MODIFIED,
+                )
+
+    def test_new_post_resets_cache(self):
+        """Новый пост сбрасывает кеш лент главной, группы и автора."""
+        for url in self.feed_urls():
+            self.client.get(url)
+        Post.objects.create(
+            text='Свежий пост', author=self.author, group=self.group
+        )
+        for url in self.feed_urls():
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_moved_post_leaves_old_group_feed(self):
+        """Пост, перенесённый в другую группу, пропадает из ленты прежней."""
+        url = reverse(
+            'posts:group_feed', kwargs={'slug': self.group.slug, 'fmt': 'rss'}
+        )
+        self.assertContains(self.client.get(url), self.post.text)
+        post = Post.objects.get(id=self.post.id)
+        post.group = Group.objects.create(title='Другая', slug='other')
+        post.save()
+        self.assertNotContains(self.client.get(url), post.text)
+
+    def test_deactivated_author_feed(self):
+        """Лента отключённого автора не отдаётся из кеша."""
+        url = reverse(
+            'posts:profile_feed',
+            kwargs={'username': self.author.username, 'fmt': 'rss'},
+        )
+        self.client.get(url)
+        author = User.objects.get(id=self.author.id)
+        author.is_active = False
+        author.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_group_feed_queries(self):
+        """Число запросов ленты группы не растёт с числом постов."""
+        url = reverse(
+            'posts:group_feed', kwargs={'slug': self.group.slug, 'fmt': 'rss'}
+        )
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=User.objects.create_user(username=f'user{number}'),
+                group=self.group,
+            )
+        cache.clear()
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_unknown_format(self):
+        """Неизвестный формат ленты — 404."""
+        response = self.client.get(
+            reverse('posts:index_feed', kwargs={'fmt': 'json'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
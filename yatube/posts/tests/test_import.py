@@ -0,0 +1,112 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.bulk import table_indexes
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ImportYatubeTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def write_jsonl(self, name, records):
+        return self.write(
+            name, '\n'.join(json.dumps(record) for record in records)
+        )
+
+    def run_import(self, **files):
+        call_command(
+            'import_yatube',
+            batch_size=2,
+            checkpoint=self.checkpoint,
+            stdout=io.StringIO(),
+            **files,
+        )
+
+    def test_import_all_kinds(self):
+        """Загружаются все виды записей, даты берутся из файла."""
+        indexes = table_indexes(Post._meta.db_table)
+        self.run_import(
+            users=self.write(
+                'users.csv', 'username,first_name\nleo,Лев\nanna,Анна\n'
+            ),
+            groups=self.write_jsonl('groups.jsonl', [
+                {'title': 'Группа', 'slug': 'group'},
+            ]),
+            posts=self.write_jsonl('posts.jsonl', [
+                {
+                    'id': 10 + number,
+                    'text': f'Пост {number}',
+                    'author': 'leo',
+                    'group': 'group' if number else '',
+                    'pub_date': f'2020-01-0{number + 1}T10:00:00',
+                }
+                for number in range(3)
+            ]),
+            comments=self.write_jsonl('comments.jsonl', [
+                {'post': 12, 'author': 'anna', 'text': 'Комментарий'},
+            ]),
+            follows=self.write_jsonl('follows.jsonl', [
+                {'user': 'anna', 'author': 'leo'},
+            ]),
+        )
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.get().slug, 'group')
+        post = Post.objects.get(id=12)
+        self.assertEqual(post.author.username, 'leo')
+        self.assertEqual(post.group.slug, 'group')
+        self.assertEqual(
+            post.pub_date.isoformat(), '2020-01-03T10:00:00+00:00'
+        )
+        self.assertEqual(Comment.objects.get().post, post)
+        self.assertTrue(
+            Follow.objects.filter(user__username='anna').exists()
+        )
+        self.assertEqual(table_indexes(Post._meta.db_table), indexes)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_import_resumes_from_checkpoint(self):
+        """Повторный запуск пропускает уже загруженные записи."""
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'done': {'users': 1}, 'indexes': {}}, file)
+        self.run_import(users=self.write_jsonl('users.jsonl', [
+            {'username': 'leo'}, {'username': 'anna'},
+        ]))
+        self.assertEqual(
+            list(User.objects.values_list('username', flat=True)), ['anna']
+        )
+
+    def test_follows_not_duplicated(self):
+        """Повторы подписок в файле и после сбоя не дублируются."""
+        leo = User.objects.create_user(username='leo')
+        anna = User.objects.create_user(username='anna')
+        User.objects.create_user(username='ivan')
+        Follow.objects.create(user=anna, author=leo)
+        # Пачка уже загружена, но checkpoint записан до неё.
+        with open(self.checkpoint, 'w') as file:
+            json.dump({'done': {'follows': 0}, 'indexes': {}}, file)
+        self.run_import(follows=self.write_jsonl('follows.jsonl', [
+            {'user': 'anna', 'author': 'leo'},
+            {'user': 'ivan', 'author': 'leo'},
+            {'user': 'ivan', 'author': 'leo'},
+        ]))
+        self.assertEqual(
+            sorted(Follow.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            [('anna', 'leo'), ('ivan', 'leo')],
+        )
@@ -0,0 +1,72 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post, User
+
+
+@skipUnless(
+    any(engine.name == 'jinja2' for engine in engines.all()),
+    'jinja2 не установлен',
+)
+@override_settings(POSTS_TEMPLATE_ENGINE='jinja2', POSTS_QUANTITY=2)
+class JinjaTemplatesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(5)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отрисовываются шаблонами Jinja2."""
+        pages = {
+            reverse('posts:index'): 'Все авторы',
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}):
+                'Описание',
+            reverse('posts:profile', kwargs={'username': 'auth'}):
+                'Всего постов: 5',
+            reverse('posts:follow_index'): 'Избранные авторы',
+        }
+        for url, text in pages.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.templates, [], 'Отрисовано движком Django'
+                )
+                self.assertContains(response, text)
+                self.assertContains(response, 'Пост 4')
+                self.assertContains(response, '?page=3')
+                self.assertContains(response, 'Пользователь: reader')
+                self.assertContains(response, 'Copyright')
+                self.assertContains(
+                    response, reverse('posts:post_detail', kwargs={
+                        'post_id': Post.objects.first().id
+                    })
+                )
+
+    def test_benchmark(self):
+        """Замер отрисовки сравнивает оба движка."""
+        out = StringIO()
+        call_command(
+            'benchmark_templates', repeat=2, template=['posts/index.html'],
+            stdout=out,
+        )
+        self.assertIn('posts/index.html', out.getvalue())
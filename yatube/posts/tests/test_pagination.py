@@ -0,0 +1,75 @@
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+from posts.pagination import (
+    ELLIPSIS, PostsPaginator, cached_count, count_key
+)
+
+
+class ElidedPageRangeTest(TestCase):
+    def page_range(self, number, pages=50):
+        paginator = PostsPaginator(range(pages), 1)
+        return list(paginator.get_elided_page_range(number))
+
+    def test_window(self):
+        """Показываются края и соседи текущей страницы."""
+        self.assertEqual(
+            self.page_range(25),
+            [1, ELLIPSIS, 23, 24, 25, 26, 27, ELLIPSIS, 50],
+        )
+        self.assertEqual(self.page_range(1), [1, 2, 3, ELLIPSIS, 50])
+        self.assertEqual(self.page_range(50), [1, ELLIPSIS, 48, 49, 50])
+        self.assertEqual(self.page_range(3, pages=5), [1, 2, 3, 4, 5])
+
+
+@override_settings(POSTS_COUNT_CACHE_MIN=3)
+class CachedCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author)
+            for number in range(4)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_large_scope_cached(self):
+        """Число постов большой ленты берётся из кеша."""
+        self.assertEqual(cached_count('index', Post.objects.all()), 4)
+        Post.objects.create(text='Новый пост', author=self.author)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count('index', Post.objects.all()), 4)
+
+    def test_stale_count_recounted_once(self):
+        """Устаревшее число пересчитывает запрос, взявший блокировку."""
+        cache.set(count_key('index'), (2, time.time() - 1), None)
+        cache.set(f'{count_key("index")}:lock', True)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached_count('index', Post.objects.all()), 2)
+        cache.delete(f'{count_key("index")}:lock')
+        self.assertEqual(cached_count('index', Post.objects.all()), 4)
+        self.assertEqual(cache.get(count_key('index'))[0], 4)
+
+    def test_small_scope_exact(self):
+        """Небольшая лента считается точно и не кешируется."""
+        posts = Post.objects.filter(text='Пост 0')
+        self.assertEqual(cached_count('small', posts), 1)
+        self.assertIsNone(cache.get(count_key('small')))
+
+    @override_settings(POSTS_QUANTITY=1)
+    def test_index_navigation(self):
+        """Навигация ленты не перечисляет все страницы."""
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author) for _ in range(20)
+        )
+        response = self.client.get(reverse('posts:index'), {'page': 12})
+        self.assertEqual(response.context['page_obj'].number, 12)
+        self.assertContains(response, ELLIPSIS, count=2)
+        self.assertContains(response, '?page=24')
+        self.assertNotContains(response, '?page=5"')
@@ -0,0 +1,212 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import sharding
+from posts.models import Comment, Follow, Group, Post, User
+
+SHARDS = ['test_shard_0', 'test_shard_1']
+
+
+def add_shards(directory):
+    """Подключает тестовые базы шардов в файлах каталога directory."""
+    for alias in SHARDS:
+        path = os.path.join(directory, f'{alias}.sqlite3')
+        connections.databases[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': path,
+            'TEST': {'NAME': path},
+        }
+        connections.ensure_defaults(alias)
+        connections.prepare_test_settings(alias)
+        connections[alias].creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+
+
+def remove_shards(directory):
+    for alias in SHARDS:
+        if alias in connections.databases:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@override_settings(POST_SHARDS=SHARDS)
+class ShardingTest(TestCase):
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        # Шарды подключаются только на время этого класса, чтобы не
+        # попасть в настройки остальных тестов.
+        cls.shards_dir = tempfile.mkdtemp()
+        try:
+            add_shards(cls.shards_dir)
+            super().setUpClass()
+        except Exception:
+            remove_shards(cls.shards_dir)
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            remove_shards(cls.shards_dir)
+
+    def _should_check_constraints(self, connection):
+        # Ссылки из шардов на авторов и группы в основной базе
+        # не проверяются на уровне SQLite.
+        return (
+            connection.alias not in SHARDS
+            and super()._should_check_constraints(connection)
+        )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(2)
+        ]
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.reader, author=cls.authors[1])
+
+    def setUp(self):
+        self.posts = [
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=self.authors[number % 2],
+                group=self.group,
+            )
+            for number in range(6)
+        ]
+        self.client = Client()
+        self.client.force_login(self.reader)
+        cache.clear()
+
+    def test_posts_are_stored_in_author_shard(self):
+        """Пост лежит в шарде автора, id указывает на этот шард."""
+        for post in self.posts:
+            with self.subTest(post=post.text):
+                shard = sharding.shard_for_author(post.author_id)
+                self.assertEqual(post._state.db, shard)
+                self.assertEqual(sharding.shard_for_post(post.id), shard)
+                self.assertTrue(
+                    Post.objects.using(shard).filter(id=post.id).exists()
+                )
+        self.assertFalse(Post.objects.using('default').exists())
+
+    def test_comment_is_stored_with_post(self):
+        """Комментарий сохраняется в шард поста."""
+        post = self.posts[1]
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            {'text': 'Комментарий'},
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+        )
+        comment = Comment.objects.using(post._state.db).get()
+        self.assertEqual(comment.post_id, post.id)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertEqual(list(response.context['comments']), [comment])
+
+    def test_taken_id_retried(self):
+        """Комментарий, чей id успели занять, сохраняется со следующим."""
+        post = self.posts[1]
+        taken = Comment.objects.create(
+            post=post, author=self.reader, text='Первый'
+        )
+        free = sharding.next_id(
+            Comment, post._state.db, sharding.shard_key(taken)
+        )
+        with mock.patch.object(
+            sharding, 'next_id', side_effect=[taken.id, free]
+        ):
+            response = self.client.post(
+                reverse('posts:add_comment', kwargs={'post_id': post.id}),
+                {'text': 'Второй'},
+            )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            list(Comment.objects.using(post._state.db).values_list(
+                'text', flat=True
+            )),
+            ['Первый', 'Второй'],
+        )
+
+    def test_index_merges_shards_by_date(self):
+        """Главная страница и лента подписок сливают шарды по дате."""
+        expected = [post.id for post in reversed(self.posts)]
+        for name in ('posts:index', 'posts:follow_index'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name))
+                page = response.context['page_obj']
+                self.assertEqual([post.id for post in page], expected)
+                self.assertEqual(page.paginator.count, len(self.posts))
+
+    def test_profile_reads_single_shard(self):
+        """Профиль автора читает только его шард."""
+        author = self.authors[0]
+        other_shard = sharding.shard_for_author(self.authors[1].pk)
+        with self.assertNumQueries(0, using=other_shard):
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': author})
+            )
+        self.assertEqual(
+            [post.id for post in response.context['page_obj']],
+            [post.id for post in reversed(self.posts[::2])],
+        )
+
+    def test_reshard_keeps_post_ids(self):
+        """Перешардирование переносит посты без смены id."""
+        call_command('reshard', SHARDS[1], stdout=open(os.devnull, 'w'))
+        self.assertEqual(
+            set(
+                Post.objects.using(SHARDS[1]).values_list('id', flat=True)
+            ),
+            {post.id for post in self.posts},
+        )
+        self.assertFalse(Post.objects.using(SHARDS[0]).exists())
+
+    def test_reshard_from_default(self):
+        """Первый перенос из основной базы меняет id постов и ссылки
+        комментариев на них."""
+        with self.settings(POST_SHARDS=[]):
+            author = self.authors[1]
+            post = Post.objects.create(text='Старый пост', author=author)
+            Comment.objects.create(
+                post=post, author=self.reader, text='Комментарий'
+            )
+            call_command('reshard', *SHARDS, stdout=open(os.devnull, 'w'))
+            self.assertFalse(Post.objects.using('default').exists())
+            self.assertFalse(Comment.objects.using('default').exists())
+        shard = sharding.shard_for_author(author.pk)
+        moved = Post.objects.using(shard).get(text='Старый пост')
+        self.assertNotEqual(moved.id, post.id)
+        self.assertEqual(sharding.author_from_id(moved.id), author.pk)
+        self.assertEqual(sharding.shard_for_post(moved.id), shard)
+        comment = Comment.objects.using(shard).get()
+        self.assertEqual(comment.post_id, moved.id)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': moved.id})
+        )
+        self.assertEqual(list(response.context['comments']), [comment])
@@ -0,0 +1,156 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts import deletion
+from posts.models import Group, Post, User
+
+TEMP_SITEMAP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(
+    SITEMAP_DIR=TEMP_SITEMAP_DIR, SITEMAP_CHUNK_SIZE=2,
+    SITEMAP_BASE_URL='https://yatube.example',
+)
+class SitemapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug-group',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author)
+            for number in range(5)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_SITEMAP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        shutil.rmtree(TEMP_SITEMAP_DIR, ignore_errors=True)
+
+    def get(self, url):
+        return b''.join(self.client.get(url).streaming_content).decode()
+
+    def chunk_url(self, section, chunk):
+        return reverse(
+            'posts:sitemap_chunk', kwargs={'section': section, 'chunk': chunk}
+        )
+
+    def test_index_lists_chunks(self):
+        """Индекс перечисляет части постов, профилей и групп."""
+        content = self.get(reverse('posts:sitemap'))
+        first, last = self.posts[0].id // 2, self.posts[-1].id // 2
+        chunks = [('posts', number) for number in range(first, last + 1)]
+        chunks += [
+            ('profiles', self.author.id // 2),
+            ('groups', self.group.id // 2),
+        ]
+        for section, chunk in chunks:
+            with self.subTest(section=section, chunk=chunk):
+                self.assertIn(self.chunk_url(section, chunk), content)
+
+    def test_sealed_chunk_served_from_disk(self):
+        """Закрытая часть пишется на диск и потом отдаётся без запросов."""
+        post = self.posts[0]
+        url = self.chunk_url('posts', post.id // 2)
+        self.assertIn(
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            self.get(url),
+        )
+        with self.assertNumQueries(0):
+            self.get(url)
+
+    def test_last_chunk_regenerated(self):
+        """Последняя часть не кешируется и закрывается новыми постами."""
+        chunk = self.posts[-1].id // 2
+        path = os.path.join(TEMP_SITEMAP_DIR, f'posts-{chunk}.xml')
+        self.get(self.chunk_url('posts', chunk))
+        self.assertFalse(os.path.exists(path))
+        for number in range(2):
+            post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertIn(
+            reverse('posts:post_detail', kwargs={'post_id': post.id}),
+            self.get(self.chunk_url('posts', post.id // 2)),
+        )
+        self.get(self.chunk_url('posts', chunk))
+        self.assertTrue(os.path.exists(path))
+
+    def test_build_command(self):
+        """build_sitemaps записывает все закрытые части."""
+        call_command('build_sitemaps', stdout=StringIO())
+        self.assertEqual(
+            len(os.listdir(TEMP_SITEMAP_DIR)),
+            self.posts[-1].id // 2 - self.posts[0].id // 2,
+        )
+
+    def test_urls_use_site_address(self):
+        """Адреса строятся от SITEMAP_BASE_URL, а не от Host запроса."""
+        post = self.posts[0]
+        content = self.get(self.chunk_url('posts', post.id // 2))
+        self.assertIn(
+            'https://yatube.example' + reverse(
+                'posts:post_detail', kwargs={'post_id': post.id}
+            ),
+            content,
+        )
+        self.assertNotIn('testserver', content)
+
+    def test_unknown_chunk_not_found(self):
+        """Несуществующая часть — 404."""
+        response = self.client.get(
+            self.chunk_url('posts', self.posts[-1].id // 2 + 100)
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_index_chunks_cached(self):
+        """Список частей берётся из кеша и сбрасывается новыми записями."""
+        self.get(reverse('posts:sitemap'))
+        with self.assertNumQueries(0):
+            self.get(reverse('posts:sitemap'))
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertIn(
+            self.chunk_url('posts', post.id // 2),
+            self.get(reverse('posts:sitemap')),
+        )
+
+    def test_sealed_chunk_rebuilt(self):
+        """Скрытый пост и отключённый профиль пропадают из закрытых
+        частей."""
+        pages = [
+            (
+                self.chunk_url('posts', self.posts[0].id // 2),
+                reverse(
+                    'posts:post_detail', kwargs={'post_id': self.posts[0].id}
+                ),
+            ),
+            (
+                self.chunk_url('profiles', self.author.id // 2),
+                reverse('posts:profile', kwargs={'username': self.author}),
+            ),
+        ]
+        for url, page in pages:
+            self.assertIn(page, self.get(url))
+        deletion.schedule(self.author)
+        for url, page in pages:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                # Опустевшая часть пропадает из карты целиком.
+                if response.status_code != 404:
+                    self.assertNotIn(
+                        page.encode(), b''.join(response.streaming_content)
+                    )
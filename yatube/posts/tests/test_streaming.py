@@ -0,0 +1,168 @@
+import re
+import shutil
+import tempfile
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import memory, metrics, profiling
+from posts.models import Comment, Follow, Group, Post, User
+
+ENGINES = [None] + [
+    engine.name for engine in engines.all() if engine.name == 'jinja2'
+]
+
+
+def normalize(html):
+    html = re.sub(r'value="[^"]*"', '', html)
+    return re.sub(r'>\s+<', '><', ' '.join(html.split()))
+
+
+@override_settings(POSTS_STREAMING=True, POSTS_QUANTITY=3)
+class StreamingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='test-slug', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=cls.author, group=cls.group)
+            for number in range(5)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.reader, text=f'Комментарий {n}')
+            for n in range(3)
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def get(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_same_page(self):
+        """Потоковая страница совпадает с обычной."""
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        ]
+        for engine in ENGINES:
+            for url in urls:
+                with self.subTest(engine=engine, url=url), \
+                        self.settings(POSTS_TEMPLATE_ENGINE=engine):
+                    streamed = self.get(url)
+                    with self.settings(POSTS_STREAMING=False):
+                        cache.clear()
+                        page = self.client.get(url).content.decode()
+                    self.assertEqual(normalize(streamed), normalize(page))
+                    self.assertIn('Пост 4', streamed)
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        with self.settings(POSTS_STREAMING=False):
+            page = self.client.get(url).content.decode()
+        self.assertEqual(normalize(self.get(url)), normalize(page))
+
+    def test_head_first(self):
+        """Шапка страницы уходит до постов."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('bootstrap.min.css', chunks[0])
+        self.assertNotIn('Пост', chunks[0])
+        self.assertEqual(len(chunks), 3 + 2 + 2)
+
+    def test_csrf_and_session(self):
+        """CSRF-cookie и Vary: Cookie ставятся до отправки тела."""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        )
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertIn('Cookie', response['Vary'])
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('csrfmiddlewaretoken', content)
+        self.assertIn('Комментарий 2', content)
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.id}),
+            {'text': 'Новый комментарий'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(text='Новый комментарий'))
+
+    def test_index_cached(self):
+        """Главная не отдаётся потоком и берётся из кеша."""
+        self.client.logout()
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Пост 4')
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_metrics_include_body(self):
+        """Запросы к базе при отрисовке тела попадают в метрики."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        queries = []
+        for streaming in (True, False):
+            metrics._histograms.clear()
+            with self.settings(POSTS_STREAMING=streaming):
+                response = self.client.get(url)
+                b''.join(response)
+            histograms = metrics.snapshot()['histograms']
+            queries.append(
+                histograms['db_queries|posts:post_detail']['sum']
+            )
+        self.assertEqual(queries[0], queries[1])
+
+    @override_settings(SLOW_QUERY_SECONDS=0)
+    def test_slow_log_include_body(self):
+        """Запросы тела пишутся в журнал медленных запросов."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.id})
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            b''.join(self.client.get(url).streaming_content)
+        self.assertTrue(any(
+            'posts_comment' in record.getMessage()
+            and 'posts:post_detail' in record.getMessage()
+            for record in logs.records
+        ))
+
+    def test_profilers_include_body(self):
+        """Профили, снимки памяти и шаблоны страницы включают тело."""
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.addCleanup(tracemalloc.stop)
+        metrics._counters.clear()
+        counter = (
+            'template_calls_total|posts:post_detail|'
+            'template:posts/includes/comment.html'
+        )
+        with self.settings(
+            PROFILING_DIR=directory, MEMORY_TRACING_DIR=directory
+        ):
+            response = self.client.get(
+                reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+                HTTP_X_PROFILE=profiling.make_token(),
+                HTTP_X_MEMORY_TRACE=profiling.make_token(),
+            )
+            self.assertEqual(profiling.profiles('posts:post_detail'), [])
+            self.assertEqual(memory.records('posts:post_detail'), [])
+            b''.join(response.streaming_content)
+            self.assertEqual(
+                len(profiling.profiles('posts:post_detail')), 1
+            )
+            self.assertEqual(len(memory.records('posts:post_detail')), 1)
+        self.assertEqual(metrics.snapshot()['counters'][counter], 3)
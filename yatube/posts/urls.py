@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import feeds, sitemaps, views
 
 
 app_name = 'posts'
@@ -8,6 +8,33 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/export/<str:fmt>/',
+        views.profile_export,
+        name='profile_export'
+    ),
+    path(
+        'group/<slug:slug>/export/<str:fmt>/',
+        views.group_export,
+        name='group_export'
+    ),
+    path('feeds/<str:fmt>/', feeds.index_feed, name='index_feed'),
+    path(
+        'group/<slug:slug>/feeds/<str:fmt>/',
+        feeds.group_feed,
+        name='group_feed'
+    ),
+    path(
+        'profile/<str:username>/feeds/<str:fmt>/',
+        feeds.profile_feed,
+        name='profile_feed'
+    ),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path(
+        'sitemap-<str:section>-<int:chunk>.xml',
+        sitemaps.sitemap_chunk,
+        name='sitemap_chunk'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -1,50 +1,78 @@
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.cache import cache_page
 from django.conf import settings
 
+from core import jobs
+
+from . import archive, export, sharding, streaming, tasks
+from .pagination import PostsPaginator
 from .forms import PostForm, CommentForm
-from .models import Post, Group, Comment, Follow, User
+from .models import ArchivedPost, Group, Follow, User
 
 
-def paginator(queryset, request):
-    paginator = Paginator(queryset, settings.POSTS_QUANTITY)
+def paginator(queryset, request, scope=None):
+    paginator = PostsPaginator(queryset, settings.POSTS_QUANTITY, scope)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return {
         'paginator': paginator,
         'page_number': page_number,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'page_range': list(paginator.get_elided_page_range(
+            page_obj.number, on_each_side=settings.POSTS_PAGE_WINDOW
+        )),
     }
 
 
+def render_page(request, template_name, context, items, item_template,
+                using=None, **kwargs):
+    """render() или, при POSTS_STREAMING, потоковая отрисовка items."""
+    if settings.POSTS_STREAMING:
+        return streaming.render_stream(
+            request, template_name, context, items, item_template,
+            using=using, **kwargs
+        )
+    return render(request, template_name, context, using=using)
+
+
+def render_feed(request, template_name, context, item_template, separator):
+    return render_page(
+        request, template_name, context, context['page_obj'].object_list,
+        item_template, using=settings.POSTS_TEMPLATE_ENGINE,
+        separator=separator,
+    )
+
+
+# Главная не отдаётся потоком: потоковый ответ не попадает в cache_page.
 @cache_page(20, key_prefix='index_page')
 def index(request):
-    context = paginator(Post.objects.select_related(
-        'group',
-        'author',
-    ).order_by(
-        '-pub_date'
-    ), request
+    context = paginator(sharding.index_posts(), request, 'index')
+    context['live_updates'] = settings.POSTS_LIVE_UPDATES
+    return render(
+        request, 'posts/index.html', context,
+        using=settings.POSTS_TEMPLATE_ENGINE,
     )
-    return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    group = get_object_or_404(Group, slug=slug, is_hidden=False)
     context = {
         'group': group,
     }
-    context.update(paginator(
-        group.posts.all().order_by('-pub_date'),
-        request
-    ))
-    return render(request, 'posts/group_list.html', context)
+    context.update(
+        paginator(sharding.group_posts(group), request, f'group:{group.id}')
+    )
+    return render_feed(
+        request, 'posts/group_list.html', context,
+        'posts/includes/group_post.html', '<hr>',
+    )
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(User, username=username, is_active=True)
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=author).exists()
     template_name = 'posts/profile.html'
@@ -52,21 +80,63 @@ def profile(request, username):
         'author': author,
         'following': following,
     }
-    context.update(paginator(author.posts.all(), request))
-    return render(request, template_name, context)
+    context.update(paginator(
+        archive.author_posts(author), request, f'author:{author.id}'
+    ))
+    return render_feed(
+        request, template_name, context,
+        'posts/includes/profile_post.html', '<hr>',
+    )
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = archive.get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post=post)
+    comments = post.comments.all()
     template_name = 'posts/post_detail.html'
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'comments': comments,
+        'is_archived': isinstance(post, ArchivedPost),
     }
-    return render(request, template_name, context)
+    return render_page(
+        request, template_name, context, comments,
+        'posts/includes/comment.html', item_name='comment',
+    )
+
+
+def export_response(querysets, fmt, filename):
+    if fmt not in export.FORMATS:
+        raise Http404('Неизвестный формат выгрузки.')
+    response = StreamingHttpResponse(
+        export.export(querysets, fmt),
+        content_type=export.FORMATS[fmt],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{filename}.{fmt}"'
+    )
+    return response
+
+
+@login_required
+def profile_export(request, username, fmt):
+    author = get_object_or_404(User, username=username, is_active=True)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    return export_response(export.author_sources(author), fmt, username)
+
+
+@login_required
+def group_export(request, slug, fmt):
+    group = get_object_or_404(Group, slug=slug, is_hidden=False)
+    return export_response(export.group_sources(group), fmt, slug)
+
+
+def warm_thumbnails(post):
+    jobs.enqueue(
+        tasks.warm_thumbnails, post.id, dedup_key=f'thumbnails:{post.id}'
+    )
 
 
 @login_required
@@ -79,6 +149,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            warm_thumbnails(post)
         return redirect('posts:profile', request.user)
     template_name = 'posts/create_post.html'
     return render(request, template_name, {'form': form})
@@ -86,7 +158,7 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = sharding.get_post_or_404(post_id)
     if post.author != request.user:
         return redirect('posts:post_detail', post.id)
     if request.method == "POST":
@@ -99,6 +171,8 @@ def post_edit(request, post_id):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if 'image' in form.changed_data and post.image:
+                warm_thumbnails(post)
             return redirect('posts:post_detail', post.id)
     form = PostForm(instance=post)
     return render(request, 'posts/create_post.html', {
@@ -111,7 +185,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = sharding.get_post_or_404(post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -124,10 +198,14 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     context = paginator(
-        Post.objects.filter(author__following__user=request.user),
-        request
+        sharding.follow_posts(request.user), request,
+        f'follow:{request.user.id}',
+    )
+    context['live_updates'] = settings.POSTS_LIVE_UPDATES
+    return render_feed(
+        request, 'posts/follow.html', context,
+        'posts/includes/post_card.html', '<hr>',
     )
-    return render(request, 'posts/follow.html', context)
 
 
 @login_required
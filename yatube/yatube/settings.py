@@ -12,6 +12,11 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 
 import os
 
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -39,6 +44,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,14 +52,23 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
+    # Последним: прогрев после готовности остальных приложений
+    'core.warmup.apps.WarmupConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.TemplateProfilerMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.ProfilerMiddleware',
+    'core.middleware.MemoryTracingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -62,7 +77,8 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, который замеряет время отрисовки для метрик
+        'BACKEND': 'core.templates.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -77,6 +93,28 @@ TEMPLATES = [
         },
     },
 ]
+# Необязательный Jinja2 для горячих шаблонов лент (каталог jinja2/);
+# включается POSTS_TEMPLATE_ENGINE = 'jinja2'
+if jinja2 is not None:
+    TEMPLATES.append({
+        'BACKEND': 'core.jinja.Jinja2',
+        'NAME': 'jinja2',
+        'DIRS': [os.path.join(BASE_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'core.jinja.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'core.context_processors.year.year',
+            ],
+        },
+    })
+# Движок шаблонов лент: None — DjangoTemplates, 'jinja2' — Jinja2
+POSTS_TEMPLATE_ENGINE = None
+# Отдавать ленты и страницу поста потоком: шапка страницы уходит сразу,
+# посты и комментарии — по мере отрисовки (posts/streaming.py).
+# Главная, закешированная cache_page, всегда отдаётся целиком
+POSTS_STREAMING = False
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -91,6 +129,139 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: алиасы из DATABASES. Локально репликой может быть
+# копия SQLite, которую обновляет команда sync_replica:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# REPLICA_DATABASES = ['replica']
+REPLICA_DATABASES = []
+# Приложения, модели которых читаются с реплик
+REPLICA_APPS = ['posts']
+# Страницы, которые читают с реплик
+REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+]
+# Сколько секунд после записи пользователь читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+
+# Прогрев процесса при запуске (см. core/warmup): шаблоны, адреса и
+# модули из WARMUP_IMPORTS. Включается в settings_production.
+WARMUP_ON_STARTUP = False
+WARMUP_IMPORTS = [
+    'sorl.thumbnail.engines.pil_engine',
+    'sorl.thumbnail.kvstores.cached_db_kvstore',
+    'sorl.thumbnail.images',
+    'PIL.Image',
+    'PIL.ImageFile',
+]
+
+# Метрики страниц для Prometheus (/metrics). Чтобы собирать метрики
+# нескольких процессов, укажите общий каталог в METRICS_DIR, например
+# os.path.join(BASE_DIR, 'metrics'). Без METRICS_TOKEN /metrics видят
+# только сотрудники.
+METRICS_ENABLED = True
+METRICS_DIR = None
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = ''
+
+# Время отрисовки шаблонов, тегов и фильтров в метриках; при
+# TEMPLATE_PROFILING_HEADER сводка ещё и в заголовке X-Template-Profile.
+# Профилировщик подменяет отрисовку шаблонов и узлов Django во всём
+# процессе и замедляет каждую страницу, поэтому включён только в DEBUG
+TEMPLATE_PROFILING = DEBUG
+TEMPLATE_PROFILING_HEADER = DEBUG
+
+# Журнал запросов к базе дольше SLOW_QUERY_SECONDS (None — выключен);
+# отчёт по нему строит команда slow_queries
+SLOW_QUERY_SECONDS = 0.5
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Профилирование запросов cProfile: доля случайных запросов, каталог
+# файлов .pstats и срок действия токена заголовка X-Profile в секундах
+PROFILING_ENABLED = True
+PROFILING_SAMPLE_RATE = 0
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_TOKEN_MAX_AGE = 60 * 60
+
+# Отслеживание памяти tracemalloc: доля случайных запросов, каталог
+# снимков, глубина стека выделений и число мест в сводке запроса
+MEMORY_TRACING_ENABLED = True
+MEMORY_TRACING_SAMPLE_RATE = 0
+MEMORY_TRACING_DIR = os.path.join(BASE_DIR, 'memory')
+MEMORY_TRACING_FRAMES = 1
+MEMORY_TRACING_TOP = 20
+
+# Лимиты запросов на пользователя или IP: страница -> (запросов подряд,
+# за сколько секунд лимит восстанавливается полностью)
+RATELIMITS = {
+    'posts:post_create': (30, 60),
+    'posts:post_edit': (30, 60),
+    'posts:add_comment': (30, 60),
+    'posts:profile_follow': (60, 60),
+    'posts:profile_unfollow': (60, 60),
+    'posts:index': (300, 60),
+    'posts:group_list': (300, 60),
+    'posts:profile': (300, 60),
+    # Выгрузка читает все посты автора или группы
+    'posts:profile_export': (10, 3600),
+    'posts:group_export': (10, 3600),
+}
+# Сколько обратных прокси (nginx, балансировщик) стоит перед сервером.
+# Без них корзины анонимов считаются по REMOTE_ADDR, а за прокси он у
+# всех посетителей один и тот же: при 0 за прокси весь сайт делил бы
+# одну корзину. С N адрес клиента берётся из X-Forwarded-For — N-й с
+# конца, то есть записанный первым из доверенных прокси.
+RATELIMIT_PROXY_COUNT = 0
+
+# Шарды для постов и комментариев (ключ — id автора). Пример:
+# for number in range(2):
+#     DATABASES[f'shard_{number}'] = {
+#         'ENGINE': 'django.db.backends.sqlite3',
+#         'NAME': os.path.join(BASE_DIR, f'db.shard_{number}.sqlite3'),
+#     }
+# POST_SHARDS = ['shard_0', 'shard_1']
+POST_SHARDS = []
+
+# Архив старых постов (команда archive_posts)
+POSTS_ARCHIVE_DATABASE = 'default'
+POSTS_ARCHIVE_AFTER_DAYS = 365
+POSTS_ARCHIVE_BATCH_SIZE = 500
+
+DATABASE_ROUTERS = [
+    'posts.archive.ArchiveRouter',
+    'posts.sharding.ShardRouter',
+    'core.routers.ReplicaRouter',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -135,12 +306,77 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма складываются в очередь, а отправляет их send_spooled_mail
+EMAIL_BACKEND = 'core.mail.SpoolEmailBackend'
+EMAIL_SPOOL_DIR = os.path.join(BASE_DIR, 'mail_spool')
+EMAIL_SPOOL_BATCH_SIZE = 100
+# Неотправленное письмо повторяется через EMAIL_SPOOL_RETRY_DELAY секунд
+# (дальше задержка удваивается), после EMAIL_SPOOL_MAX_ATTEMPTS попыток
+# или если оно не читается — переносится в EMAIL_SPOOL_DEAD_DIR. Взятое,
+# но не отправленное за EMAIL_SPOOL_LOCK_TIMEOUT секунд письмо
+# возвращается в очередь
+EMAIL_SPOOL_MAX_ATTEMPTS = 5
+EMAIL_SPOOL_RETRY_DELAY = 60
+EMAIL_SPOOL_DEAD_DIR = os.path.join(BASE_DIR, 'mail_dead')
+EMAIL_SPOOL_LOCK_TIMEOUT = 10 * 60
+#  подключаем движок filebased.EmailBackend для отправки из очереди
+EMAIL_SPOOL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 POSTS_QUANTITY = 10
+# Число постов ленты, начиная с которого оно кешируется, и через сколько
+# секунд кешированное число пересчитывается; сколько соседних страниц
+# показывать в навигации
+POSTS_COUNT_CACHE_MIN = 1000
+POSTS_COUNT_CACHE_SECONDS = 5 * 60
+POSTS_PAGE_WINDOW = 2
+# Сколько постов читать одним запросом при выгрузке
+POSTS_EXPORT_CHUNK_SIZE = 500
+# Сколько строк удалять одной транзакцией при фоновом удалении
+DELETION_BATCH_SIZE = 500
+# Очередь задач core.Job: число процессов run_workers, число попыток,
+# задержка первого повтора (дальше удваивается) и время, после которого
+# задача упавшего обработчика возвращается в очередь, в секундах
+JOBS_WORKERS = 2
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_LOCK_TIMEOUT = 10 * 60
+# RSS/Atom: число постов в ленте и страховочное время жизни кеша ленты
+# (обычно кеш сбрасывается сигналами при изменении постов)
+FEEDS_ITEMS = 20
+FEEDS_CACHE_SECONDS = 60 * 60
+# Карта сайта: адрес сайта для ссылок, число id в одной части, каталог
+# закрытых частей и страховочное время жизни кеша списка частей (обычно
+# он сбрасывается сигналами)
+SITEMAP_BASE_URL = 'http://localhost:8000'
+SITEMAP_CHUNK_SIZE = 50000
+SITEMAP_DIR = os.path.join(BASE_DIR, 'sitemaps')
+SITEMAP_CHUNKS_CACHE_SECONDS = 60 * 60
+
+# JSON API: размер страницы по умолчанию и максимальный, время жизни
+# ответа в кеше клиента и промежуточных кешей
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+API_CACHE_SECONDS = 30
+# Не больше стольких id в одном запросе /api/posts/batch и время жизни
+# закешированного поста (кеш сбрасывается при изменении поста)
+API_BATCH_MAX = 200
+API_POST_CACHE_SECONDS = 300
+# Long-poll /api/posts/updates: наибольшее время ожидания нового поста и
+# период проверки кеша на посты, созданные другими процессами
+API_LONGPOLL_SECONDS = 25
+API_LONGPOLL_STEP = 1
+# Подгрузка новых постов на первой странице главной и ленты подписок.
+# Каждая открытая такая страница постоянно держит long-poll запрос, то
+# есть поток или процесс сервера, до API_LONGPOLL_SECONDS на запрос.
+# Включайте только с многопоточным сервером, где потоков (например,
+# gunicorn --threads) больше, чем одновременно открытых лент, плюс
+# запас на обычные запросы. Выключенная, она закрывает и сам
+# /api/posts/updates: он отвечает 404.
+POSTS_LIVE_UPDATES = False
+# Базовые линии команды benchmark
+BENCHMARKS_DIR = os.path.join(BASE_DIR, 'benchmarks')
 # Константы для теста паджинатора
 POSTS_ON_FIRST_PAGE = 10
 POSTS_ON_SECOND_PAGE = 3
@@ -0,0 +1,52 @@
+"""Настройки для боевого запуска.
+
+DJANGO_SETTINGS_MODULE=yatube.settings_production. Отличия от
+settings.py: DEBUG выключен, ключ берётся из YATUBE_SECRET_KEY,
+профилировщики выключены, шаблоны разбираются один раз и хранятся в
+кеше загрузчика, а процесс прогревается при запуске (core/warmup).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+
+# Ключ из settings.py лежит в репозитории и в бою не годится.
+SECRET_KEY = os.environ.get('YATUBE_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Не задана переменная YATUBE_SECRET_KEY.')
+if os.environ.get('YATUBE_ALLOWED_HOSTS'):
+    ALLOWED_HOSTS = os.environ['YATUBE_ALLOWED_HOSTS'].split(',')
+if os.environ.get('YATUBE_PROXY_COUNT'):
+    RATELIMIT_PROXY_COUNT = int(os.environ['YATUBE_PROXY_COUNT'])
+if os.environ.get('YATUBE_SITE_URL'):
+    SITEMAP_BASE_URL = os.environ['YATUBE_SITE_URL']
+
+# Кеширующий загрузчик не перечитывает шаблоны с диска; с ним APP_DIRS
+# задаётся загрузчиком app_directories.
+TEMPLATES = [
+    dict(
+        TEMPLATES[0],
+        APP_DIRS=False,
+        OPTIONS=dict(
+            TEMPLATES[0]['OPTIONS'],
+            loaders=[(
+                'django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ],
+            )],
+        ),
+    ),
+] + TEMPLATES[1:]
+
+# Профилировщики для разбора на стенде; значения шаблонного
+# профилировщика в settings.py к тому же посчитаны для DEBUG = True.
+PROFILING_ENABLED = False
+MEMORY_TRACING_ENABLED = False
+TEMPLATE_PROFILING = False
+TEMPLATE_PROFILING_HEADER = False
+WARMUP_ON_STARTUP = True
@@ -18,9 +18,13 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import metrics_view
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
+    path('api/', include('api.urls', namespace='api')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),